@@ -1,14 +1,34 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, g
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from flask_cors import CORS
 import os
-import csv
+import sys
 import json
-import requests
 from werkzeug.utils import secure_filename
 from pathlib import Path
 import uuid
+import time
 from datetime import datetime
 
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.config_manager import ConfigManager
+from core.dataset_engine import DatasetEngine, get_dataset
+from core.http_transport import get_shared_transport
+from core.rate_limiter import get_rate_limiter
+from core.response_cache import ResponseCache, get_response_cache
+from core.single_flight import get_single_flight
+from core.session_store import open_store
+from core.document_extractor import extract_document
+from core.document_jobs import DocumentJobQueue
+from core.retrieval import retrieve_excerpts
+from core.prompt_builder import PromptBuilder, PromptBudgetExceeded, compact_context, prompt_budget
+from core.deadline import Deadline, DeadlineExceeded
+from core.intent_router import ROUTE_COHORT, ROUTE_LLM, get_intent_scorer, route_metrics
+from core.cohort_questions import answer_cohort_question, format_cohort_answer
+from core.metrics import get_metrics, llm_metrics, record_rate_limit
+
 app = Flask(__name__, 
             template_folder='../ui/templates',
             static_folder='../ui/static')
@@ -25,118 +45,315 @@ os.makedirs('uploads', exist_ok=True)
 # Get API key
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
-# Global storage for chat sessions and documents
-chat_sessions = {}
-uploaded_documents = {}
-lung_cancer_dataset = []
+# Shared keep-alive connection pool for LLM calls
+config_manager = ConfigManager()
+GEMINI_API_BASE = (os.getenv('GEMINI_API_BASE') or config_manager.get('ai.base_url')
+                   or "https://generativelanguage.googleapis.com").rstrip('/')
+http_transport = get_shared_transport(config_manager)
+if GEMINI_API_KEY and config_manager.get('http.warm_up', True):
+    http_transport.warm_up(f"{GEMINI_API_BASE}/")
+
+# Provider quota shared with AIClient
+gemini_rate_limiter = get_rate_limiter(
+    'gemini',
+    rate=config_manager.get('ai.rate_limit.requests_per_second', 2),
+    burst=config_manager.get('ai.rate_limit.burst', 5)
+)
+GEMINI_RATE_LIMIT_WAIT = config_manager.get('ai.rate_limit.max_wait', 5)
+
+# With less than this left of a request's deadline the LLM call is skipped
+MIN_LLM_SECONDS = config_manager.get('deadlines.min_llm_seconds', 1.0)
+
+# Purely statistical questions are answered from the dataset report without an LLM call
+intent_scorer = get_intent_scorer(config_manager)
+
+# Prompt-level response cache shared with AIClient (None when disabled)
+response_cache = get_response_cache(config_manager)
+
+# In-flight deduplication of identical prompts (None when disabled)
+gemini_single_flight = get_single_flight('gemini') if config_manager.get('ai.coalesce', True) else None
+
+# Prometheus metrics served at /api/metrics
+metrics = get_metrics()
+llm = llm_metrics(metrics)
+routes = route_metrics(metrics)
+chat_stage_seconds = metrics.histogram('chat_stage_seconds', 'Latency of each stage of a chat turn', ('stage',))
+upload_stage_seconds = metrics.histogram('upload_stage_seconds', 'Latency of each stage of an upload request', ('stage',))
+request_seconds = metrics.histogram('http_request_seconds', 'End-to-end request latency', ('endpoint', 'status'))
+
+# Backend the state stores below are open on (None until first opened)
+STATE_BACKEND = None
+
+def open_state_stores(backend=None):
+    """Chat sessions, documents and upload jobs, bounded by TTL and memory budget.
+    
+    The 'memory' backend keeps them in this process; 'sqlite' shares them with
+    every worker process on the host. The backend comes from the argument,
+    MEDIAI_STORAGE_BACKEND or storage.backend; reopening on the same backend is
+    a no-op, and stores replaced by another backend are closed.
+    """
+    global chat_sessions, uploaded_documents, document_jobs, STATE_BACKEND
+    backend = backend or os.getenv('MEDIAI_STORAGE_BACKEND') or config_manager.get('storage.backend', 'memory')
+    if backend == STATE_BACKEND:
+        return
+    if STATE_BACKEND is not None:
+        document_jobs.shutdown()
+        for store in (chat_sessions, uploaded_documents, document_jobs.jobs):
+            store.close()
+    
+    chat_sessions = open_store(config_manager, 'sessions', 64, 6 * 3600, backend)
+    uploaded_documents = open_store(config_manager, 'documents', 256, 6 * 3600, backend)
+    # Text extraction runs in a bounded process pool; uploads return a job id immediately
+    document_jobs = DocumentJobQueue(
+        open_store(config_manager, 'jobs', 4, 3600, backend),
+        max_workers=config_manager.get('uploads.max_workers'),
+        max_pending=config_manager.get('uploads.max_pending', 64)
+    )
+    STATE_BACKEND = backend
+
+open_state_stores()
+
+# Document chunking and how much retrieved text goes into a prompt
+RETRIEVAL_SETTINGS = {
+    'chunk_words': config_manager.get('retrieval.chunk_words', 120),
+    'overlap_words': config_manager.get('retrieval.overlap_words', 30),
+    'top_k': config_manager.get('retrieval.top_k', 4),
+    'max_chars': config_manager.get('retrieval.max_context_chars', 3000)
+}
+
+# /api/chat/batch: LLM calls in flight per batch, and how long each may queue on the rate limiter
+BATCH_SETTINGS = {
+    'max_items': config_manager.get('batch.max_items', 200),
+    'max_concurrency': config_manager.get('batch.max_concurrency', 8),
+    'rate_limit_wait': config_manager.get('batch.rate_limit_wait', 60)
+}
+
+# Longest an upload status poll may hold a worker thread; ?wait=N is capped to it
+UPLOAD_STATUS_MAX_WAIT = config_manager.get('uploads.max_status_wait', 2)
+lung_cancer_dataset = DatasetEngine({}, {})
 
 # Load dataset
 def load_dataset():
     global lung_cancer_dataset
     try:
-        data_path = Path('diseases/lung_cancer/data.csv')
-        if data_path.exists():
-            with open(data_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                lung_cancer_dataset = list(reader)
-            print(f"✅ Loaded {len(lung_cancer_dataset)} medical records")
+        # Same compact store the disease processors read, so the CSV is parsed once per process
+        dataset = get_dataset('lung_cancer')
+        if dataset is not None:
+            lung_cancer_dataset = dataset
+            print(f"✅ Loaded {lung_cancer_dataset.total_records} medical records "
+                  f"({lung_cancer_dataset.memory_usage() / 1024:.1f} KB in memory)")
         else:
             print("❌ Dataset not found - using sample data")
-            lung_cancer_dataset = []
+            lung_cancer_dataset = DatasetEngine({}, {})
     except Exception as e:
         print(f"❌ Error loading dataset: {e}")
-        lung_cancer_dataset = []
+        lung_cancer_dataset = DatasetEngine({}, {})
 
 # Load dataset on startup
 load_dataset()
 
+def create_app(storage_backend=None):
+    """App factory for multi-worker serving, e.g. MEDIAI_STORAGE_BACKEND=sqlite gunicorn --preload 'api:create_app()'
+    
+    Run it once in the master process before workers fork: the dataset and its
+    cohort index are built here and shared copy-on-write, and with the sqlite
+    storage backend any worker can serve any chat session or upload job. The
+    stores opened at import are kept unless storage_backend names another backend.
+    """
+    open_state_stores(storage_backend)
+    
+    if not lung_cancer_dataset.total_records:
+        load_dataset()
+    if lung_cancer_dataset.total_records:
+        lung_cancer_dataset.cohort_index()
+    return app
+
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'csv', 'doc', 'docx'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extract_text_from_pdf(file_path):
-    """Extract text from PDF file"""
-    try:
-        import PyPDF2
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        return text.strip()
-    except ImportError:
-        return "PDF processing requires PyPDF2. Install with: pip install PyPDF2"
-    except Exception as e:
-        return f"Error reading PDF: {str(e)}"
+def gemini_request(prompt, max_tokens):
+    """Build headers and payload for a Gemini generate call"""
+    headers = {
+        'Content-Type': 'application/json',
+        'x-goog-api-key': GEMINI_API_KEY
+    }
+    
+    payload = {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": {
+            "temperature": 0.7,
+            "maxOutputTokens": max_tokens,
+            "topP": 0.8,
+            "topK": 40
+        },
+        "safetySettings": [
+            {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+            {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+            {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+            {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"}
+        ]
+    }
+    return headers, payload
 
-def read_text_file(file_path):
-    """Read plain text file"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
-    except Exception as e:
-        return f"Error reading file: {str(e)}"
+def gemini_cache_key(prompt, max_tokens):
+    """Response cache (and single-flight) key for a prompt and its generation settings"""
+    _, payload = gemini_request(prompt, max_tokens)
+    return ResponseCache.make_key(prompt, 'gemini-1.5-flash', payload['generationConfig'])
 
-def call_gemini_ai(prompt, max_tokens=1500):
+def call_gemini_ai(prompt, max_tokens=1500, rate_limit_wait=None, caller='chat', deadline=None):
     """Enhanced Gemini AI call with better error handling"""
     if not GEMINI_API_KEY:
         return None
+    deadline = deadline or Deadline()
+    
+    request_key = gemini_cache_key(prompt, max_tokens)
+    cache_key = request_key if response_cache else None
+    if cache_key:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            llm['cache_hits'].inc(caller=caller)
+            return cached
+    
+    if not deadline.allows(MIN_LLM_SECONDS):
+        return None
+    
+    def request():
+        return request_gemini_ai(prompt, max_tokens, cache_key, rate_limit_wait, caller, deadline)
     
+    # Identical prompts already in flight wait for that call (under its first caller's deadline)
+    if not gemini_single_flight:
+        return request()
     try:
-        url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
-        headers = {
-            'Content-Type': 'application/json',
-            'x-goog-api-key': GEMINI_API_KEY
-        }
-        
-        payload = {
-            "contents": [{"parts": [{"text": prompt}]}],
-            "generationConfig": {
-                "temperature": 0.7,
-                "maxOutputTokens": max_tokens,
-                "topP": 0.8,
-                "topK": 40
-            },
-            "safetySettings": [
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"}
-            ]
-        }
+        text, shared = gemini_single_flight.do(request_key, request, timeout=deadline.cap(None))
+    except TimeoutError:
+        return None
+    if shared:
+        llm['coalesced'].inc(caller=caller)
+    return text
+
+def request_gemini_ai(prompt, max_tokens, cache_key=None, rate_limit_wait=None, caller='chat', deadline=None):
+    """One rate-limited Gemini generate call; None when it is refused, fails or runs out of time"""
+    deadline = deadline or Deadline()
+    started = time.perf_counter()
+    # Queue only as long as still leaves time for the call itself
+    wait = GEMINI_RATE_LIMIT_WAIT if rate_limit_wait is None else rate_limit_wait
+    acquired = gemini_rate_limiter.acquire(timeout=max(min(wait, deadline.remaining() - MIN_LLM_SECONDS), 0))
+    record_rate_limit(llm, caller, time.perf_counter() - started, acquired)
+    if not acquired:
+        print("Gemini rate limit reached, falling back to dataset analysis")
+        return None
+    
+    try:
+        url = f"{GEMINI_API_BASE}/v1beta/models/gemini-1.5-flash:generateContent"
+        headers, payload = gemini_request(prompt, max_tokens)
         
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+        with llm['latency'].time(caller=caller):
+            response = http_transport.post(url, headers=headers, json=payload, timeout=30, deadline=deadline)
         
         if response.status_code == 200:
             data = response.json()
             if 'candidates' in data and len(data['candidates']) > 0:
                 candidate = data['candidates'][0]
                 if 'content' in candidate and 'parts' in candidate['content']:
-                    return candidate['content']['parts'][0]['text']
+                    text = candidate['content']['parts'][0]['text']
+                    if cache_key:
+                        response_cache.set(cache_key, text)
+                    return text
         else:
             print(f"Gemini API error: {response.status_code} - {response.text}")
             
     except Exception as e:
         print(f"AI API error: {e}")
     
+    llm['errors'].inc(caller=caller)
     return None
 
+def stream_gemini_ai(prompt, max_tokens=1500, deadline=None):
+    """Yield response text chunks from Gemini's streaming API as they arrive.
+    
+    Raises DeadlineExceeded if the deadline passes mid-stream.
+    """
+    if not GEMINI_API_KEY:
+        return
+    deadline = deadline or Deadline()
+    
+    cache_key = gemini_cache_key(prompt, max_tokens) if response_cache else None
+    if cache_key:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            llm['cache_hits'].inc(caller='chat_stream')
+            yield cached
+            return
+    
+    if not deadline.allows(MIN_LLM_SECONDS):
+        return
+    
+    started = time.perf_counter()
+    acquired = gemini_rate_limiter.acquire(
+        timeout=max(min(GEMINI_RATE_LIMIT_WAIT, deadline.remaining() - MIN_LLM_SECONDS), 0))
+    record_rate_limit(llm, 'chat_stream', time.perf_counter() - started, acquired)
+    if not acquired:
+        print("Gemini rate limit reached, falling back to dataset analysis")
+        return
+    
+    url = f"{GEMINI_API_BASE}/v1beta/models/gemini-1.5-flash:streamGenerateContent?alt=sse"
+    headers, payload = gemini_request(prompt, max_tokens)
+    
+    with http_transport.post(url, headers=headers, json=payload, timeout=30, stream=True, deadline=deadline) as response:
+        if response.status_code != 200:
+            print(f"Gemini API error: {response.status_code} - {response.text}")
+            llm['errors'].inc(caller='chat_stream')
+            return
+        
+        response.encoding = 'utf-8'
+        chunks = []
+        for line in response.iter_lines(decode_unicode=True):
+            deadline.check('the next streamed chunk')
+            if not line or not line.startswith('data:'):
+                continue
+            chunk = json.loads(line[len('data:'):].strip())
+            for candidate in chunk.get('candidates', [])[:1]:
+                for part in candidate.get('content', {}).get('parts', []):
+                    if part.get('text'):
+                        chunks.append(part['text'])
+                        yield part['text']
+    
+    # Only complete streams are cached
+    if cache_key and chunks:
+        response_cache.set(cache_key, ''.join(chunks))
+
+def dataset_query_topic(query):
+    """Which dataset report answers a query: smoking, age, gender, statistics or general"""
+    return intent_scorer.topic(query) or 'general'
+
 def analyze_dataset_query(query):
     """Analyze query against the medical dataset"""
-    if not lung_cancer_dataset:
+    return dataset_topic_report(dataset_query_topic(query))
+
+def analyze_dataset_queries(queries):
+    """Dataset analysis for many queries, building each distinct report once"""
+    topics = [dataset_query_topic(query) for query in queries]
+    reports = {topic: dataset_topic_report(topic) for topic in set(topics)}
+    return [reports[topic] for topic in topics]
+
+def dataset_topic_report(topic):
+    """Dataset report for one topic, built from the precomputed aggregates"""
+    if not lung_cancer_dataset.total_records:
         return "Medical dataset not available. Please ensure the dataset is properly loaded."
     
-    query_lower = query.lower()
-    total_records = len(lung_cancer_dataset)
+    total_records = lung_cancer_dataset.total_records
+    aggregates = lung_cancer_dataset.aggregates
     
     try:
         # Smoking analysis
-        if 'smoking' in query_lower or 'smoke' in query_lower:
-            smokers = sum(1 for row in lung_cancer_dataset if row.get('SMOKING') == '1')
-            cancer_cases = [row for row in lung_cancer_dataset if row.get('LUNG_CANCER') == 'YES']
-            smokers_with_cancer = sum(1 for row in cancer_cases if row.get('SMOKING') == '1')
-            total_cancer = len(cancer_cases)
+        if topic == 'smoking':
+            smokers = aggregates['smoking']['smokers']
+            smokers_with_cancer = aggregates['smoking']['smokers_with_target']
+            total_cancer = aggregates['target']['cases']
+            non_smokers = total_records - smokers
+            non_smokers_with_cancer = total_cancer - smokers_with_cancer
             
             result = f"""**SMOKING ANALYSIS FROM MEDICAL DATASET**
 
@@ -149,38 +366,60 @@ def analyze_dataset_query(query):
 • Total cancer cases: {total_cancer:,}
 • Cancer cases with smoking history: {smokers_with_cancer:,}
 • **{(smokers_with_cancer/total_cancer*100):.1f}% of cancer patients have smoking history**
+• Cancer rate among smokers: {(smokers_with_cancer/smokers*100 if smokers else 0):.1f}%
+• Cancer rate among non-smokers: {(non_smokers_with_cancer/non_smokers*100 if non_smokers else 0):.1f}%
 
 💡 **Key Insight:** Smoking appears in {(smokers_with_cancer/total_cancer*100):.1f}% of cancer cases in our dataset."""
             
             return result
         
         # Age analysis
-        elif 'age' in query_lower:
-            ages = [int(row.get('AGE', 0)) for row in lung_cancer_dataset if row.get('AGE', '').isdigit()]
-            cancer_ages = [int(row.get('AGE', 0)) for row in lung_cancer_dataset if row.get('LUNG_CANCER') == 'YES' and row.get('AGE', '').isdigit()]
+        elif topic == 'age':
+            ages = aggregates['age']
             
-            if ages and cancer_ages:
-                avg_age = sum(ages) / len(ages)
-                avg_cancer_age = sum(cancer_ages) / len(cancer_ages)
+            if ages['count'] and ages['target_count']:
+                avg_age = ages['mean']
+                avg_cancer_age = ages['target_mean']
                 
                 return f"""**AGE ANALYSIS FROM MEDICAL DATASET**
 
 📊 **Age Demographics:**
 • Average age of all patients: {avg_age:.1f} years
-• Age range: {min(ages)} - {max(ages)} years
-• Median age: {sorted(ages)[len(ages)//2]} years
+• Age range: {ages['min']} - {ages['max']} years
+• Median age: {ages['median']} years
 
 🎯 **Cancer Age Analysis:**
 • Average age of cancer patients: {avg_cancer_age:.1f} years
-• Cancer cases analyzed: {len(cancer_ages):,}
+• Cancer cases analyzed: {ages['target_count']:,}
 
 💡 **Key Insight:** Cancer patients are on average {abs(avg_cancer_age-avg_age):.1f} years {'older' if avg_cancer_age > avg_age else 'younger'} than the general patient population."""
         
+        # Gender analysis
+        elif topic == 'gender':
+            cancer_cases = aggregates['target']['cases']
+            male_count = aggregates['gender'].get('M', 0)
+            female_count = aggregates['gender'].get('F', 0)
+            index = lung_cancer_dataset.cohort_index()
+            female_cancer = index.query('GENDER=F')['cancer_cases'] if female_count else 0
+            male_cancer = index.query('GENDER=M')['cancer_cases'] if male_count else 0
+            
+            return f"""**GENDER ANALYSIS FROM MEDICAL DATASET**
+
+📊 **Gender Distribution:**
+• Male patients: {male_count:,} ({(male_count/total_records*100):.1f}%)
+• Female patients: {female_count:,} ({(female_count/total_records*100):.1f}%)
+
+🎯 **Cancer Cases by Gender:**
+• Male cancer cases: {male_cancer:,} ({(male_cancer/cancer_cases*100 if cancer_cases else 0):.1f}% of {cancer_cases:,} cases)
+• Female cancer cases: {female_cancer:,} ({(female_cancer/cancer_cases*100 if cancer_cases else 0):.1f}% of {cancer_cases:,} cases)
+
+💡 **Key Insight:** The cancer rate is {(male_cancer/male_count*100 if male_count else 0):.1f}% among male patients and {(female_cancer/female_count*100 if female_count else 0):.1f}% among female patients."""
+        
         # Statistics
-        elif 'statistic' in query_lower or 'overview' in query_lower or 'summary' in query_lower:
-            cancer_cases = sum(1 for row in lung_cancer_dataset if row.get('LUNG_CANCER') == 'YES')
-            male_count = sum(1 for row in lung_cancer_dataset if row.get('GENDER') == 'M')
-            female_count = sum(1 for row in lung_cancer_dataset if row.get('GENDER') == 'F')
+        elif topic == 'statistics':
+            cancer_cases = aggregates['target']['cases']
+            male_count = aggregates['gender'].get('M', 0)
+            female_count = aggregates['gender'].get('F', 0)
             
             return f"""**MEDICAL DATASET STATISTICS**
 
@@ -200,7 +439,7 @@ def analyze_dataset_query(query):
         
         else:
             # General dataset info
-            cancer_cases = sum(1 for row in lung_cancer_dataset if row.get('LUNG_CANCER') == 'YES')
+            cancer_cases = aggregates['target']['cases']
             return f"""**MEDICAL DATASET AVAILABLE**
 
 📊 I have access to {total_records:,} medical records including {cancer_cases:,} cancer cases.
@@ -217,60 +456,96 @@ def analyze_dataset_query(query):
     except Exception as e:
         return f"Error analyzing dataset: {str(e)}"
 
-def get_chat_session(chat_id):
-    """Get or create chat session"""
-    if chat_id not in chat_sessions:
-        chat_sessions[chat_id] = {
-            'id': chat_id,
-            'created': datetime.now().isoformat(),
-            'documents': [],
-            'message_count': 0
-        }
-    return chat_sessions[chat_id]
+def new_chat_session(chat_id):
+    return {
+        'id': chat_id,
+        'created': datetime.now().isoformat(),
+        'documents': [],
+        'message_count': 0
+    }
 
-@app.route('/')
-def index():
-    return render_template('index.html')
+def record_chat_message(chat_id):
+    """Atomically bump the session message count and return a snapshot of the session"""
+    def bump(session):
+        session['message_count'] = session.get('message_count', 0) + 1
+    
+    session = chat_sessions.update(chat_id, bump, factory=lambda: new_chat_session(chat_id))
+    return dict(session, documents=list(session.get('documents', [])))
 
-@app.route('/api/chat', methods=['POST'])
-def chat():
+def attach_document(chat_id, doc_id):
+    """Link an uploaded document to a chat session"""
+    chat_sessions.update(chat_id, lambda session: session.setdefault('documents', []).append(doc_id),
+                         factory=lambda: new_chat_session(chat_id))
+
+def session_memory_bytes(session):
+    """Accounted bytes for a session and the documents linked to it"""
+    if not session.get('id'):
+        return 0
+    return chat_sessions.size_of(session['id']) + sum(
+        uploaded_documents.size_of(doc_id) for doc_id in session.get('documents', []))
+
+def client_document(doc):
+    """A document passed inline in a request, minus anything only the server may build (its retrieval index)"""
+    if not isinstance(doc, dict) or not isinstance(doc.get('content'), str) or not doc['content']:
+        return None
+    return {key: value for key, value in doc.items() if key != 'index'}
+
+def build_prompt(builder):
+    """The builder's prompt, or None (the turn's fallback is served) when the question alone is over budget"""
     try:
-        data = request.get_json()
-        user_message = data.get('message', '').strip()
-        chat_id = data.get('chat_id')
-        uploaded_docs = data.get('uploaded_documents', [])
-        
-        if not user_message:
-            return jsonify({'error': 'Message required'}), 400
-        
-        # Get chat session
-        session = get_chat_session(chat_id) if chat_id else {'documents': []}
-        session['message_count'] = session.get('message_count', 0) + 1
-        
-        # Determine if this is a document-specific query
-        doc_keywords = ['document', 'pdf', 'file', 'uploaded', 'summarize', 'summary', 
-                       'mr.', 'patient', 'diagnosis', 'lab', 'result', 'report', 'findings']
-        
+        return builder.build()
+    except PromptBudgetExceeded as e:
+        print(f"❌ {e}")
+        return None
+
+def prepare_chat_turn(user_message, chat_id=None, uploaded_docs=None, dataset_analysis=None, deadline=None,
+                      caller='chat', document_ids=None):
+    """Resolve session, documents, route, prompt and fallback text for a chat message"""
+    # Get chat session
+    session = record_chat_message(chat_id) if chat_id else {'documents': [], 'message_count': 1}
+    
+    # Determine if this is a document-specific query
+    doc_keywords = ['document', 'pdf', 'file', 'uploaded', 'summarize', 'summary', 
+                   'mr.', 'patient', 'diagnosis', 'lab', 'result', 'report', 'findings']
+    
+    with chat_stage_seconds.time(stage='doc_keyword_check'):
         is_document_query = any(keyword in user_message.lower() for keyword in doc_keywords)
+    
+    # Check if we have uploaded documents in this session (or named by id in the request)
+    available_documents = []
+    requested_ids = [doc_id for doc_id in document_ids if isinstance(doc_id, str)] if isinstance(document_ids, list) else []
+    for doc_id in dict.fromkeys(list(session.get('documents', [])) + requested_ids):
+        doc = uploaded_documents.get(doc_id)
+        if doc is not None:
+            available_documents.append(doc)
+    
+    # Also check for documents passed in request
+    session_doc_ids = {doc.get('id') for doc in available_documents}
+    for doc in uploaded_docs if isinstance(uploaded_docs, list) else []:
+        doc = client_document(doc)
+        if doc is not None and (not doc.get('id') or doc.get('id') not in session_doc_ids):
+            available_documents.append(doc)
+    
+    prompt = None
+    prompt_report = None
+    max_tokens = 1500
+    # Too little of the deadline left for the LLM: skip retrieval and answer from the dataset
+    out_of_time = bool(GEMINI_API_KEY) and deadline is not None and not deadline.allows(MIN_LLM_SECONDS)
+    fallback_source = 'dataset_analysis'
+    intent = {'route': ROUTE_LLM, 'confidence': None, 'topic': None}
+    
+    prompt_started = time.perf_counter()
+    if is_document_query and available_documents and not out_of_time:
+        # Document-specific query
+        max_tokens = 2000
+        # Only the chunks most relevant to the question go into the prompt
+        excerpts = retrieve_excerpts(available_documents, user_message, **RETRIEVAL_SETTINGS)
+        builder = PromptBuilder('chat_document', prompt_budget(config_manager, 'chat_document'))
         
-        # Check if we have uploaded documents in this session
-        available_documents = []
-        for doc_id in session.get('documents', []):
-            if doc_id in uploaded_documents:
-                available_documents.append(uploaded_documents[doc_id])
-        
-        # Also check for documents passed in request
-        for doc in uploaded_docs:
-            if doc.get('content'):
-                available_documents.append(doc)
-        
-        response_text = ""
-        
-        if is_document_query and available_documents:
-            # Document-specific query
-            if len(available_documents) == 1:
-                doc = available_documents[0]
-                prompt = f"""You are a professional medical AI assistant analyzing a medical document.
+        if len(available_documents) == 1:
+            doc = available_documents[0]
+            doc_content = "\n[...] ".join(excerpts[0])
+            builder.add('header', f"""You are a professional medical AI assistant analyzing a medical document.
 
 DOCUMENT DETAILS:
 - File: {doc.get('name', 'Medical Document')}
@@ -278,9 +553,13 @@ DOCUMENT DETAILS:
 - Upload Time: {doc.get('uploadTime', 'Recent')}
 
 DOCUMENT CONTENT:
-{doc.get('content', '')[:3000]}
+""")
+            builder.add('document', doc_content, trim=True)
+            builder.add('question_label', """
 
-USER QUESTION: {user_message}
+USER QUESTION: """)
+            builder.add('question', user_message)
+            builder.add('instructions', """
 
 INSTRUCTIONS:
 1. Provide a professional medical analysis
@@ -292,21 +571,23 @@ INSTRUCTIONS:
 7. Use clear, professional medical language
 8. Structure your response with clear headings and bullet points
 
-Provide a detailed, professional response:"""
-            
-            else:
-                # Multiple documents
-                docs_content = ""
-                for i, doc in enumerate(available_documents, 1):
-                    docs_content += f"\n--- DOCUMENT {i}: {doc.get('name', f'Document {i}')} ---\n"
-                    docs_content += doc.get('content', '')[:1500] + "\n"
-                
-                prompt = f"""You are a professional medical AI assistant analyzing multiple medical documents.
+Provide a detailed, professional response:""")
+        
+        else:
+            # Multiple documents
+            builder.add('header', f"""You are a professional medical AI assistant analyzing multiple medical documents.
 
 AVAILABLE DOCUMENTS ({len(available_documents)} files):
-{docs_content}
+""")
+            for i, (doc, doc_excerpts) in enumerate(zip(available_documents, excerpts), 1):
+                doc_content = f"\n--- DOCUMENT {i}: {doc.get('name', f'Document {i}')} ---\n"
+                doc_content += "\n[...] ".join(doc_excerpts) if doc_excerpts else "(no passages relevant to the question)"
+                builder.add(f'document_{i}', doc_content + "\n", trim=True)
+            builder.add('question_label', """
 
-USER QUESTION: {user_message}
+USER QUESTION: """)
+            builder.add('question', user_message)
+            builder.add('instructions', """
 
 INSTRUCTIONS:
 1. Analyze all relevant documents
@@ -317,14 +598,13 @@ INSTRUCTIONS:
 6. Use professional medical language
 7. Structure response clearly
 
-Provide a detailed analysis:"""
-            
-            ai_response = call_gemini_ai(prompt, max_tokens=2000)
-            
-            if ai_response:
-                response_text = ai_response
-            else:
-                response_text = f"""**Document Analysis**
+Provide a detailed analysis:""")
+        
+        prompt = build_prompt(builder)
+        prompt_report = builder.report if prompt else None
+        
+        fallback_source = 'document_notice'
+        fallback = f"""**Document Analysis**
 
 I've processed your uploaded document(s) but AI analysis is currently unavailable.
 
@@ -332,18 +612,38 @@ I've processed your uploaded document(s) but AI analysis is currently unavailabl
 {chr(10).join([f"• {doc.get('name', 'Document')} ({doc.get('type', 'Unknown type')})" for doc in available_documents])}
 
 Please ensure your API configuration is correct for full AI-powered analysis."""
+    
+    else:
+        # Dataset query or general medical question; purely statistical ones skip the LLM
+        with chat_stage_seconds.time(stage='route'):
+            intent = intent_scorer.score(user_message)
+        if intent['route'] != ROUTE_LLM and not lung_cancer_dataset.total_records:
+            intent = dict(intent, route=ROUTE_LLM)
+        routes['confidence'].observe(intent['confidence'], route=intent['route'])
+        if intent['route'] == ROUTE_COHORT:
+            # Counts for the exact cohort asked about, not a report on the whole dataset
+            with chat_stage_seconds.time(stage='cohort_answer'):
+                dataset_analysis = format_cohort_answer(
+                    intent['cohort'], answer_cohort_question(lung_cancer_dataset, intent['cohort']))
+        elif dataset_analysis is None:
+            with chat_stage_seconds.time(stage='analyze_dataset_query'):
+                dataset_analysis = analyze_dataset_query(user_message)
+        fallback = dataset_analysis
+        prompt_started = time.perf_counter()
         
-        else:
-            # Dataset query or general medical question
-            dataset_analysis = analyze_dataset_query(user_message)
-            
-            if GEMINI_API_KEY:
-                prompt = f"""You are a professional medical AI assistant with access to comprehensive medical datasets.
+        if GEMINI_API_KEY and not out_of_time and intent['route'] == ROUTE_LLM:
+            builder = PromptBuilder('chat_dataset', prompt_budget(config_manager, 'chat_dataset'))
+            builder.add('header', """You are a professional medical AI assistant with access to comprehensive medical datasets.
 
 MEDICAL DATASET ANALYSIS:
-{dataset_analysis}
+""")
+            # The user-facing report carries emoji and markdown the model does not need
+            builder.add('dataset', compact_context(dataset_analysis or ''), trim=True)
+            builder.add('question_label', """
 
-USER QUESTION: {user_message}
+USER QUESTION: """)
+            builder.add('question', user_message)
+            builder.add('instructions', """
 
 INSTRUCTIONS:
 1. Provide evidence-based medical information using the dataset insights
@@ -354,22 +654,97 @@ INSTRUCTIONS:
 6. Be thorough but concise
 7. Focus on the specific question asked
 
-Provide a comprehensive medical response:"""
+Provide a comprehensive medical response:""")
+            prompt = build_prompt(builder)
+            prompt_report = builder.report if prompt else None
+    chat_stage_seconds.observe(time.perf_counter() - prompt_started, stage='prompt_build')
+    routes['routes'].inc(route=intent['route'], caller=caller)
+    
+    return {
+        'message': user_message,
+        'session': session,
+        'available_documents': available_documents,
+        'prompt': prompt,
+        'prompt_tokens': prompt_report['prompt_tokens'] if prompt_report else None,
+        'max_tokens': max_tokens,
+        'fallback': fallback,
+        'fallback_source': fallback_source,
+        'route': intent['route'],
+        'route_confidence': intent['confidence'],
+        'deadline': deadline,
+        'deadline_exceeded': out_of_time
+    }
+
+def chat_metadata(turn):
+    """Response metadata shared by the chat endpoints"""
+    return {
+        'dataset_records': lung_cancer_dataset.total_records,
+        'documents_available': len(turn['available_documents']),
+        'message_count': turn['session'].get('message_count', 0),
+        'session_bytes': session_memory_bytes(turn['session']),
+        'prompt_tokens': turn.get('prompt_tokens'),
+        'response_source': turn.get('response_source'),
+        'route': turn.get('route'),
+        'route_confidence': turn.get('route_confidence'),
+        'deadline_exceeded': turn.get('deadline_exceeded', False),
+        'deadline': turn['deadline'].to_dict() if turn.get('deadline') else None,
+        'ai_model': 'Gemini 1.5 Flash' if GEMINI_API_KEY and turn.get('route') == ROUTE_LLM else 'Dataset Analysis'
+    }
+
+def resolve_chat_response(turn, ai_response):
+    """The AI answer or the turn's fallback, recording which was served and whether the deadline forced it"""
+    deadline = turn.get('deadline')
+    if not ai_response and turn.get('prompt') and deadline is not None and not deadline.allows(MIN_LLM_SECONDS):
+        turn['deadline_exceeded'] = True
+    turn['response_source'] = 'ai' if ai_response else turn['fallback_source']
+    return ai_response if ai_response else turn['fallback']
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    # Streaming responses are timed to their first byte
+    if request.endpoint and hasattr(g, 'request_started'):
+        request_seconds.observe(time.perf_counter() - g.request_started,
+                                endpoint=request.endpoint, status=response.status_code)
+    return response
+
+def sse_event(event, data):
+    """Format one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/')
+def index():
+    return render_template('index.html')
 
-                ai_response = call_gemini_ai(prompt)
-                response_text = ai_response if ai_response else dataset_analysis
-            else:
-                response_text = dataset_analysis
+@app.route('/api/chat', methods=['POST'])
+def chat():
+    try:
+        data = request.get_json()
+        user_message = data.get('message', '').strip()
         
-        return jsonify({
-            'ai_response': response_text,
-            'metadata': {
-                'dataset_records': len(lung_cancer_dataset),
-                'documents_available': len(available_documents),
-                'message_count': session.get('message_count', 0),
-                'ai_model': 'Gemini 1.5 Flash' if GEMINI_API_KEY else 'Dataset Analysis'
-            }
-        })
+        if not user_message:
+            return jsonify({'error': 'Message required'}), 400
+        
+        deadline = Deadline.for_endpoint(config_manager, 'chat', g.request_started)
+        turn = prepare_chat_turn(user_message, data.get('chat_id'), data.get('uploaded_documents', []),
+                                 deadline=deadline)
+        
+        with chat_stage_seconds.time(stage='call_gemini_ai'):
+            ai_response = call_gemini_ai(turn['prompt'], max_tokens=turn['max_tokens'],
+                                         deadline=deadline) if turn['prompt'] else None
+        if not ai_response and turn['route'] == ROUTE_LLM:
+            llm['fallbacks'].inc(caller='chat')
+        response_text = resolve_chat_response(turn, ai_response)
+        
+        with chat_stage_seconds.time(stage='serialization'):
+            response = jsonify({
+                'ai_response': response_text,
+                'metadata': chat_metadata(turn)
+            })
+        return response
         
     except Exception as e:
         print(f"Chat error: {e}")
@@ -378,6 +753,169 @@ Provide a comprehensive medical response:"""
             'metadata': {'error': True, 'error_details': str(e)}
         }), 500
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Stream the chat response as Server-Sent Events: token frames, then one done frame"""
+    data = request.get_json(silent=True) or {}
+    user_message = data.get('message', '').strip()
+    
+    if not user_message:
+        return jsonify({'error': 'Message required'}), 400
+    
+    deadline = Deadline.for_endpoint(config_manager, 'chat_stream', g.request_started)
+    try:
+        turn = prepare_chat_turn(user_message, data.get('chat_id'), data.get('uploaded_documents', []),
+                                 deadline=deadline, caller='chat_stream')
+    except Exception as e:
+        print(f"Chat error: {e}")
+        return jsonify({'error': 'Chat failed', 'error_details': str(e)}), 500
+    
+    def generate():
+        streamed = False
+        interrupted = False
+        
+        if turn['prompt']:
+            try:
+                for text in stream_gemini_ai(turn['prompt'], max_tokens=turn['max_tokens'], deadline=deadline):
+                    streamed = True
+                    yield sse_event('token', {'text': text})
+            except DeadlineExceeded as e:
+                print(f"AI streaming stopped: {e}")
+                turn['deadline_exceeded'] = True
+                interrupted = streamed
+            except Exception as e:
+                print(f"AI streaming error: {e}")
+                llm['errors'].inc(caller='chat_stream')
+                interrupted = streamed
+        
+        if not streamed:
+            if turn['route'] == ROUTE_LLM:
+                llm['fallbacks'].inc(caller='chat_stream')
+            yield sse_event('token', {'text': resolve_chat_response(turn, None)})
+        else:
+            turn['response_source'] = 'ai'
+        
+        metadata = chat_metadata(turn)
+        metadata['streamed'] = streamed
+        if interrupted:
+            metadata['interrupted'] = True
+        yield sse_event('done', {'metadata': metadata})
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/chat/batch', methods=['POST'])
+def chat_batch():
+    """Answer a list of messages, streaming one result event per item as it finishes, then a done event"""
+    data = request.get_json(silent=True) or {}
+    items = data.get('messages')
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'messages must be a non-empty list'}), 400
+    if len(items) > BATCH_SETTINGS['max_items']:
+        return jsonify({'error': f"At most {BATCH_SETTINGS['max_items']} messages per batch"}), 400
+    
+    deadline = Deadline.for_endpoint(config_manager, 'chat_batch', g.request_started)
+    items = [item if isinstance(item, dict) else {'message': item} for item in items]
+    messages = [str(item.get('message') or '').strip() for item in items]
+    
+    # Dataset reports are shared by every message on the same topic
+    with chat_stage_seconds.time(stage='batch_dataset_analysis'):
+        analyses = analyze_dataset_queries(messages)
+    
+    turns = []
+    for item, message, analysis in zip(items, messages, analyses):
+        if not message:
+            turns.append({'error': 'Message required'})
+            continue
+        try:
+            turns.append(prepare_chat_turn(message, item.get('chat_id'), item.get('uploaded_documents', []),
+                                           dataset_analysis=analysis, deadline=deadline, caller='chat_batch',
+                                           document_ids=item.get('document_ids', [])))
+        except Exception as e:
+            print(f"Chat batch error: {e}")
+            turns.append({'error': str(e)})
+    
+    def answer(turn):
+        if not turn['prompt']:
+            return None
+        return call_gemini_ai(turn['prompt'], max_tokens=turn['max_tokens'],
+                              rate_limit_wait=BATCH_SETTINGS['rate_limit_wait'], caller='chat_batch',
+                              deadline=deadline)
+    
+    def generate():
+        started = time.perf_counter()
+        failed = fallbacks = dataset_routed = 0
+        for index, turn in enumerate(turns):
+            if 'error' in turn:
+                failed += 1
+                yield sse_event('result', {'index': index, 'error': turn['error']})
+        
+        pending = [index for index, turn in enumerate(turns) if 'error' not in turn]
+        executor = ThreadPoolExecutor(max_workers=max(1, min(BATCH_SETTINGS['max_concurrency'], len(pending))),
+                                      thread_name_prefix='chat-batch')
+        futures = {executor.submit(answer, turns[index]): index for index in pending}
+        try:
+            for future in as_completed(futures):
+                index = futures[future]
+                turn = turns[index]
+                try:
+                    ai_response = future.result()
+                except Exception as e:
+                    print(f"Chat batch error: {e}")
+                    ai_response = None
+                if turn['route'] != ROUTE_LLM:
+                    dataset_routed += 1
+                elif not ai_response:
+                    fallbacks += 1
+                    llm['fallbacks'].inc(caller='chat_batch')
+                response_text = resolve_chat_response(turn, ai_response)
+                yield sse_event('result', {
+                    'index': index,
+                    'ai_response': response_text,
+                    'metadata': chat_metadata(turn)
+                })
+        finally:
+            # A disconnected client must not keep queued items calling the provider
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        yield sse_event('done', {
+            'count': len(turns),
+            'failed': failed,
+            'fallbacks': fallbacks,
+            'dataset_routed': dataset_routed,
+            'elapsed_seconds': round(time.perf_counter() - started, 3)
+        })
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def upload_job_response(job):
+    """Client view of an extraction job; finished jobs carry the extracted document"""
+    response = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'file_info': job['file_info'],
+        'status_url': f"/api/upload/{job['id']}"
+    }
+    
+    if job['status'] == 'done':
+        doc = uploaded_documents.get(job['id'])
+        if doc is None:
+            response.update({'status': 'expired', 'error': 'Document is no longer available'})
+        else:
+            response.update({
+                'success': True,
+                'extracted_text': doc['content'],
+                'analysis': {
+                    'document_analysis': job.get('analysis', '')
+                }
+            })
+    elif job['status'] == 'failed':
+        response.update({'success': False, 'error': f"Processing failed: {job.get('error', 'unknown error')}"})
+    
+    return response
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     try:
@@ -397,103 +935,128 @@ def upload_file():
         file_id = str(uuid.uuid4())
         filename = secure_filename(file.filename)
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_{filename}")
-        file.save(file_path)
+        with upload_stage_seconds.time(stage='save'):
+            file.save(file_path)
         
         # Get file info
         file_size = os.path.getsize(file_path)
         file_ext = filename.rsplit('.', 1)[1].lower()
+        file_info = {
+            'id': file_id,
+            'filename': filename,
+            'size': f"{file_size / 1024:.1f} KB",
+            'type': file_ext.upper()
+        }
+        chat_id = request.form.get('chat_id')
         
-        # Extract text based on file type
-        extracted_text = ""
+        submitted = time.perf_counter()
         
-        try:
-            if file_ext == 'pdf':
-                extracted_text = extract_text_from_pdf(file_path)
-            elif file_ext == 'txt':
-                extracted_text = read_text_file(file_path)
-            elif file_ext in ['png', 'jpg', 'jpeg', 'gif']:
-                extracted_text = f"Image file uploaded: {filename}. Text extraction from images requires OCR processing."
-            elif file_ext == 'csv':
-                extracted_text = f"CSV dataset uploaded: {filename}. This appears to be a medical dataset file."
-            else:
-                extracted_text = f"File uploaded: {filename}. Content extraction not available for this file type."
-            
+        def store_document(result):
+            # Queue wait plus extraction in the worker process
+            upload_stage_seconds.observe(time.perf_counter() - submitted, stage='extraction')
             # Store document
-            doc_data = {
+            uploaded_documents.set(file_id, {
                 'id': file_id,
                 'name': filename,
-                'content': extracted_text,
+                'content': result['extracted_text'],
                 'type': file_ext.upper(),
-                'size': f"{file_size / 1024:.1f} KB",
+                'size': file_info['size'],
                 'uploadTime': datetime.now().isoformat(),
-                'processed': True
-            }
-            
-            uploaded_documents[file_id] = doc_data
-            
-            # Generate analysis
-            analysis_text = "Document uploaded and processed successfully."
-            
-            if 'patient' in extracted_text.lower():
-                analysis_text += " This appears to be a patient medical document."
-            if 'diagnosis' in extracted_text.lower():
-                analysis_text += " The document contains diagnostic information."
-            if 'test' in extracted_text.lower() or 'result' in extracted_text.lower():
-                analysis_text += " Test results are present in the document."
-            
-        except Exception as e:
-            extracted_text = f"Error processing file: {str(e)}"
-            analysis_text = "File uploaded but processing encountered an error."
+                'processed': True,
+                'index': result['index']
+            })
+            if chat_id:
+                attach_document(chat_id, file_id)
+            return {'analysis': result['analysis']}
         
-        finally:
-            # Clean up uploaded file
-            try:
+        def discard_upload():
+            # Extraction never ran, so the worker did not delete the file
+            if os.path.exists(file_path):
                 os.remove(file_path)
-            except:
-                pass
         
-        return jsonify({
-            'success': True,
-            'file_info': {
-                'id': file_id,
-                'filename': filename,
-                'size': f"{file_size / 1024:.1f} KB",
-                'type': file_ext.upper()
-            },
-            'extracted_text': extracted_text,
-            'analysis': {
-                'document_analysis': analysis_text
-            }
-        })
+        with upload_stage_seconds.time(stage='submit'):
+            accepted = document_jobs.submit(file_id, {'file_info': file_info}, extract_document,
+                                            file_path, filename, file_ext,
+                                            RETRIEVAL_SETTINGS['chunk_words'], RETRIEVAL_SETTINGS['overlap_words'],
+                                            on_done=store_document, on_failed=discard_upload)
+        if not accepted:
+            os.remove(file_path)
+            return jsonify({'error': 'Upload queue is full. Please try again shortly.'}), 503
+        
+        response = upload_job_response(document_jobs.get(file_id))
+        response['success'] = True
+        return jsonify(response), 202
         
     except Exception as e:
         print(f"Upload error: {e}")
         return jsonify({'error': f'Upload failed: {str(e)}'}), 500
 
+@app.route('/api/upload/<job_id>')
+def upload_status(job_id):
+    """Extraction job status; ?wait=N blocks up to N seconds (at most uploads.max_status_wait) for completion"""
+    wait = min(max(request.args.get('wait', 0, type=float), 0), UPLOAD_STATUS_MAX_WAIT)
+    job = document_jobs.wait(job_id, wait)
+    
+    if job is None:
+        return jsonify({'error': 'Upload job not found'}), 404
+    return jsonify(upload_job_response(job))
+
+@app.route('/api/cohort', methods=['GET', 'POST'])
+def cohort_query():
+    """Cohort size and cancer rate for a filter such as SMOKING=1 AND COUGHING=1 AND AGE>=60"""
+    if not lung_cancer_dataset.total_records:
+        return jsonify({'error': 'Medical dataset not available'}), 503
+    
+    data = request.get_json(silent=True) or {}
+    expression = (data.get('filter') or request.args.get('filter', '')).strip()
+    index = lung_cancer_dataset.cohort_index()
+    if not expression:
+        return jsonify({'error': 'Filter required, e.g. SMOKING=1 AND AGE>=60', 'columns': index.columns()}), 400
+    
+    try:
+        return jsonify(index.query(expression))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
 @app.route('/api/health')
 def health():
     return jsonify({
         'status': 'healthy',
-        'total_records': len(lung_cancer_dataset),
+        'total_records': lung_cancer_dataset.total_records,
         'ai_available': bool(GEMINI_API_KEY),
         'upload_enabled': True,
         'active_sessions': len(chat_sessions),
         'uploaded_documents': len(uploaded_documents),
+        'upload_jobs': document_jobs.stats(),
+        'memory': {
+            'sessions': chat_sessions.stats(),
+            'documents': uploaded_documents.stats()
+        },
         'supported_formats': list(ALLOWED_EXTENSIONS)
     })
 
+@app.route('/api/metrics')
+def metrics_endpoint():
+    """Prometheus text-format metrics"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/system/status')
 def system_status():
     return jsonify({
         'dataset': {
-            'loaded': bool(lung_cancer_dataset),
-            'records': len(lung_cancer_dataset),
-            'source': 'diseases/lung_cancer/data.csv'
+            'loaded': bool(lung_cancer_dataset.total_records),
+            'records': lung_cancer_dataset.total_records,
+            'source': 'diseases/lung_cancer/data.csv',
+            'memory': lung_cancer_dataset.memory_report()
         },
         'ai': {
             'available': bool(GEMINI_API_KEY),
             'provider': 'Google Gemini',
-            'model': 'gemini-1.5-flash'
+            'model': 'gemini-1.5-flash',
+            'rate_limit': gemini_rate_limiter.stats(),
+            'cache': response_cache.stats() if response_cache else {'enabled': False},
+            'coalescing': gemini_single_flight.stats() if gemini_single_flight else {'enabled': False},
+            'routing': {'enabled': intent_scorer.enabled, 'bypass_threshold': intent_scorer.threshold}
         },
         'storage': {
             'active_chats': len(chat_sessions),
@@ -506,7 +1069,7 @@ if __name__ == '__main__':
     print("🏥 PROFESSIONAL MEDICAL AI CHATBOT")
     print("="*60)
     print(f"🌐 URL: http://localhost:5000")
-    print(f"📊 Medical Records: {len(lung_cancer_dataset):,} loaded")
+    print(f"📊 Medical Records: {lung_cancer_dataset.total_records:,} loaded")
     print(f"🤖 AI Status: {'✅ Available (Gemini)' if GEMINI_API_KEY else '❌ No API Key'}")
     print(f"📁 File Upload: ✅ Multiple formats supported")
     print(f"💬 Chat System: ✅ Multi-session with history")
@@ -515,4 +1078,4 @@ if __name__ == '__main__':
     print("Features: Professional UI, Document Management, Dataset Analysis")
     print("="*60)
     
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    create_app().run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
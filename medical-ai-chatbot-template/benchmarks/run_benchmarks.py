@@ -0,0 +1,246 @@
+"""Reproducible performance benchmarks for detection, dataset analysis and the chat API.
+
+Run from the project root; results are written as JSON so releases can be compared:
+
+    python benchmarks/run_benchmarks.py --scales 1,10,100,1000 --llm-latency 0.05 --output bench.json
+
+The Flask endpoints are driven through the test client against tools/fake_gemini_server.py,
+with the response cache and rate limiter disabled so every call reaches the fake provider.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Callable, List
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.synthetic_data import scale_dataset
+from core.dataset_engine import DatasetEngine
+from core.streaming_stats import DatasetSummary
+from core.disease_detector import DiseaseDetector
+from core.rate_limiter import TokenBucket
+from tools.fake_gemini_server import start_fake_gemini
+
+DETECTOR_QUERIES = [
+    "What are the symptoms of lung cancer?",
+    "Does smoking increase my risk of a lung tumor?",
+    "I have a persistent cough and chest pain",
+    "Tell me about shortness of breath and wheezing in older patients",
+    "What's the weather like today?",
+    "Show me statistics for the dataset",
+]
+
+# One query per branch of analyze_dataset_query
+DATASET_QUERIES = {
+    'smoking': "How does smoking affect cancer risk?",
+    'age': "What are the age patterns in cancer patients?",
+    'statistics': "Give me a statistical overview",
+    'general': "What can you tell me?",
+}
+
+# One query per branch of LungCancerProcessor.generate_insights
+INSIGHT_QUERIES = {
+    'smoking': "smoking history",
+    'age': "age of patients",
+    'gender': "gender split",
+    'symptom': "symptom prevalence",
+    'statistics': "dataset statistics",
+    'general': "lung cancer overview",
+}
+
+
+def measure(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    """Wall-clock timings of fn in milliseconds"""
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    return {
+        'runs': repeat,
+        'mean_ms': round(statistics.fmean(timings), 4),
+        'median_ms': round(statistics.median(timings), 4),
+        'p95_ms': round(timings[min(int(len(timings) * 0.95), len(timings) - 1)], 4),
+        'min_ms': round(timings[0], 4),
+        'max_ms': round(timings[-1], 4),
+    }
+
+
+def load_app(llm_base_url: str):
+    """Import api/app.py as the server would run it, pointed at the fake provider"""
+    os.environ['GEMINI_API_BASE'] = llm_base_url
+    os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+
+    spec = importlib.util.spec_from_file_location('benchmark_app', PROJECT_ROOT / 'api' / 'app.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.create_app()
+
+    module.response_cache = None
+    module.gemini_rate_limiter = TokenBucket(rate=1e9, burst=10 ** 9)
+    return module
+
+
+def bench_detector(repeat: int) -> Dict[str, Any]:
+    detector = DiseaseDetector()
+    return {
+        'detect_diseases': measure(lambda: [detector.detect_diseases(q) for q in DETECTOR_QUERIES], repeat),
+        'is_medical_query': measure(lambda: [detector.is_medical_query(q) for q in DETECTOR_QUERIES], repeat),
+        'queries_per_run': len(DETECTOR_QUERIES),
+    }
+
+
+def bench_dataset_analysis(app_module, repeat: int) -> Dict[str, Any]:
+    return {branch: measure(lambda q=query: app_module.analyze_dataset_query(q), repeat)
+            for branch, query in DATASET_QUERIES.items()}
+
+
+def bench_processor(engine: DatasetEngine, repeat: int) -> Dict[str, Any]:
+    from diseases.lung_cancer.processor import LungCancerProcessor
+
+    processor = LungCancerProcessor()
+    processor.dataset = engine
+    processor.data = engine.to_frame()
+    processor.features = processor._get_features()
+
+    results = {'get_statistics': measure(processor.get_statistics, max(repeat // 10, 3))}
+    results['generate_insights'] = {branch: measure(lambda q=query: processor.generate_insights(q), repeat)
+                                    for branch, query in INSIGHT_QUERIES.items()}
+    return results
+
+
+def bench_chat(client, repeat: int) -> Dict[str, Any]:
+    results = {}
+    for branch, query in DATASET_QUERIES.items():
+        def post(q=query):
+            response = client.post('/api/chat', json={'message': q})
+            assert response.status_code == 200, response.status_code
+        results[branch] = measure(post, repeat)
+    return results
+
+
+def bench_upload(client, repeat: int, words: int) -> Dict[str, Any]:
+    text = ' '.join(f"finding{i % 500} lung nodule biopsy result" for i in range(words // 5)).encode('utf-8')
+
+    def submit() -> str:
+        response = client.post('/api/upload', data={'file': (io.BytesIO(text), 'report.txt')},
+                               content_type='multipart/form-data')
+        assert response.status_code == 202, response.status_code
+        return response.get_json()['job_id']
+
+    def complete():
+        job_id = submit()
+        job = client.get(f"/api/upload/{job_id}?wait=2").get_json()
+        while job['status'] in ('queued', 'running'):
+            job = client.get(f"/api/upload/{job_id}?wait=2").get_json()
+        assert job['status'] == 'done', job['status']
+
+    return {
+        'accept': measure(submit, repeat),
+        'complete': measure(complete, repeat),
+        'document_bytes': len(text),
+    }
+
+
+def run(scales: List[int], repeat: int, llm_latency: float, upload_words: int, regenerate: bool) -> Dict[str, Any]:
+    server = start_fake_gemini(latency=llm_latency)
+    app_module = load_app(server.base_url)
+    client = app_module.app.test_client()
+    source = PROJECT_ROOT / 'diseases' / 'lung_cancer' / 'data.csv'
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat,
+            'llm_latency_s': llm_latency,
+        },
+        'detector': bench_detector(repeat),
+        'scales': {},
+    }
+
+    for factor in scales:
+        if factor == 1:
+            path = source
+        else:
+            path = scale_dataset(source, factor, PROJECT_ROOT / 'benchmarks' / 'data' / f"lung_cancer_{factor}x.csv",
+                                 regenerate=regenerate)
+
+        started = time.perf_counter()
+        DatasetEngine.from_csv(path)
+        load_ms = (time.perf_counter() - started) * 1000
+
+        # First call compiles the binary snapshot if needed, the timed one memory-maps it
+        DatasetEngine.from_csv_cached(path)
+        started = time.perf_counter()
+        engine = DatasetEngine.from_csv_cached(path)
+        snapshot_load_ms = (time.perf_counter() - started) * 1000
+        app_module.lung_cancer_dataset = engine
+
+        started = time.perf_counter()
+        DatasetSummary.from_csv(path)
+        streaming_ms = (time.perf_counter() - started) * 1000
+
+        report['scales'][f"{factor}x"] = {
+            'records': engine.total_records,
+            'load_ms': round(load_ms, 2),
+            'snapshot_load_ms': round(snapshot_load_ms, 2),
+            'streaming_summary_ms': round(streaming_ms, 2),
+            'memory_bytes': engine.memory_usage(),
+            'analyze_dataset_query': bench_dataset_analysis(app_module, repeat),
+            'processor': bench_processor(engine, repeat),
+            'api_chat': bench_chat(client, max(repeat // 10, 3)),
+        }
+        print(f"✅ {factor}x: {engine.total_records:,} records", file=sys.stderr)
+
+    report['api_upload'] = bench_upload(client, max(repeat // 10, 3), upload_words)
+    report['meta']['llm_calls'] = server.calls
+
+    app_module.document_jobs.shutdown()
+    server.shutdown()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Medical AI Chatbot benchmarks')
+    parser.add_argument('--scales', default='1,10,100,1000', help='dataset size multiples, comma separated')
+    parser.add_argument('--repeat', type=int, default=50, help='timed runs per micro-benchmark')
+    parser.add_argument('--llm-latency', type=float, default=0.05, help='fake provider latency in seconds')
+    parser.add_argument('--upload-words', type=int, default=5000, help='words in the uploaded test document')
+    parser.add_argument('--regenerate', action='store_true', help='rebuild cached synthetic datasets')
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)
+    # Keep the app's status prints out of the JSON on stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run([int(scale) for scale in args.scales.split(',')], args.repeat, args.llm_latency,
+                     args.upload_words, args.regenerate)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+        print(f"✅ Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
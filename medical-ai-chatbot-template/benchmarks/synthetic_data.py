@@ -0,0 +1,39 @@
+"""Synthetic copies of a disease dataset scaled to a multiple of its original size."""
+import csv
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+
+def scale_dataset(source: Path, factor: int, output: Path, seed: int = 42, regenerate: bool = False) -> Path:
+    """Write factor x len(source) rows resampled from source, with ages jittered by up to 2 years.
+
+    Output is reproducible for a given seed and reused when it already exists.
+    """
+    if output.exists() and not regenerate:
+        return output
+
+    with open(source, 'r', encoding='utf-8', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        rows = list(reader)
+
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(rows), size=len(rows) * factor)
+
+    age_column = header.index('AGE') if 'AGE' in header else None
+    if age_column is not None:
+        ages = np.array([int(row[age_column]) for row in rows])
+        jittered = np.clip(ages[picks] + rng.integers(-2, 3, size=picks.size), ages.min(), ages.max())
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        for position, pick in enumerate(picks):
+            row: List[str] = rows[pick]
+            if age_column is not None:
+                row = row[:age_column] + [str(jittered[position])] + row[age_column + 1:]
+            writer.writerow(row)
+    return output
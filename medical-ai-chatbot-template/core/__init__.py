@@ -6,7 +6,24 @@ __all__ = [
     'DiseaseManager', 
     'DiseaseDetector',
     'AIClient',
-    'BaseDiseaseProcessor'
+    'BaseDiseaseProcessor',
+    'DatasetEngine',
+    'KeywordAutomaton',
+    'HTTPTransport',
+    'TokenBucket',
+    'ResponseCache',
+    'MemoryStore',
+    'DocumentJobQueue',
+    'BM25Index',
+    'DiseaseRegistry',
+    'MetricsRegistry',
+    'CohortIndex',
+    'DatasetSummary',
+    'SingleFlight',
+    'PromptBuilder',
+    'ProviderHealth',
+    'Deadline',
+    'IntentScorer'
 ]
 
 # Note: Actual imports happen in the modules that need them
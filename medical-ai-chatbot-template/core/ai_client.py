@@ -1,9 +1,17 @@
 import os
-import requests
 import json
-from typing import Dict, Any, Optional, List
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from typing import Dict, Any, Optional, List, Tuple
 import time
 from pathlib import Path
+from .http_transport import get_shared_transport
+from .rate_limiter import get_rate_limiter
+from .response_cache import ResponseCache, get_response_cache
+from .single_flight import get_single_flight
+from .prompt_builder import PromptBuilder, PromptBudgetExceeded, prompt_budget
+from .provider_health import CLOSED, get_provider_health, provider_metrics
+from .deadline import Deadline
+from .metrics import llm_metrics, record_rate_limit
 
 class AIClient:
     def __init__(self, config_manager):
@@ -11,42 +19,231 @@ class AIClient:
         self.provider = self.config.get('ai.provider', 'gemini')
         self.model = self.config.get('ai.model', 'models/gemini-2.0-flash')
         self.api_key = self.config.get('ai.api_key') or os.getenv('GEMINI_API_KEY')
-        self.rate_limit_delay = 1  # seconds between requests
-        self.last_request_time = 0
+        self.base_url = (os.getenv('GEMINI_API_BASE') or self.config.get('ai.base_url')
+                         or "https://generativelanguage.googleapis.com").rstrip('/')
+        self.timeout = self.config.get('ai.timeout', 30)
+        self.min_call_seconds = self.config.get('deadlines.min_llm_seconds', 1.0)  # less than this left: skip the call
+        
+        # Primary provider first, then failover candidates in configured order
+        self.providers = list(dict.fromkeys([self.provider] + list(self.config.get('ai.failover.providers', []))))
+        self.rate_limiters = {
+            name: get_rate_limiter(
+                name,
+                rate=self.config.get('ai.rate_limit.requests_per_second', 2),
+                burst=self.config.get('ai.rate_limit.burst', 5)
+            )
+            for name in self.providers
+        }
+        self.rate_limiter = self.rate_limiters[self.provider]
+        self.rate_limit_wait = self.config.get('ai.rate_limit.max_wait', 5)  # seconds a caller may queue
+        self.health = {name: get_provider_health(name, config_manager) for name in self.providers}
+        self.hedge = self.config.get('ai.failover.hedge', False)
+        self._hedge_pool = ThreadPoolExecutor(
+            max_workers=self.config.get('ai.failover.hedge_workers', 4),
+            thread_name_prefix='llm-hedge'
+        ) if self.hedge else None
+        self.transport = get_shared_transport(config_manager)
+        self.response_cache = get_response_cache(config_manager)
+        self.single_flight = get_single_flight(self.provider) if self.config.get('ai.coalesce', True) else None
+        self.metrics = llm_metrics()
+        self.provider_metrics = provider_metrics()
+        
+        if 'gemini' in self.providers and self._has_credentials('gemini') and self.config.get('http.warm_up', True):
+            self.transport.warm_up(f"{self.base_url}/")
         
     def is_available(self) -> bool:
         """Check if AI service is available"""
-        return bool(self.api_key)
+        return any(self._has_credentials(name) for name in self.providers)
+    
+    def _has_credentials(self, provider: str) -> bool:
+        if provider == 'gemini':
+            return bool(self.api_key)
+        if provider == 'huggingface':
+            return bool(os.getenv('HUGGINGFACE_API_KEY'))
+        return False
     
-    def generate_response(self, prompt: str, max_tokens: int = 1000) -> str:
-        """Generate AI response using the configured provider"""
+    def generate_response(self, prompt: str, max_tokens: int = 1000, deadline: Optional[Deadline] = None) -> str:
+        """Generate AI response using the configured provider, within deadline if one is given"""
+        return self.complete(prompt, max_tokens, deadline) or self._fallback_response()
+    
+    def complete(self, prompt: str, max_tokens: int = 1000, deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Provider completion, or None when no provider answered in time (no canned fallback)"""
+        deadline = deadline or Deadline()
         try:
-            self._respect_rate_limit()
+            request_key = ResponseCache.make_key(prompt, f"{self.provider}:{self.model}",
+                                                 {'max_tokens': max_tokens, 'temperature': 0.7})
+            cache_key = request_key if self.response_cache else None
+            if cache_key:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    self.metrics['cache_hits'].inc(caller='ai_client')
+                    return cached
+            
+            if not deadline.allows(self.min_call_seconds):
+                return None
             
-            if self.provider == 'gemini':
-                return self._generate_gemini_response(prompt, max_tokens)
-            elif self.provider == 'huggingface':
-                return self._generate_huggingface_response(prompt, max_tokens)
+            # Concurrent identical prompts share one provider call (run under the first caller's deadline)
+            if self.single_flight:
+                try:
+                    text, shared = self.single_flight.do(
+                        request_key, lambda: self._request_response(prompt, max_tokens, cache_key, deadline),
+                        timeout=deadline.cap(None))
+                except TimeoutError:
+                    # Our deadline ran out while another caller's call was still in flight; not a provider failure
+                    self.metrics['coalesced_timeouts'].inc(caller='ai_client')
+                    return None
+                if shared:
+                    self.metrics['coalesced'].inc(caller='ai_client')
             else:
-                return self._fallback_response()
+                text = self._request_response(prompt, max_tokens, cache_key, deadline)
+            
+            return text or None
                 
         except Exception as e:
             print(f"AI generation error: {e}")
-            return self._fallback_response()
+            self.metrics['errors'].inc(caller='ai_client')
+            return None
     
-    def _respect_rate_limit(self):
-        """Ensure we don't exceed rate limits"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
+    def _request_response(self, prompt: str, max_tokens: int, cache_key: Optional[str],
+                          deadline: Deadline) -> Optional[str]:
+        """Provider call with failover; None when every provider is refused or fails"""
+        with self.metrics['latency'].time(caller='ai_client'):
+            text, provider = self._request_with_failover(prompt, max_tokens, deadline)
         
-        if time_since_last < self.rate_limit_delay:
-            time.sleep(self.rate_limit_delay - time_since_last)
+        # Only real completions are cached, never canned fallbacks
+        if not text:
+            self.metrics['errors'].inc(caller='ai_client')
+            return None
+        # The key names the primary provider and model; a failover answer must not be served under it
+        if cache_key and provider == self.provider:
+            self.response_cache.set(cache_key, text)
+        return text
+    
+    def _route(self) -> List[str]:
+        """Providers with credentials, in configured order"""
+        return [name for name in self.providers if self._has_credentials(name)]
+    
+    def _request_with_failover(self, prompt: str, max_tokens: int,
+                               deadline: Deadline) -> Tuple[Optional[str], Optional[str]]:
+        """Try providers in order, skipping open circuits, until one answers; returns (text, provider).
         
-        self.last_request_time = time.time()
+        Routing follows the breakers rather than reordering on error rate alone, so a
+        degraded primary keeps getting half-open probes and takes traffic back once it recovers.
+        """
+        for name in self._route():
+            if not deadline.allows(self.min_call_seconds):
+                break
+            health = self.health[name]
+            if not health.allow():
+                self.provider_metrics['requests'].inc(provider=name, outcome='circuit_open')
+                continue
+            
+            started = time.perf_counter()
+            # Queue only as long as still leaves time for the call itself
+            wait = max(min(self.rate_limit_wait, deadline.remaining() - self.min_call_seconds), 0)
+            acquired = self.rate_limiters[name].acquire(timeout=wait)
+            record_rate_limit(self.metrics, 'ai_client', time.perf_counter() - started, acquired)
+            if not acquired:
+                health.release()
+                self.provider_metrics['requests'].inc(provider=name, outcome='rate_limited')
+                print(f"AI rate limit reached for {name}")
+                continue
+            
+            text, answered_by = self._hedged_attempt(name, prompt, max_tokens, deadline) if self._hedge_pool else \
+                (self._attempt(name, prompt, max_tokens, deadline), name)
+            if text:
+                return text, answered_by
+        return None, None
     
-    def _generate_gemini_response(self, prompt: str, max_tokens: int) -> str:
+    def _attempt(self, provider: str, prompt: str, max_tokens: int, deadline: Optional[Deadline] = None) -> Optional[str]:
+        """One call to one provider, recorded in its health window"""
+        started = time.perf_counter()
+        try:
+            if provider == 'gemini':
+                text = self._generate_gemini_response(prompt, max_tokens, deadline)
+            elif provider == 'huggingface':
+                text = self._generate_huggingface_response(prompt, max_tokens, deadline)
+            else:
+                text = None
+        except Exception as e:
+            print(f"AI generation error ({provider}): {e}")
+            text = None
+        
+        latency = time.perf_counter() - started
+        self.provider_metrics['latency'].observe(latency, provider=provider)
+        if not text and deadline is not None and deadline.expired():
+            # Cut short by our own deadline, not the provider's fault
+            self.health[provider].release()
+            self.provider_metrics['requests'].inc(provider=provider, outcome='deadline')
+            return None
+        self.health[provider].record(latency, bool(text))
+        self.provider_metrics['requests'].inc(provider=provider, outcome='ok' if text else 'error')
+        return text or None
+    
+    def _claim_backup(self, provider: str) -> bool:
+        """Take a breaker slot and a rate limit token for a hedge request, or neither"""
+        health = self.health[provider]
+        if not health.allow():
+            return False
+        if not self.rate_limiters[provider].try_acquire():
+            health.release()
+            return False
+        return True
+    
+    def _abandon(self, answered_by: Dict[Any, str]):
+        """Count calls still running when the hedge returns; they finish (bounded by the deadline) unobserved"""
+        for future, name in answered_by.items():
+            if not future.done():
+                self.provider_metrics['hedge_abandoned'].inc(provider=name)
+    
+    def _hedged_attempt(self, provider: str, prompt: str, max_tokens: int,
+                        deadline: Deadline) -> Tuple[Optional[str], str]:
+        """Call provider; if it has not answered by its p95 latency, race a second request against it.
+        
+        The second request goes through the backup's breaker like any other call, and
+        never to the same provider while it is half-open (its probe is already out).
+        Returns (text, provider that answered).
+        """
+        p95 = self.health[provider].latency_quantile(0.95)
+        if p95 is None:
+            return self._attempt(provider, prompt, max_tokens, deadline), provider
+        
+        first = self._hedge_pool.submit(self._attempt, provider, prompt, max_tokens, deadline)
+        try:
+            return first.result(timeout=deadline.cap(p95)), provider
+        except FutureTimeoutError:
+            if not deadline.allows(self.min_call_seconds):
+                self._abandon({first: provider})
+                return None, provider
+        
+        # Prefer another healthy provider for the hedge, else the same one again if its circuit is closed
+        backup = next((name for name in self._route()
+                       if name != provider and self.health[name].healthy() and self._claim_backup(name)), None)
+        if backup is None and self.health[provider].state == CLOSED and self._claim_backup(provider):
+            backup = provider
+        if backup is None:
+            try:
+                return first.result(timeout=deadline.cap(None)), provider
+            except FutureTimeoutError:
+                self._abandon({first: provider})
+                return None, provider
+        
+        self.provider_metrics['hedged'].inc(provider=backup)
+        second = self._hedge_pool.submit(self._attempt, backup, prompt, max_tokens, deadline)
+        answered_by = {first: provider, second: backup}
+        try:
+            for future in as_completed(answered_by, timeout=deadline.cap(None)):
+                text = future.result()
+                if text:
+                    self._abandon(answered_by)
+                    return text, answered_by[future]
+        except FutureTimeoutError:
+            self._abandon(answered_by)
+        return None, provider
+    
+    def _generate_gemini_response(self, prompt: str, max_tokens: int, deadline: Optional[Deadline] = None) -> Optional[str]:
         """Generate response using Google Gemini API"""
-        url = f"https://generativelanguage.googleapis.com/v1beta/{self.model}:generateContent"
+        url = f"{self.base_url}/v1beta/{self.model}:generateContent"
         
         headers = {
             'Content-Type': 'application/json',
@@ -84,7 +281,7 @@ class AIClient:
             ]
         }
         
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+        response = self.transport.post(url, headers=headers, json=payload, timeout=self.timeout, deadline=deadline)
         response.raise_for_status()
         
         data = response.json()
@@ -94,14 +291,14 @@ class AIClient:
                 if 'parts' in data['candidates'][0]['content']:
                     return data['candidates'][0]['content']['parts'][0]['text']
         
-        return self._fallback_response()
+        return None
     
-    def _generate_huggingface_response(self, prompt: str, max_tokens: int) -> str:
+    def _generate_huggingface_response(self, prompt: str, max_tokens: int, deadline: Optional[Deadline] = None) -> Optional[str]:
         """Generate response using Hugging Face API (fallback option)"""
         # This requires Hugging Face API key
         hf_api_key = os.getenv('HUGGINGFACE_API_KEY')
         if not hf_api_key:
-            return self._fallback_response()
+            return None
         
         url = "https://api-inference.huggingface.co/models/microsoft/DialoGPT-medium"
         
@@ -119,7 +316,7 @@ class AIClient:
             }
         }
         
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+        response = self.transport.post(url, headers=headers, json=payload, timeout=self.timeout, deadline=deadline)
         response.raise_for_status()
         
         data = response.json()
@@ -127,7 +324,7 @@ class AIClient:
         if isinstance(data, list) and len(data) > 0:
             return data[0].get('generated_text', '').replace(prompt, '').strip()
         
-        return self._fallback_response()
+        return None
     
     def _fallback_response(self) -> str:
         """Fallback response when AI is unavailable"""
@@ -139,14 +336,19 @@ class AIClient:
         ]
         
         import random
+        self.metrics['fallbacks'].inc(caller='ai_client')
         return random.choice(fallback_responses)
     
-    def analyze_document(self, text: str, document_type: str = "medical") -> str:
+    def analyze_document(self, text: str, document_type: str = "medical", deadline: Optional[Deadline] = None) -> str:
         """Analyze uploaded documents"""
-        prompt = f"""You are a medical AI assistant analyzing a {document_type} document.
+        builder = PromptBuilder('document_analysis', prompt_budget(self.config, 'document_analysis'))
+        builder.add('header', f"""You are a medical AI assistant analyzing a {document_type} document.
 
 DOCUMENT CONTENT:
-{text[:2000]}  # Limit to first 2000 characters
+""")
+        # The document gets whatever the instructions leave of the budget
+        builder.add('document', text, trim=True)
+        builder.add('instructions', """
 
 INSTRUCTIONS:
 1. Identify key medical information
@@ -155,9 +357,14 @@ INSTRUCTIONS:
 4. Always recommend consulting healthcare professionals
 5. Be clear about limitations
 
-Provide a comprehensive analysis:"""
+Provide a comprehensive analysis:""")
         
-        return self.generate_response(prompt, max_tokens=800)
+        try:
+            prompt = builder.build()
+        except PromptBudgetExceeded as e:
+            print(f"❌ {e}")
+            return self._fallback_response()
+        return self.generate_response(prompt, max_tokens=800, deadline=deadline)
     
     def get_model_info(self) -> Dict[str, str]:
         """Get information about current AI model"""
@@ -165,5 +372,10 @@ Provide a comprehensive analysis:"""
             'provider': self.provider,
             'model': self.model,
             'status': 'available' if self.is_available() else 'unavailable',
-            'features': ['text_generation', 'document_analysis'] if self.is_available() else []
+            'features': ['text_generation', 'document_analysis'] if self.is_available() else [],
+            'rate_limit': self.rate_limiter.stats(),
+            'cache': self.response_cache.stats() if self.response_cache else {'enabled': False},
+            'coalescing': self.single_flight.stats() if self.single_flight else {'enabled': False},
+            'providers': {name: self.health[name].stats() for name in self.providers},
+            'hedging': bool(self.hedge)
         }
\ No newline at end of file
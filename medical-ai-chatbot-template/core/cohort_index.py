@@ -0,0 +1,181 @@
+import re
+import time
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+
+# Default age band edges; each band is [edge, next_edge)
+DEFAULT_AGE_BANDS = (0, 30, 40, 50, 60, 70, 80, 90)
+
+CONDITION_PATTERN = re.compile(r'^\s*([A-Za-z_][A-Za-z0-9_]*)\s*(>=|<=|!=|=|>|<)\s*(\S+)\s*$')
+AND_PATTERN = re.compile(r'\s+AND\s+', re.IGNORECASE)
+
+_POPCOUNT_TABLE = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+def popcount(bits: np.ndarray) -> int:
+    """Number of set bits in a packed uint64 bitset"""
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(bits).sum(dtype=np.int64))
+    return int(_POPCOUNT_TABLE[bits.view(np.uint8)].sum(dtype=np.int64))
+
+
+class CohortIndex:
+    """Packed bitsets per value of every low-cardinality column, plus age bands.
+
+    A filter such as ``SMOKING=1 AND COUGHING=1 AND AGE>=60`` is answered with
+    bitwise ANDs and a popcount over n/64 words instead of a pass over the rows.
+    """
+
+    def __init__(self, total_records: int, bitmaps: Dict[str, Dict[Any, np.ndarray]],
+                 bands: Dict[str, List[Tuple[int, int, np.ndarray]]], target: np.ndarray, everyone: np.ndarray):
+        self.total_records = total_records
+        self.bitmaps = bitmaps
+        self.bands = bands
+        self.target = target
+        self.everyone = everyone
+        self._columns = {name.upper(): name for name in bitmaps}
+
+    @staticmethod
+    def pack(mask: np.ndarray) -> np.ndarray:
+        """Pack a boolean row mask into uint64 words (zero-padded)"""
+        packed = np.packbits(mask)
+        padded = np.zeros(-(-packed.size // 8) * 8, dtype=np.uint8)
+        padded[:packed.size] = packed
+        return padded.view(np.uint64)
+
+    @classmethod
+    def build(cls, engine, max_values: int = 256,
+              age_bands: Tuple[int, ...] = DEFAULT_AGE_BANDS, band_column: str = 'AGE') -> 'CohortIndex':
+        """Index every categorical or integer column of a DatasetEngine with at most max_values distinct values"""
+        bitmaps: Dict[str, Dict[Any, np.ndarray]] = {}
+        bands: Dict[str, List[Tuple[int, int, np.ndarray]]] = {}
+
+        for name, values in engine.columns.items():
+            if name == engine.target_column:
+                continue
+            if name in engine.categories:
+                labels = engine.categories[name]
+                if len(labels) <= max_values:
+                    bitmaps[name] = {label: cls.pack(values == code) for code, label in enumerate(labels)}
+                continue
+
+            valid = ~engine.missing[name] if name in engine.missing else None
+            present = values if valid is None else values[valid]
+            distinct = np.unique(present)
+            if distinct.size > max_values:
+                continue
+            bitmaps[name] = {}
+            for value in distinct.tolist():
+                mask = values == value
+                if valid is not None:
+                    mask &= valid
+                bitmaps[name][int(value)] = cls.pack(mask)
+
+            if name == band_column:
+                edges = list(age_bands) + [int(present.max()) + 1 if present.size else age_bands[-1] + 1]
+                bands[name] = []
+                for low, high in zip(edges, edges[1:]):
+                    if high > low:
+                        mask = (values >= low) & (values < high)
+                        if valid is not None:
+                            mask &= valid
+                        bands[name].append((low, high, cls.pack(mask)))
+
+        target = cls.pack(engine.is_label(engine.target_column, engine.positive_label))
+        everyone = cls.pack(np.ones(engine.total_records, dtype=bool))
+        return cls(engine.total_records, bitmaps, bands, target, everyone)
+
+    def columns(self) -> Dict[str, List[Any]]:
+        """Indexed columns and their values"""
+        return {name: list(values) for name, values in self.bitmaps.items()}
+
+    def _parse(self, expression: str) -> List[Tuple[str, str, str]]:
+        conditions = []
+        if not expression.strip():
+            return conditions  # no filter: every record
+        for clause in AND_PATTERN.split(expression.strip()):
+            match = CONDITION_PATTERN.match(clause)
+            if not match:
+                raise ValueError(f"Cannot parse condition '{clause.strip()}'; expected e.g. SMOKING=1 or AGE>=60")
+            column, operator, raw = match.groups()
+            if column.upper() not in self._columns:
+                raise ValueError(f"Unknown or unindexed column '{column}'")
+            conditions.append((self._columns[column.upper()], operator, raw.strip('\'"')))
+        return conditions
+
+    def _value(self, column: str, raw: str) -> Any:
+        values = self.bitmaps[column]
+        if raw in values:
+            return raw
+        for key in values:
+            if isinstance(key, str) and key.lower() == raw.lower():
+                return key
+        try:
+            return int(raw)
+        except ValueError:
+            raise ValueError(f"Value '{raw}' is not valid for {column}; known values: {list(values)}")
+
+    def _range(self, column: str, low: float, high: float) -> np.ndarray:
+        """Rows with low <= column < high: whole bands where possible, single values at the edges"""
+        bits = np.zeros_like(self.everyone)
+        covered = set()
+        for band_low, band_high, band_bits in self.bands.get(column, []):
+            if band_low >= low and band_high <= high:
+                bits |= band_bits
+                covered.update(range(band_low, band_high))
+        for value, value_bits in self.bitmaps[column].items():
+            if low <= value < high and value not in covered:
+                bits |= value_bits
+        return bits
+
+    def _condition(self, column: str, operator: str, raw: str) -> np.ndarray:
+        value = self._value(column, raw)
+        values = self.bitmaps[column]
+
+        if operator in ('=', '!='):
+            bits = values.get(value)
+            bits = np.zeros_like(self.everyone) if bits is None else bits
+            if operator == '=':
+                return bits
+            # Rows missing this column match neither side
+            known = np.zeros_like(self.everyone)
+            for value_bits in values.values():
+                known |= value_bits
+            return known & ~bits
+
+        if not isinstance(value, int) or not all(isinstance(key, int) for key in values):
+            raise ValueError(f"Operator {operator} needs a numeric column, got {column}")
+        low, high = {
+            '>=': (value, float('inf')),
+            '>': (value + 1, float('inf')),
+            '<=': (float('-inf'), value + 1),
+            '<': (float('-inf'), value)
+        }[operator]
+        return self._range(column, low, high)
+
+    def query(self, expression: str) -> Dict[str, Any]:
+        """Cohort size and cancer rate for an AND-combined filter expression"""
+        started = time.perf_counter()
+        bits = self.everyone.copy()
+        for column, operator, raw in self._parse(expression):
+            bits &= self._condition(column, operator, raw)
+
+        cohort_size = popcount(bits)
+        cancer_cases = popcount(bits & self.target)
+        return {
+            'filter': expression,
+            'cohort_size': cohort_size,
+            'cancer_cases': cancer_cases,
+            'cancer_rate': round(cancer_cases / cohort_size * 100, 2) if cohort_size else None,
+            'share_of_dataset': round(cohort_size / self.total_records * 100, 2) if self.total_records else None,
+            'total_records': self.total_records,
+            'elapsed_us': round((time.perf_counter() - started) * 1e6, 1)
+        }
+
+    def memory_usage(self) -> int:
+        """Bytes held by all bitsets"""
+        total = self.target.nbytes + self.everyone.nbytes
+        total += sum(bits.nbytes for values in self.bitmaps.values() for bits in values.values())
+        total += sum(bits.nbytes for bands in self.bands.values() for _, _, bits in bands)
+        return total
@@ -0,0 +1,184 @@
+import re
+from typing import Dict, Any, List, Optional
+
+# Questions answered exactly from the cohort index: "how many <cohort>" and
+# "what percentage of <population> <verb> <subject>", over gender, smoking, age
+# thresholds and cancer status. Anything the parser does not fully understand
+# is left to the LLM rather than answered approximately.
+
+COUNT_PATTERN = re.compile(r"\b(?:how many|number of|count of|count)\b")
+PERCENT_PATTERN = re.compile(r"%|\b(?:percent|percentage|proportion|share|fraction)\b")
+OF_PATTERN = re.compile(r"\s*of\b")
+# First verb after "percentage of ..." ends the population and starts the subject
+VERB_PATTERN = re.compile(r"\b(?:are|is|were|was|have|has|had|who|that|smoke|smokes|smoked|get|gets|got|"
+                          r"develop|develops|developed)\b")
+# A relative clause ("of patients who smoke have ...") hides where the population ends
+RELATIVE_WORDS = ('who', 'that')
+
+AGE_UNITS = r"(?: years?)?(?: old)?"
+AGE_OF = r"(?:the )?(?:ages? (?:of )?)?"
+
+# (pattern, conditions); conditions use cohort filter syntax, CANCER is the target column.
+# Earlier patterns win, and matched text is blanked so "60 or older" is not read twice.
+CANCER = 'CANCER'
+CONDITION_PATTERNS = (
+    (r"\b(?:(?:lung )?cancer (?:patients|cases)|patients with (?:lung )?cancer|"
+     r"(?:have|has|had|with|get|gets|got|develop|develops|developed|diagnosed with) (?:lung )?cancer)\b", [CANCER]),
+    (r"\b(?:females?|women|woman)\b", ['GENDER=F']),
+    (r"\b(?:males?|men|man)\b", ['GENDER=M']),
+    (r"\bnon-?smokers?\b", ['SMOKING=2']),
+    (r"\b(?:smokers?|smoke|smokes|smoked|smoking)\b", ['SMOKING=1']),
+    (rf"\b(?:aged )?between {AGE_OF}(\d+) and (\d+){AGE_UNITS}", ['AGE>={0}', 'AGE<={1}']),
+    (rf"\b(?:aged )?(\d+){AGE_UNITS} (?:or|and) (?:older|over|above)\b", ['AGE>={0}']),
+    (rf"\b(?:aged )?(\d+){AGE_UNITS} (?:or|and) (?:younger|under|below)\b", ['AGE<={0}']),
+    (rf"\b(?:aged )?(?:older than|over|above) {AGE_OF}(\d+){AGE_UNITS}", ['AGE>{0}']),
+    (rf"\b(?:aged )?(?:younger than|under|below) {AGE_OF}(\d+){AGE_UNITS}", ['AGE<{0}']),
+    (r"\b(?:aged )?(?:at least|more than) (\d+) years?(?: old)?", ['AGE>={0}']),
+)
+CONDITION_PATTERNS = tuple((re.compile(pattern), conditions) for pattern, conditions in CONDITION_PATTERNS)
+
+# Words that may appear around the parsed parts without changing the question
+FILLER_WORDS = frozenset({
+    'what', "what's", 'whats', 'which', 'is', 'are', 'was', 'were', 'be', 'the', 'a', 'an', 'of', 'in', 'our',
+    'your', 'this', 'dataset', 'data', 'database', 'patients', 'patient', 'people', 'persons', 'individuals',
+    'records', 'record', 'cases', 'there', 'do', 'does', 'did', 'have', 'has', 'had', 'who', 'that', 'how',
+    'total', 'overall', 'all', 'among', 'amongst', 'with', 'currently', 'get', 'gets', 'got', 'develop',
+    'develops', 'developed'
+})
+WORD_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?|\d+|%|[^\s\w?.!,]")
+
+
+def _cohort(conditions: List[str]) -> Dict[str, Any]:
+    return {'filters': [condition for condition in conditions if condition != CANCER],
+            'cancer': CANCER in conditions}
+
+
+def parse_cohort_question(query: str) -> Optional[Dict[str, Any]]:
+    """Measure, population and subject of a count/percentage question, or None if it is not one.
+
+    Every word must be understood: a filter the cohort index cannot express
+    (a symptom, a negation, a second measure) makes the whole question unparseable.
+    """
+    text = ' '.join(query.lower().split())
+    counts = list(COUNT_PATTERN.finditer(text))
+    percents = list(PERCENT_PATTERN.finditer(text))
+    if len(counts) + len(percents) != 1:
+        return None
+    measure_match = (counts or percents)[0]
+    measure = 'count' if counts else 'percentage'
+
+    blanked = text[:measure_match.start()] + ' ' * len(measure_match.group()) + text[measure_match.end():]
+    found = []  # (position, condition)
+    for pattern, templates in CONDITION_PATTERNS:
+        for match in pattern.finditer(blanked):
+            found.extend((match.start(), template.format(*match.groups())) for template in templates)
+        blanked = pattern.sub(lambda match: ' ' * len(match.group()), blanked)
+
+    if any(word not in FILLER_WORDS for word in WORD_PATTERN.findall(blanked)):
+        return None
+    conditions = [condition for _, condition in found]
+    for column in ('GENDER=', 'SMOKING='):
+        if len({condition for condition in conditions if condition.startswith(column)}) > 1:
+            return None
+
+    population: List[str] = []
+    subject = conditions
+    if measure == 'percentage':
+        of_match = OF_PATTERN.match(text, measure_match.end())
+        if of_match:
+            verb = VERB_PATTERN.search(text, of_match.end())
+            if verb and verb.group() in RELATIVE_WORDS:
+                return None
+            boundary = verb.start() if verb else len(text)
+            population = [condition for position, condition in found if position < boundary]
+            subject = [condition for position, condition in found if position >= boundary]
+        if not subject:
+            return None
+
+    return {'measure': measure, 'population': _cohort(population), 'subject': _cohort(subject)}
+
+
+def answer_cohort_question(engine, question: Dict[str, Any]) -> Dict[str, Any]:
+    """Exact counts for a parsed question from the engine's cohort index"""
+    index = engine.cohort_index()
+    population, subject = question['population'], question['subject']
+    combined = {'filters': population['filters'] + subject['filters'],
+                'cancer': population['cancer'] or subject['cancer']}
+
+    def size(cohort):
+        result = index.query(' AND '.join(cohort['filters']))
+        return result['cancer_cases'] if cohort['cancer'] else result['cohort_size']
+
+    count, base = size(combined), size(population)
+    return {
+        'measure': question['measure'],
+        'count': count,
+        'base': base,
+        'total_records': engine.total_records,
+        'percentage': round(count / base * 100, 1) if base else None,
+        'filter': _expression(combined, engine),
+        'population_filter': _expression(population, engine)
+    }
+
+
+def _expression(cohort: Dict[str, Any], engine) -> str:
+    filters = cohort['filters'] + ([f"{engine.target_column}={engine.positive_label}"] if cohort['cancer'] else [])
+    return ' AND '.join(filters) or 'all records'
+
+
+def _age_phrases(filters: List[str]) -> List[str]:
+    bounds = [re.match(r'AGE(>=|<=|>|<)(\d+)', condition).groups() for condition in filters
+              if condition.startswith('AGE')]
+    if len(bounds) == 2 and {bounds[0][0], bounds[1][0]} == {'>=', '<='}:
+        low, high = sorted(int(value) for _, value in bounds)
+        return [f"aged {low} to {high}"]
+    return [{'>': f"older than {value}", '>=': f"aged {value} or older",
+             '<': f"younger than {value}", '<=': f"aged {value} or younger"}[operator] for operator, value in bounds]
+
+
+def describe_population(cohort: Dict[str, Any], condition_name: str = 'lung cancer') -> str:
+    """Noun phrase for a cohort, e.g. 'female smokers older than 60 with lung cancer'"""
+    filters = cohort['filters']
+    noun = 'smokers' if 'SMOKING=1' in filters else 'non-smokers' if 'SMOKING=2' in filters else 'patients'
+    gender = 'female ' if 'GENDER=F' in filters else 'male ' if 'GENDER=M' in filters else ''
+    phrase = [gender + noun] + _age_phrases(filters)
+    if cohort['cancer']:
+        phrase.append(f"with {condition_name}")
+    return ' '.join(phrase)
+
+
+def describe_subject(cohort: Dict[str, Any], condition_name: str = 'lung cancer') -> str:
+    """Predicate for a cohort, e.g. 'female and smokers'"""
+    filters = cohort['filters']
+    parts = [{'GENDER=F': 'female', 'GENDER=M': 'male', 'SMOKING=1': 'smokers', 'SMOKING=2': 'non-smokers'}[condition]
+             for condition in filters if not condition.startswith('AGE')]
+    parts += _age_phrases(filters)
+    if cohort['cancer']:
+        parts.append(f"diagnosed with {condition_name}")
+    return ' and '.join(parts)
+
+
+def format_cohort_answer(question: Dict[str, Any], answer: Dict[str, Any], condition_name: str = 'lung cancer') -> str:
+    """User-facing answer in the style of the dataset reports"""
+    if answer['measure'] == 'count':
+        cohort = {'filters': question['population']['filters'] + question['subject']['filters'],
+                  'cancer': question['population']['cancer'] or question['subject']['cancer']}
+        share = answer['count'] / answer['total_records'] * 100 if answer['total_records'] else 0.0
+        return f"""**COHORT COUNT FROM MEDICAL DATASET**
+
+📊 **{answer['count']:,}** {describe_population(cohort, condition_name)} ({share:.1f}% of all {answer['total_records']:,} patients)
+
+🔎 **Filter:** {answer['filter']}"""
+
+    population = describe_population(question['population'], condition_name)
+    if not answer['base']:
+        return f"""**COHORT PERCENTAGE FROM MEDICAL DATASET**
+
+📊 No {population} in the dataset, so the percentage is undefined.
+
+🔎 **Filter:** {answer['population_filter']}"""
+    return f"""**COHORT PERCENTAGE FROM MEDICAL DATASET**
+
+📊 **{answer['percentage']:.1f}%** of {population} are {describe_subject(question['subject'], condition_name)} ({answer['count']:,} of {answer['base']:,})
+
+🔎 **Filter:** {answer['filter']} within {answer['population_filter']}"""
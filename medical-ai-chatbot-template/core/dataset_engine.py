@@ -0,0 +1,355 @@
+import csv
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Iterable, Optional
+
+import numpy as np
+
+from .cohort_index import CohortIndex
+
+# Bump when the on-disk snapshot layout changes so stale snapshots are rebuilt
+SNAPSHOT_VERSION = 2
+# File in the snapshot directory naming the published version subdirectory
+SNAPSHOT_POINTER = 'CURRENT'
+# Unpublished or superseded versions younger than this are left alone: another
+# process may still be writing one or about to open the one it just read
+SNAPSHOT_GRACE_SECONDS = 60
+
+
+class DatasetEngine:
+    """Columnar, read-only view of a disease dataset with precomputed aggregates.
+
+    Binary flags are stored as int8, other integers in the smallest unsigned type
+    (uint8 for age) and text columns as int8 category codes, so one parse of the
+    CSV can back both the Flask app and the pandas-based disease processors.
+    Engines loaded from a binary snapshot hold read-only memory maps instead, so
+    every worker process shares the same page-cache pages.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], categories: Dict[str, List[str]],
+                 missing: Optional[Dict[str, np.ndarray]] = None,
+                 target_column: str = 'LUNG_CANCER', positive_label: str = 'YES',
+                 aggregates: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.columns = columns
+        self.categories = categories
+        self.missing = missing or {}
+        self.target_column = target_column
+        self.positive_label = positive_label
+        self.total_records = len(next(iter(columns.values()))) if columns else 0
+        self.aggregates = aggregates if aggregates is not None else self._compute_aggregates()
+        self._frame = None
+        self._cohort_index = None
+        self._frame_lock = threading.Lock()
+
+    @classmethod
+    def from_csv(cls, path, **kwargs) -> 'DatasetEngine':
+        """Build the engine from a CSV file"""
+        with open(Path(path), 'r', encoding='utf-8', newline='') as file:
+            reader = csv.reader(file)
+            header = next(reader, [])
+            rows = list(reader)
+        return cls.from_columns(header, zip(*rows) if rows else [[] for _ in header], **kwargs)
+
+    @classmethod
+    def from_csv_cached(cls, path, snapshot_dir=None, **kwargs) -> 'DatasetEngine':
+        """Memory-map the binary snapshot of a CSV, compiling it first when missing or stale.
+
+        The snapshot lives next to the CSV (data.csv -> data.snapshot/) and is keyed
+        on the CSV's size and modification time.
+        """
+        path = Path(path)
+        snapshot_dir = Path(snapshot_dir) if snapshot_dir else path.with_suffix('.snapshot')
+        stamp = cls.source_stamp(path)
+        options = {'target_column': kwargs.get('target_column', 'LUNG_CANCER'),
+                   'positive_label': kwargs.get('positive_label', 'YES')}
+
+        try:
+            engine = cls.load_snapshot(snapshot_dir, stamp, options)
+            if engine is not None:
+                return engine
+        except Exception as e:
+            print(f"❌ Ignoring unreadable dataset snapshot {snapshot_dir}: {e}")
+
+        engine = cls.from_csv(path, **kwargs)
+        try:
+            engine.save_snapshot(snapshot_dir, stamp)
+        except Exception as e:
+            print(f"❌ Could not write dataset snapshot {snapshot_dir}: {e}")
+        return engine
+
+    @staticmethod
+    def source_stamp(path) -> Dict[str, int]:
+        """Size and mtime of a source file, used to invalidate its snapshot"""
+        stat = os.stat(path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    @classmethod
+    def load_snapshot(cls, directory, source_stamp: Optional[Dict[str, int]] = None,
+                      options: Optional[Dict[str, str]] = None) -> Optional['DatasetEngine']:
+        """Open the published snapshot with every column memory-mapped read-only; None if absent or stale"""
+        directory = Path(directory)
+        pointer = directory / SNAPSHOT_POINTER
+        if not pointer.exists():
+            return None
+        directory = directory / pointer.read_text().strip()
+        manifest_path = directory / 'manifest.json'
+        if not manifest_path.exists():
+            return None
+
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != SNAPSHOT_VERSION:
+            return None
+        if source_stamp is not None and manifest.get('source') != source_stamp:
+            return None
+        if options and any(manifest.get(key) != value for key, value in options.items()):
+            return None
+
+        columns, missing = {}, {}
+        for position, name in enumerate(manifest['columns']):
+            columns[name] = np.load(directory / f"column_{position}.npy", mmap_mode='r')
+            if name in manifest['missing']:
+                missing[name] = np.load(directory / f"column_{position}.missing.npy", mmap_mode='r')
+
+        return cls(columns, manifest['categories'], missing,
+                   target_column=manifest['target_column'], positive_label=manifest['positive_label'],
+                   aggregates=manifest.get('aggregates'))
+
+    def save_snapshot(self, directory, source_stamp: Optional[Dict[str, int]] = None):
+        """Write every column as an .npy file plus a JSON manifest into a new version
+        subdirectory, then publish it by atomically replacing the pointer file.
+
+        Readers always see either the previous complete version or the new one, never a
+        missing or half-written directory; concurrent writers each publish a complete
+        version and the last pointer replace wins.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        version = f"v{SNAPSHOT_VERSION}-{time.time_ns()}-{os.getpid()}-{threading.get_ident()}"
+        staging = directory / version
+        pointer_staging = directory / f"{SNAPSHOT_POINTER}.tmp-{version}"
+        staging.mkdir()
+
+        try:
+            names = list(self.columns)
+            for position, name in enumerate(names):
+                np.save(staging / f"column_{position}.npy", np.ascontiguousarray(self.columns[name]))
+                if name in self.missing:
+                    np.save(staging / f"column_{position}.missing.npy", np.ascontiguousarray(self.missing[name]))
+
+            # Aggregates are stored only if they survive JSON unchanged (e.g. no integer dict keys)
+            aggregates = self.aggregates if json.loads(json.dumps(self.aggregates)) == self.aggregates else None
+            manifest = {
+                'version': SNAPSHOT_VERSION,
+                'source': source_stamp,
+                'columns': names,
+                'categories': self.categories,
+                'missing': list(self.missing),
+                'target_column': self.target_column,
+                'positive_label': self.positive_label,
+                'aggregates': aggregates
+            }
+            with open(staging / 'manifest.json', 'w') as f:
+                json.dump(manifest, f)
+
+            pointer_staging.write_text(version)
+            os.replace(pointer_staging, directory / SNAPSHOT_POINTER)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            if pointer_staging.exists():
+                pointer_staging.unlink()
+            raise
+        self._prune_snapshots(directory)
+
+    @staticmethod
+    def _prune_snapshots(directory: Path):
+        """Remove superseded versions (and files from older layouts) past the grace period"""
+        pointer = directory / SNAPSHOT_POINTER
+        current = pointer.read_text().strip() if pointer.exists() else None
+        cutoff = time.time() - SNAPSHOT_GRACE_SECONDS
+        for entry in directory.iterdir():
+            try:
+                if entry.name in (SNAPSHOT_POINTER, current) or entry.stat().st_mtime > cutoff:
+                    continue
+                if entry.is_dir():
+                    shutil.rmtree(entry, ignore_errors=True)
+                else:
+                    entry.unlink()
+            except OSError:
+                # Already removed by another process, or still open on platforms that refuse
+                continue
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, str]], **kwargs) -> 'DatasetEngine':
+        """Build the engine from csv.DictReader style rows"""
+        header = list(records[0].keys()) if records else []
+        raw_columns = ([row.get(name) or '' for row in records] for name in header)
+        return cls.from_columns(header, raw_columns, **kwargs)
+
+    @classmethod
+    def from_columns(cls, header: List[str], raw_columns: Iterable[Iterable[str]], **kwargs) -> 'DatasetEngine':
+        """Encode raw string columns into compact NumPy arrays"""
+        columns, categories, missing = {}, {}, {}
+
+        for name, raw in zip(header, raw_columns):
+            values = [(value or '').strip() for value in raw]
+            present = [value for value in values if value]
+
+            if present and all(value.isdigit() for value in present):
+                absent = np.fromiter((not value for value in values), dtype=bool, count=len(values))
+                numbers = np.fromiter((int(value) if value else 0 for value in values),
+                                      dtype=np.int64, count=len(values))
+                columns[name] = numbers.astype(cls._integer_dtype(numbers, absent))
+                if absent.any():
+                    missing[name] = absent
+            else:
+                labels, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+                # Signed codes so pandas.Categorical.from_codes can use them as-is
+                columns[name] = codes.astype(np.int8 if len(labels) <= 127 else np.min_scalar_type(-len(labels)))
+                categories[name] = labels.tolist()
+
+        return cls(columns, categories, missing, **kwargs)
+
+    @staticmethod
+    def _integer_dtype(numbers: np.ndarray, absent: np.ndarray) -> np.dtype:
+        """int8 for binary flags, otherwise the smallest unsigned type that fits"""
+        present = numbers[~absent]
+        if present.size and np.unique(present).size <= 2 and present.max() <= 127:
+            return np.dtype(np.int8)
+        return np.min_scalar_type(int(numbers.max()))
+
+    def is_label(self, column: str, label: str) -> np.ndarray:
+        """Boolean mask of rows whose categorical column equals label"""
+        labels = self.categories.get(column, [])
+        if column not in self.columns or label not in labels:
+            return np.zeros(self.total_records, dtype=bool)
+        return self.columns[column] == labels.index(label)
+
+    def is_value(self, column: str, value: int) -> np.ndarray:
+        """Boolean mask of rows whose numeric column equals value"""
+        if column not in self.columns or column in self.categories:
+            return np.zeros(self.total_records, dtype=bool)
+        mask = self.columns[column] == value
+        if column in self.missing:
+            mask &= ~self.missing[column]
+        return mask
+
+    def value_counts(self, column: str) -> Dict[Any, int]:
+        """Count occurrences of every value in a column"""
+        if column not in self.columns:
+            return {}
+        data = self.columns[column]
+        if column in self.categories:
+            counts = np.bincount(data, minlength=len(self.categories[column]))
+            return {label: int(count) for label, count in zip(self.categories[column], counts)}
+        if column in self.missing:
+            data = data[~self.missing[column]]
+        values, counts = np.unique(data, return_counts=True)
+        return {int(value): int(count) for value, count in zip(values, counts)}
+
+    def _compute_aggregates(self) -> Dict[str, Dict[str, Any]]:
+        """Precompute the aggregates served by the chat intents"""
+        target = self.is_label(self.target_column, self.positive_label)
+        smokers = self.is_value('SMOKING', 1)
+
+        return {
+            'target': {'cases': int(target.sum())},
+            'smoking': {
+                'smokers': int(smokers.sum()),
+                'smokers_with_target': int((smokers & target).sum())
+            },
+            'age': self._numeric_summary('AGE', target),
+            'gender': self.value_counts('GENDER')
+        }
+
+    def _numeric_summary(self, column: str, target: np.ndarray) -> Dict[str, Any]:
+        """Mean, range and median of a numeric column, overall and within the target cohort"""
+        if column not in self.columns or column in self.categories:
+            return {'count': 0, 'target_count': 0}
+
+        valid = ~self.missing[column] if column in self.missing else np.ones(self.total_records, dtype=bool)
+        values = self.columns[column][valid]
+        target_values = self.columns[column][valid & target]
+        if values.size == 0:
+            return {'count': 0, 'target_count': 0}
+
+        # Upper median (sorted(values)[n // 2]) read off the cumulative histogram
+        cumulative = np.cumsum(np.bincount(values))
+        summary = {
+            'count': int(values.size),
+            'mean': float(values.mean(dtype=np.float64)),
+            'min': int(values.min()),
+            'max': int(values.max()),
+            'median': int(np.searchsorted(cumulative, values.size // 2, side='right')),
+            'target_count': int(target_values.size)
+        }
+        if target_values.size:
+            summary['target_mean'] = float(target_values.mean(dtype=np.float64))
+        return summary
+
+    def to_frame(self):
+        """pandas DataFrame over the encoded arrays (built once, shared by all processors)"""
+        with self._frame_lock:
+            if self._frame is None:
+                import pandas as pd
+
+                data = {}
+                for name, values in self.columns.items():
+                    if name in self.categories:
+                        # Codes come from our own encoder; skipping validation keeps mapped arrays uncopied
+                        data[name] = pd.Categorical.from_codes(values, categories=self.categories[name],
+                                                               validate=False)
+                    elif name in self.missing:
+                        data[name] = pd.arrays.IntegerArray(values, self.missing[name])
+                    else:
+                        data[name] = values
+                self._frame = pd.DataFrame(data, copy=False)
+            return self._frame
+
+    def cohort_index(self) -> CohortIndex:
+        """Bitmap index over the low-cardinality columns (built once, shared like to_frame)"""
+        with self._frame_lock:
+            if self._cohort_index is None:
+                self._cohort_index = CohortIndex.build(self)
+            return self._cohort_index
+
+    def memory_usage(self) -> int:
+        """Bytes held by the encoded column arrays"""
+        return sum(array.nbytes for array in self.columns.values()) + \
+            sum(array.nbytes for array in self.missing.values())
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Memory footprint per column and in total"""
+        return {
+            'total_bytes': self.memory_usage(),
+            'memory_mapped': any(isinstance(values, np.memmap) for values in self.columns.values()),
+            'columns': {name: {'dtype': 'category' if name in self.categories else str(values.dtype),
+                               'bytes': int(values.nbytes)}
+                        for name, values in self.columns.items()}
+        }
+
+
+_datasets: Dict[str, Optional[DatasetEngine]] = {}
+_datasets_lock = threading.Lock()
+
+
+def get_dataset(disease_name: str) -> Optional[DatasetEngine]:
+    """Shared compact dataset for a disease, parsed once per process; None if it has no data.csv"""
+    with _datasets_lock:
+        if disease_name not in _datasets:
+            disease_path = Path(f"diseases/{disease_name}")
+            data_path = disease_path / "data.csv"
+            config_path = disease_path / "config.json"
+
+            target_column = 'LUNG_CANCER'
+            if config_path.exists():
+                with open(config_path, 'r') as f:
+                    target_column = json.load(f).get('features', {}).get('target', target_column)
+
+            _datasets[disease_name] = DatasetEngine.from_csv_cached(data_path, target_column=target_column) \
+                if data_path.exists() else None
+        return _datasets[disease_name]
@@ -0,0 +1,65 @@
+import time
+from typing import Dict, Any, Optional
+
+# Per-endpoint budgets (seconds from request arrival), overridable under deadlines
+DEFAULT_DEADLINES = {
+    'chat': 15,
+    'chat_stream': 30,
+    'chat_batch': 120
+}
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage cannot start because the request's time budget is spent"""
+
+
+class Deadline:
+    """Time budget for one request, passed down to every stage that can block.
+
+    Each stage caps its own waits (rate limiter queue, socket timeouts, retry
+    backoff, worker pools) at ``remaining()`` so the request as a whole ends on time.
+    A Deadline without a budget never expires.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, started: Optional[float] = None):
+        self.seconds = seconds
+        self.started = time.perf_counter() if started is None else started
+        self.expires_at = self.started + seconds if seconds else None
+
+    @classmethod
+    def for_endpoint(cls, config_manager, endpoint: str, started: Optional[float] = None) -> 'Deadline':
+        """Deadline configured for an endpoint under deadlines.<endpoint>"""
+        seconds = DEFAULT_DEADLINES.get(endpoint)
+        if config_manager is not None:
+            seconds = config_manager.get(f'deadlines.{endpoint}', seconds)
+        return cls(seconds, started)
+
+    def remaining(self) -> float:
+        """Seconds left, never negative; infinite without a budget"""
+        if self.expires_at is None:
+            return float('inf')
+        return max(self.expires_at - time.perf_counter(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def allows(self, seconds: float) -> bool:
+        """Whether at least seconds are left"""
+        return self.remaining() >= seconds
+
+    def cap(self, seconds: Optional[float]) -> Optional[float]:
+        """A stage's own timeout, shortened to what is left of the budget"""
+        if self.expires_at is None:
+            return seconds
+        return self.remaining() if seconds is None else min(seconds, self.remaining())
+
+    def check(self, stage: str):
+        """Raise DeadlineExceeded if nothing is left before stage"""
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline of {self.seconds}s exceeded before {stage}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'budget_seconds': self.seconds,
+            'elapsed_seconds': round(time.perf_counter() - self.started, 3)
+        }
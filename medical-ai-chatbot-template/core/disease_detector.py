@@ -1,12 +1,24 @@
 import re
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Any
 from pathlib import Path
 import json
+from .keyword_matcher import KeywordAutomaton
 
 class DiseaseDetector:
+    # Medical phrasing patterns, combined into one expression compiled at import time
+    MEDICAL_PATTERN = re.compile('|'.join(f'(?:{pattern})' for pattern in [
+        r'\b(what|how|why|when|where)\s+(is|are|does|do|can|will|should)\s+.*\b(disease|condition|symptom|treatment|medication)\b',
+        r'\b(symptoms|signs)\s+of\b',
+        r'\bcaused?\s+by\b',
+        r'\b(risk|factors|prevention|cure|treatment|therapy)\b',
+        r'\b(pain|ache|hurt|sore)\b',
+        r'\b(doctor|physician|medical|health)\b'
+    ]))
+
     def __init__(self):
         self.disease_keywords = self._load_disease_keywords()
         self.medical_terms = self._load_medical_terms()
+        self._build_matcher()
     
     def _load_disease_keywords(self) -> Dict[str, List[str]]:
         """Load disease-specific keywords from config files"""
@@ -51,73 +63,61 @@ class DiseaseDetector:
             'benign', 'malignant', 'metastasis', 'stage'
         }
     
-    def detect_diseases(self, query: str) -> List[str]:
-        """Detect diseases mentioned in the query"""
-        query_lower = query.lower()
-        detected_diseases = []
-        
+    def _build_matcher(self):
+        """Compile every disease keyword and medical term into one automaton"""
+        self._keyword_owners: Dict[str, Dict[str, int]] = {}
         for disease, keywords in self.disease_keywords.items():
             for keyword in keywords:
-                if keyword.lower() in query_lower:
-                    if disease not in detected_diseases:
-                        detected_diseases.append(disease)
-                    break
-        
+                owners = self._keyword_owners.setdefault(keyword.lower(), {})
+                owners[disease] = owners.get(disease, 0) + 1
+
+        self._medical_terms_lower = {term.lower() for term in self.medical_terms}
+        self._matcher = KeywordAutomaton(set(self._keyword_owners) | self._medical_terms_lower)
+
+    def analyze_query(self, query: str) -> Dict[str, Any]:
+        """Detect diseases, medical intent and per-disease keyword counts in one pass"""
+        query_lower = query.lower()
+        found = self._matcher.find_all(query_lower)
+
+        match_counts: Dict[str, int] = {}
+        for keyword in found:
+            for disease, count in self._keyword_owners.get(keyword, {}).items():
+                match_counts[disease] = match_counts.get(disease, 0) + count
+
+        detected_diseases = [disease for disease in self.disease_keywords if disease in match_counts]
+        is_medical = bool(detected_diseases) or not found.isdisjoint(self._medical_terms_lower) \
+            or bool(self.MEDICAL_PATTERN.search(query_lower))
+
         # If no specific disease detected but medical terms found, return all available
-        if not detected_diseases and self.is_medical_query(query):
+        if not detected_diseases and is_medical:
             detected_diseases = list(self.disease_keywords.keys())
-        
-        return detected_diseases
+
+        return {
+            'diseases': detected_diseases,
+            'is_medical': is_medical,
+            'match_counts': match_counts
+        }
+
+    def detect_diseases(self, query: str) -> List[str]:
+        """Detect diseases mentioned in the query"""
+        return self.analyze_query(query)['diseases']
     
     def is_medical_query(self, query: str) -> bool:
         """Check if query is medical-related"""
-        query_lower = query.lower()
-        
-        # Check for direct medical terms
-        for term in self.medical_terms:
-            if term in query_lower:
-                return True
-        
-        # Check for disease-specific keywords
-        for keywords in self.disease_keywords.values():
-            for keyword in keywords:
-                if keyword.lower() in query_lower:
-                    return True
-        
-        # Check for medical patterns
-        medical_patterns = [
-            r'\b(what|how|why|when|where)\s+(is|are|does|do|can|will|should)\s+.*\b(disease|condition|symptom|treatment|medication)\b',
-            r'\b(symptoms|signs)\s+of\b',
-            r'\bcaused?\s+by\b',
-            r'\b(risk|factors|prevention|cure|treatment|therapy)\b',
-            r'\b(pain|ache|hurt|sore)\b',
-            r'\b(doctor|physician|medical|health)\b'
-        ]
-        
-        for pattern in medical_patterns:
-            if re.search(pattern, query_lower):
-                return True
-        
-        return False
+        return self.analyze_query(query)['is_medical']
     
     def get_confidence_score(self, query: str, disease: str) -> float:
         """Calculate confidence score for disease detection"""
-        if disease not in self.disease_keywords:
+        if not self.disease_keywords.get(disease):
             return 0.0
         
-        query_lower = query.lower()
-        keywords = self.disease_keywords[disease]
-        matches = 0
-        
-        for keyword in keywords:
-            if keyword.lower() in query_lower:
-                matches += 1
-        
-        return min(matches / len(keywords), 1.0)
+        matches = self.analyze_query(query)['match_counts'].get(disease, 0)
+        return min(matches / len(self.disease_keywords[disease]), 1.0)
     
     def add_disease_keywords(self, disease_name: str, keywords: List[str]):
         """Add new disease keywords dynamically"""
         self.disease_keywords[disease_name] = keywords
+        self._build_matcher()
     
     def get_available_diseases(self) -> List[str]:
         """Get list of available diseases"""
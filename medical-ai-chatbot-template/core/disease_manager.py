@@ -1,63 +1,85 @@
-from typing import Dict, Any
-import importlib
-import sys
-from pathlib import Path
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Any, List, Tuple, Optional
 from .disease_detector import DiseaseDetector
+from .disease_registry import DiseaseRegistry
 from .ai_client import AIClient
+from .prompt_builder import PromptBuilder, PromptBudgetExceeded, compact_context, prompt_budget
+from .deadline import Deadline
+from .intent_router import ROUTE_COHORT, ROUTE_DATASET, ROUTE_LLM, get_intent_scorer, route_metrics
+from .cohort_questions import answer_cohort_question, format_cohort_answer
 
 class DiseaseManager:
     def __init__(self, config_manager):
         self.config = config_manager
-        self.processors = {}
         self.detector = DiseaseDetector()
         self.ai_client = AIClient(config_manager)
+        self.intent_scorer = get_intent_scorer(config_manager)
+        self.route_metrics = route_metrics()
+        self.insight_timeout = self.config.get('diseases.insight_timeout', 2.0)
+        self._insight_pool = ThreadPoolExecutor(
+            max_workers=self.config.get('diseases.insight_workers', 4),
+            thread_name_prefix='disease-insights'
+        )
         self._load_diseases()
     
     def _load_diseases(self):
         enabled_diseases = self.config.get('diseases.enabled', ['lung_cancer'])
+        self.registry = DiseaseRegistry(enabled_diseases)
         
-        for disease_name in enabled_diseases:
-            try:
-                processor = self._load_disease_processor(disease_name)
-                self.processors[disease_name] = processor
-                print(f"✅ Loaded {disease_name}")
-            except Exception as e:
-                print(f"❌ Failed to load {disease_name}: {e}")
+        warm_up = self.config.get('diseases.warm_up', 'background')
+        if warm_up in ('background', 'eager'):
+            self.registry.warm_up(background=warm_up == 'background')
     
-    def _load_disease_processor(self, disease_name: str):
-        # Add diseases directory to path
-        diseases_dir = str(Path("diseases").absolute())
-        if diseases_dir not in sys.path:
-            sys.path.insert(0, diseases_dir)
-        
-        # Import the processor
-        module_path = f"diseases.{disease_name}.processor"
-        module = importlib.import_module(module_path)
-        
-        # Get processor class
-        class_name = f"LungCancerProcessor"  # We know it's lung cancer for now
-        processor_class = getattr(module, class_name)
-        
-        return processor_class()
+    @property
+    def processors(self) -> Dict[str, Any]:
+        """Processors initialized so far"""
+        return self.registry.loaded()
     
-    def process_query(self, user_query: str) -> Dict[str, Any]:
+    def process_query(self, user_query: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        deadline = deadline or Deadline()
         try:
-            detected_diseases = self.detector.detect_diseases(user_query)
+            detection = self.detector.analyze_query(user_query)
+            detected_diseases = detection['diseases']
             
-            if not self.detector.is_medical_query(user_query):
+            if not detection['is_medical']:
                 return self._generate_non_medical_response()
             
+            # Purely statistical questions are answered by the cohort index or the insights alone
+            intent = self.intent_scorer.score(user_query)
+            cohort_answer = self._answer_cohort(intent['cohort'], detected_diseases) \
+                if intent['route'] == ROUTE_COHORT else None
+            if intent['route'] == ROUTE_COHORT and cohort_answer is None:
+                intent = dict(intent, route=ROUTE_LLM)
+            self.route_metrics['routes'].inc(route=intent['route'], caller='disease_manager')
+            
             # Get context from available diseases
-            disease_context = {}
-            for disease in detected_diseases:
-                if disease in self.processors:
-                    context = self.processors[disease].generate_insights(user_query)
-                    disease_context[disease] = context
+            disease_context, dropped = ({}, []) if cohort_answer else \
+                self._gather_insights(user_query, detected_diseases, deadline)
             
             # Generate AI response
-            if disease_context and self.ai_client.is_available():
-                prompt = self._create_prompt(user_query, disease_context)
-                ai_response = self.ai_client.generate_response(prompt)
+            prompt_tokens = None
+            deadline_exceeded = False
+            if cohort_answer:
+                ai_response = cohort_answer
+            elif disease_context and intent['route'] == ROUTE_DATASET:
+                ai_response = "\n\n".join(str(context) for context in disease_context.values())
+            elif disease_context and self.ai_client.is_available():
+                ai_response = None
+                if deadline.allows(self.ai_client.min_call_seconds):
+                    try:
+                        prompt, prompt_report = self._create_prompt(user_query, disease_context)
+                    except PromptBudgetExceeded as e:
+                        print(f"❌ {e}")
+                    else:
+                        prompt_tokens = prompt_report['prompt_tokens']
+                        ai_response = self.ai_client.complete(prompt, deadline=deadline)
+                if not ai_response and not deadline.allows(self.ai_client.min_call_seconds):
+                    # Out of time for the LLM: answer from the dataset insights already gathered
+                    deadline_exceeded = True
+                    ai_response = "\n\n".join(str(context) for context in disease_context.values())
+                elif not ai_response:
+                    ai_response = self.ai_client._fallback_response()
             else:
                 ai_response = "I can help with lung cancer information. Please ask about symptoms, risks, or dataset insights."
             
@@ -65,7 +87,14 @@ class DiseaseManager:
                 "query": user_query,
                 "detected_diseases": detected_diseases,
                 "ai_response": ai_response,
-                "metadata": {"total_processors": len(self.processors)}
+                "metadata": {
+                    "total_processors": len(self.registry.names()),
+                    "dropped_processors": dropped,
+                    "prompt_tokens": prompt_tokens,
+                    "route": intent['route'],
+                    "route_confidence": intent['confidence'],
+                    "deadline_exceeded": deadline_exceeded
+                }
             }
             
         except Exception as e:
@@ -76,26 +105,75 @@ class DiseaseManager:
                 "metadata": {"error": True}
             }
     
-    def _create_prompt(self, query: str, disease_context: Dict[str, Any]) -> str:
-        prompt = f"""You are a medical AI assistant with access to disease datasets.
+    def _gather_insights(self, user_query: str, diseases: List[str],
+                         deadline: Optional[Deadline] = None) -> Tuple[Dict[str, str], List[str]]:
+        """Run generate_insights for every disease concurrently; processors that fail or
+        miss the shared deadline are dropped from the context rather than awaited"""
+        def _insights(disease: str):
+            processor = self.registry.get(disease)
+            return processor.generate_insights(user_query) if processor is not None else None
+        
+        futures = {self._insight_pool.submit(_insights, disease): disease for disease in diseases}
+        started = time.monotonic()
+        timeout = deadline.cap(self.insight_timeout) if deadline else self.insight_timeout
+        done, pending = wait(futures, timeout=timeout)
+        
+        disease_context, dropped = {}, []
+        for future, disease in futures.items():
+            if future not in done:
+                future.cancel()
+                dropped.append(disease)
+                print(f"❌ {disease} insights timed out after {time.monotonic() - started:.2f}s")
+                continue
+            try:
+                context = future.result()
+            except Exception as e:
+                dropped.append(disease)
+                print(f"❌ {disease} insights failed: {e}")
+                continue
+            if context is not None:
+                disease_context[disease] = context
+        return disease_context, dropped
+    
+    def _answer_cohort(self, question: Dict[str, Any], diseases: List[str]) -> Optional[str]:
+        """Exact answer from the dataset of the one detected disease, if it has one indexing the columns asked about"""
+        # Loads the processor on first use, like _gather_insights, so lazy warm-up never downgrades to the LLM
+        processor = self.registry.get(diseases[0]) if len(diseases) == 1 else None
+        dataset = getattr(processor, 'dataset', None)
+        if dataset is None or not dataset.total_records:
+            return None
+        try:
+            answer = answer_cohort_question(dataset, question)
+        except ValueError:
+            return None
+        return format_cohort_answer(question, answer, diseases[0].replace('_', ' '))
+    
+    def _create_prompt(self, query: str, disease_context: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """Prompt within the disease_query token budget, plus its size report"""
+        builder = PromptBuilder('disease_query', prompt_budget(self.config, 'disease_query'))
+        builder.add('header', """You are a medical AI assistant with access to disease datasets.
 
 AVAILABLE DATA:
-"""
+""")
         for disease, context in disease_context.items():
-            prompt += f"\n{disease.upper()}:\n{context}\n"
+            builder.add(disease, f"\n{disease.upper()}:\n{compact_context(str(context))}\n", trim=True)
         
-        prompt += f"""
+        builder.add('instructions', """
 INSTRUCTIONS:
 1. Provide evidence-based information from the dataset
 2. Include relevant statistics
 3. Always recommend consulting healthcare professionals
 4. Be clear about limitations
 
-USER QUESTION: {query}
+USER QUESTION: """)
+        # The question is never cut; only dataset context gives way when the budget is tight
+        builder.add('question', query)
+        builder.add('closing', """
 
-Provide a helpful medical response:"""
+Provide a helpful medical response:""")
         
-        return prompt
+        prompt = builder.build()
+        return prompt, builder.report
     
     def _generate_non_medical_response(self) -> Dict[str, Any]:
         return {
@@ -113,12 +191,31 @@ Please ask me about medical conditions or health-related topics.""",
         }
     
     def get_available_diseases(self) -> Dict[str, Dict[str, Any]]:
+        """Basic info per disease; packs that are not loaded yet are described from their config"""
         diseases_info = {}
-        for disease_name, processor in self.processors.items():
-            diseases_info[disease_name] = processor.get_basic_info()
+        readiness = self.registry.readiness()
+        for disease_name in self.registry.names():
+            processor = self.registry.loaded().get(disease_name)
+            if processor is not None:
+                info = processor.get_basic_info()
+            else:
+                disease_info = self.registry.metadata(disease_name).get('disease_info', {})
+                info = {
+                    'name': disease_info.get('name', disease_name),
+                    'description': disease_info.get('description', ''),
+                    'total_records': 0,
+                    'categories': disease_info.get('category', 'medical')
+                }
+            info['status'] = readiness[disease_name]['state']
+            diseases_info[disease_name] = info
         return diseases_info
     
+    def get_readiness(self) -> Dict[str, Dict[str, Any]]:
+        """Load state per disease: registered, loading, ready or failed"""
+        return self.registry.readiness()
+    
     def get_disease_statistics(self, disease_name: str) -> Dict[str, Any]:
-        if disease_name in self.processors:
-            return self.processors[disease_name].get_statistics()
+        processor = self.registry.get(disease_name)
+        if processor is not None:
+            return processor.get_statistics()
         return {"error": f"Disease '{disease_name}' not found"}
\ No newline at end of file
@@ -0,0 +1,116 @@
+import importlib
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class DiseaseRegistry:
+    """Discovers disease packs from their config.json and imports each processor on first use"""
+
+    def __init__(self, enabled: List[str], diseases_dir: str = "diseases"):
+        self.diseases_dir = Path(diseases_dir)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+        for disease_name in enabled:
+            self._entries[disease_name] = {
+                'config': self._read_config(disease_name),
+                'state': 'registered',
+                'processor': None,
+                'error': None,
+                'load_seconds': None,
+                'lock': threading.Lock()
+            }
+
+    def _read_config(self, disease_name: str) -> Dict[str, Any]:
+        """Read pack metadata without importing any code"""
+        config_path = self.diseases_dir / disease_name / "config.json"
+        if config_path.exists():
+            try:
+                with open(config_path, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error reading config for {disease_name}: {e}")
+        return {}
+
+    def _processor_target(self, disease_name: str) -> Tuple[str, str]:
+        """Module path and class name from config, defaulting to <CamelCase>Processor"""
+        spec = self._entries[disease_name]['config'].get('processor', {})
+        module_name = spec.get('module', 'processor')
+        class_name = spec.get('class') or ''.join(part.title() for part in disease_name.split('_')) + 'Processor'
+        return f"{self.diseases_dir.name}.{disease_name}.{module_name}", class_name
+
+    def names(self) -> List[str]:
+        return list(self._entries.keys())
+
+    def metadata(self, disease_name: str) -> Dict[str, Any]:
+        entry = self._entries.get(disease_name)
+        return entry['config'] if entry else {}
+
+    def get(self, disease_name: str):
+        """Return the processor, importing and initializing it on first use; None if unavailable"""
+        entry = self._entries.get(disease_name)
+        if entry is None:
+            return None
+        if entry['state'] == 'ready':
+            return entry['processor']
+
+        with entry['lock']:
+            if entry['state'] in ('ready', 'failed'):
+                return entry['processor']
+
+            entry['state'] = 'loading'
+            started = time.perf_counter()
+            try:
+                # Project root must be importable for diseases.<name>.processor
+                project_root = str(self.diseases_dir.absolute().parent)
+                if project_root not in sys.path:
+                    sys.path.insert(0, project_root)
+
+                module_path, class_name = self._processor_target(disease_name)
+                processor_class = getattr(importlib.import_module(module_path), class_name)
+                entry['processor'] = processor_class()
+                entry['state'] = 'ready'
+                print(f"✅ Loaded {disease_name}")
+            except Exception as e:
+                entry['state'] = 'failed'
+                entry['error'] = str(e)
+                print(f"❌ Failed to load {disease_name}: {e}")
+            finally:
+                entry['load_seconds'] = round(time.perf_counter() - started, 3)
+
+        return entry['processor']
+
+    def is_ready(self, disease_name: str) -> bool:
+        entry = self._entries.get(disease_name)
+        return bool(entry) and entry['state'] == 'ready'
+
+    def loaded(self) -> Dict[str, Any]:
+        """Processors that have already been initialized"""
+        return {name: entry['processor'] for name, entry in self._entries.items() if entry['state'] == 'ready'}
+
+    def warm_up(self, disease_names: Optional[List[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+        """Initialize processors ahead of their first request, optionally on a daemon thread"""
+        def _load_all():
+            for disease_name in disease_names or self.names():
+                self.get(disease_name)
+
+        if not background:
+            _load_all()
+            return None
+        thread = threading.Thread(target=_load_all, name='disease-warm-up', daemon=True)
+        thread.start()
+        return thread
+
+    def readiness(self) -> Dict[str, Dict[str, Any]]:
+        """Load state of every registered disease"""
+        return {
+            name: {
+                'state': entry['state'],
+                'error': entry['error'],
+                'load_seconds': entry['load_seconds']
+            }
+            for name, entry in self._entries.items()
+        }
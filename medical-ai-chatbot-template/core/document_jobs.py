@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Any, Optional, Callable, Tuple
+
+# How often wait() re-reads a job that another worker process is running
+POLL_INTERVAL = 0.1
+
+
+class DocumentJobQueue:
+    """Runs document extraction in a bounded process pool and tracks job status"""
+
+    def __init__(self, jobs, max_workers: Optional[int] = None, max_pending: int = 64):
+        self.jobs = jobs
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max(int(max_pending), 1)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_pid = None
+        self._pending: Dict[str, Tuple[Future, threading.Event]] = {}
+        self._lock = threading.Lock()
+
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # Created on first use so importing the app never forks; a pool inherited
+        # from a pre-fork parent belongs to the parent and is left alone
+        if self._pool is None or self._pool_pid != os.getpid():
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    def submit(self, job_id: str, record: Dict[str, Any], fn: Callable, *args,
+               on_done: Optional[Callable[[Any], Dict[str, Any]]] = None,
+               on_failed: Optional[Callable[[], None]] = None) -> bool:
+        """Queue fn(*args) in a worker process; returns False when the queue is full.
+
+        on_failed runs whenever the job fails (the pool refused or lost it, or fn raised),
+        so the caller can clean up inputs fn would otherwise have consumed.
+        """
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self.rejected += 1
+                return False
+
+            self.jobs.set(job_id, dict(record, id=job_id, status='queued', created=time.time()))
+            try:
+                future = self._executor().submit(fn, *args)
+                submit_error = None
+            except Exception as e:
+                print(f"Document job {job_id} could not be submitted: {e}")
+                submit_error = e
+                self.failed += 1
+            else:
+                self._pending[job_id] = (future, threading.Event())
+
+        if submit_error is not None:
+            finished = time.time()
+            self.jobs.update(job_id, lambda job: job.update(status='failed', error=str(submit_error), finished=finished))
+            if on_failed:
+                on_failed()
+            return True
+
+        future.add_done_callback(lambda done: self._finish(job_id, done, on_done, on_failed))
+        return True
+
+    def _finish(self, job_id: str, future: Future, on_done: Optional[Callable[[Any], Dict[str, Any]]],
+                on_failed: Optional[Callable[[], None]] = None):
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Document job {job_id} failed: {e}")
+            updates = {'status': 'failed', 'error': str(e)}
+            if on_failed:
+                on_failed()
+        else:
+            try:
+                updates = on_done(result) if on_done else {'result': result}
+                updates.setdefault('status', 'done')
+            except Exception as e:
+                print(f"Document job {job_id} failed: {e}")
+                updates = {'status': 'failed', 'error': str(e)}
+        updates['finished'] = time.time()
+
+        try:
+            self.jobs.update(job_id, lambda job: job.update(updates))
+        except KeyError:
+            pass  # job record already evicted
+
+        with self._lock:
+            if updates['status'] == 'failed':
+                self.failed += 1
+            else:
+                self.completed += 1
+            _, event = self._pending.pop(job_id, (None, None))
+        if event is not None:
+            event.set()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of a job record, with status 'running' once a worker has picked it up"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        job = dict(job)
+        with self._lock:
+            future, _ = self._pending.get(job_id, (None, None))
+        if job['status'] == 'queued' and future is not None and future.running():
+            job['status'] = 'running'
+        return job
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Block up to timeout seconds for a job to finish, then return its record"""
+        with self._lock:
+            _, event = self._pending.get(job_id, (None, None))
+        if event is not None and timeout > 0:
+            event.wait(timeout)
+        elif timeout > 0:
+            # Submitted by another worker process sharing the job store: poll it
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                job = self.jobs.get(job_id)
+                if job is None or job['status'] in ('done', 'failed'):
+                    break
+                time.sleep(min(POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+        return self.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'max_pending': self.max_pending,
+                'max_workers': self.max_workers,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected
+            }
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None and self._pool_pid == os.getpid():
+            self._pool.shutdown(wait=wait)
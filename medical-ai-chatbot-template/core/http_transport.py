@@ -0,0 +1,135 @@
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class HTTPTransport:
+    """Shared keep-alive connection pool with jittered retries for upstream AI calls"""
+
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 16, max_retries: int = 2,
+                 backoff_factor: float = 0.5, backoff_max: float = 8.0, timeout: float = 30):
+        self.max_retries = max(int(max_retries), 0)
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.session = self._new_session()
+
+    @classmethod
+    def from_config(cls, config_manager) -> 'HTTPTransport':
+        """Build a transport from the http section of the global config"""
+        return cls(
+            pool_connections=config_manager.get('http.pool_connections', 4),
+            pool_maxsize=config_manager.get('http.pool_maxsize', 16),
+            max_retries=config_manager.get('http.max_retries', 2),
+            backoff_factor=config_manager.get('http.backoff_factor', 0.5),
+            backoff_max=config_manager.get('http.backoff_max', 8.0),
+            timeout=config_manager.get('http.timeout', 30)
+        )
+
+    def _new_session(self) -> requests.Session:
+        # urllib3 pools are thread-safe; pool_maxsize bounds idle keep-alive sockets per host
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize, max_retries=0)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def reset(self):
+        """Drop pooled connections without closing them, e.g. sockets inherited across a fork"""
+        self.session = self._new_session()
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method: str, url: str, deadline=None, **kwargs) -> requests.Response:
+        """Send a request, retrying throttled, failed and refused attempts with backoff.
+
+        With a Deadline, each attempt's timeout is cut to the time left and no retry
+        is started that the deadline could not cover.
+        """
+        timeout = kwargs.pop('timeout', self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            if deadline is not None and deadline.expired():
+                raise requests.Timeout(f"Request deadline of {deadline.seconds}s exceeded")
+            kwargs['timeout'] = deadline.cap(timeout) if deadline is not None else timeout
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.ConnectionError:
+                # Read timeouts are not retried: the upstream may still be generating
+                delay = self._backoff_delay(attempt)
+                if attempt >= self.max_retries or (deadline is not None and not deadline.allows(delay)):
+                    raise
+            else:
+                if response.status_code not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self._backoff_delay(attempt, self._parse_retry_after(response.headers.get('Retry-After')))
+                if deadline is not None and not deadline.allows(delay):
+                    return response
+                response.close()
+
+            time.sleep(delay)
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than a server-provided Retry-After"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_factor * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    def warm_up(self, url: str, background: bool = True):
+        """Open a pooled connection to url ahead of the first real request"""
+        def _connect():
+            try:
+                self.session.head(url, timeout=5).close()
+            except requests.RequestException as e:
+                print(f"HTTP warm-up failed for {url}: {e}")
+
+        if background:
+            threading.Thread(target=_connect, name='http-warm-up', daemon=True).start()
+        else:
+            _connect()
+
+    def close(self):
+        self.session.close()
+
+
+_shared_transport = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_transport(config_manager=None) -> HTTPTransport:
+    """Return the process-wide transport, creating it on first use"""
+    global _shared_transport
+    if _shared_transport is None:
+        with _shared_lock:
+            if _shared_transport is None:
+                _shared_transport = HTTPTransport.from_config(config_manager) if config_manager else HTTPTransport()
+    return _shared_transport
+
+
+def _reset_after_fork():
+    # A forked worker must not share keep-alive sockets with its parent
+    if _shared_transport is not None:
+        _shared_transport.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
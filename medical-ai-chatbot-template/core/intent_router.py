@@ -0,0 +1,141 @@
+import math
+import re
+import threading
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from .cohort_questions import parse_cohort_question
+from .metrics import get_metrics
+
+ROUTE_COHORT = 'cohort'
+ROUTE_DATASET = 'dataset'
+ROUTE_LLM = 'llm'
+
+# Dataset topics a precomputed report answers, in priority order; the overview
+# topic only applies when no specific one is named ("smoking statistics" is smoking)
+OVERVIEW_TOPIC = 'statistics'
+DEFAULT_TOPICS = {
+    'smoking': r'\b(smok\w*|cigarettes?|tobacco)\b',
+    'age': r'\b(ages?|aged|older|younger|elderly|years old)\b',
+    'gender': r'\b(gender|sex|males?|females?|men|women)\b',
+    'statistics': r'\b(statistic\w*|overview|summary|demographic\w*|records?|cancer cases)\b'
+}
+
+# (pattern, weight): positive cues ask for a number the dataset holds, negative
+# cues ask for explanation, advice or anything personal that needs the LLM
+DEFAULT_CUES = (
+    (r'%|\b(percent\w*|proportion|fraction|ratio|share|rate)\b', 2.0),
+    (r'\b(how many|number of|count|total)\b', 2.0),
+    (r'\b(average|mean|median|range|distribution|breakdown|prevalence)\b', 1.5),
+    (r'\b(statistic\w*|overview|summary|demographic\w*)\b', 1.5),
+    (r'\b(dataset|data|records?|patients|cases)\b', 0.75),
+    (r'\b(why|explain|how does|how do|what causes|mechanism)\b', -1.5),
+    (r'\b(treat\w*|therap\w*|cure|prevent\w*|quit\w*|recommend\w*|advice|diagnos\w*|symptoms?|prognosis|surviv\w*)\b', -2.0),
+    (r'\b(i|my|should i|can i|am i|do i)\b', -2.5)
+)
+DEFAULT_BIAS = -1.0
+
+# A report describes the whole dataset (and its cancer cases); a question that
+# narrows or compares cohorts asks for a number no report holds
+QUALIFIERS = {
+    'number': r'\d',
+    'comparison': r'\b(older|younger|over|under|above|below|between|than|at least|at most|more|less|fewer|most|least)\b',
+    'restriction': r'\b(among|amongst|for|with|without|who|whose|where|excluding|except|only|per|by|versus|vs|compared)\b',
+    'negation': r"\b(not|no|never|non)\b|n't"
+}
+
+
+def route_metrics(registry=None) -> Dict[str, Any]:
+    """Which path answered each chat request, labelled by route and caller"""
+    registry = registry or get_metrics()
+    return {
+        'routes': registry.counter('chat_routes_total', 'Chat requests by answer route (cohort index, dataset report or LLM)',
+                                   ('route', 'caller')),
+        'confidence': registry.histogram('chat_route_confidence', 'Intent scorer confidence that a query is purely statistical',
+                                         ('route',), buckets=(0.1, 0.25, 0.5, 0.6, 0.7, 0.75, 0.8, 0.9, 0.95, 1.0))
+    }
+
+
+class IntentScorer:
+    """Local, dependency-free scorer for whether a question is purely statistical.
+
+    A count or percentage question the cohort parser fully understands ("how many
+    cancer patients are female?") is routed to the cohort index for an exact answer.
+    Otherwise weighted regex cues are summed with a bias and squashed to a 0-1
+    confidence; a query that names exactly one dataset topic, carries no qualifier
+    and scores at least ``threshold`` is routed to the dataset fast path, where the
+    precomputed report is the whole answer. Everything else goes to the LLM.
+    """
+
+    def __init__(self, topics: Optional[Dict[str, str]] = None, cues: Optional[Iterable[Tuple[str, float]]] = None,
+                 bias: float = DEFAULT_BIAS, threshold: float = 0.75, enabled: bool = True):
+        self.topics = {name: re.compile(pattern) for name, pattern in (topics or DEFAULT_TOPICS).items()}
+        self.cues = [(re.compile(pattern), weight) for pattern, weight in (cues or DEFAULT_CUES)]
+        self.qualifiers = {name: re.compile(pattern) for name, pattern in QUALIFIERS.items()}
+        self.bias = bias
+        self.threshold = threshold
+        self.enabled = enabled
+
+    @classmethod
+    def from_config(cls, config_manager) -> 'IntentScorer':
+        """Build a scorer from the routing section of the global config"""
+        return cls(
+            bias=config_manager.get('routing.bias', DEFAULT_BIAS),
+            threshold=config_manager.get('routing.bypass_threshold', 0.75),
+            enabled=config_manager.get('routing.enabled', True)
+        )
+
+    def topics_of(self, query: str) -> list:
+        """Every dataset topic the query names, in priority order"""
+        query_lower = query.lower()
+        topics = [name for name, pattern in self.topics.items() if pattern.search(query_lower)]
+        specific = [name for name in topics if name != OVERVIEW_TOPIC]
+        return specific or topics
+
+    def topic(self, query: str) -> Optional[str]:
+        """Highest-priority dataset topic the query names, if any"""
+        topics = self.topics_of(query)
+        return topics[0] if topics else None
+
+    def confidence(self, query: str) -> float:
+        """Probability-like score that the dataset alone answers the query"""
+        query_lower = query.lower()
+        score = self.bias + sum(weight for pattern, weight in self.cues if pattern.search(query_lower))
+        return 1 / (1 + math.exp(-score))
+
+    def qualifiers_of(self, query: str) -> list:
+        """Kinds of cohort qualifier (number, comparison, restriction, negation) in the query"""
+        query_lower = query.lower()
+        return [name for name, pattern in self.qualifiers.items() if pattern.search(query_lower)]
+
+    def score(self, query: str) -> Dict[str, Any]:
+        """Route for a query: cohort index, dataset fast path or LLM, with the confidence and topic behind it"""
+        topics = self.topics_of(query)
+        confidence = self.confidence(query)
+        cohort = parse_cohort_question(query) if self.enabled else None
+        if cohort is not None:
+            route = ROUTE_COHORT
+        # A report covers one topic over the whole dataset; a question spanning several
+        # topics or narrowing to a cohort needs the LLM
+        elif self.enabled and len(topics) == 1 and not self.qualifiers_of(query) and confidence >= self.threshold:
+            route = ROUTE_DATASET
+        else:
+            route = ROUTE_LLM
+        return {
+            'route': route,
+            'confidence': round(confidence, 3),
+            'topic': topics[0] if topics else None,
+            'cohort': cohort
+        }
+
+
+_scorer: Optional[IntentScorer] = None
+_scorer_lock = threading.Lock()
+
+
+def get_intent_scorer(config_manager=None) -> IntentScorer:
+    """Return the process-wide intent scorer, creating it on first use"""
+    global _scorer
+    with _scorer_lock:
+        if _scorer is None:
+            _scorer = IntentScorer.from_config(config_manager) if config_manager else IntentScorer()
+        return _scorer
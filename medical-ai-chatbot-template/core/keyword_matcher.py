@@ -0,0 +1,59 @@
+from collections import deque
+from typing import Dict, List, Set, Iterable, Tuple
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton that finds every keyword of a set in one pass over a text"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[str, ...]] = [()]
+        self.keywords = {keyword.lower() for keyword in keywords if keyword}
+
+        for keyword in self.keywords:
+            self._add(keyword)
+        self._link()
+
+    def _add(self, keyword: str):
+        """Insert a keyword into the trie"""
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state] += (keyword,)
+
+    def _link(self):
+        """Compute failure links breadth-first and merge suffix outputs"""
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+                queue.append(next_state)
+
+    def find_all(self, text: str) -> Set[str]:
+        """Return every keyword occurring in text (text is expected to be lowercased)"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+
+        return found
@@ -0,0 +1,177 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple, Optional
+
+# Seconds; spans in-process work (sub-millisecond) up to slow provider calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(label_names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(label_names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                    for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram with optional labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the with-block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            return self._series[key][2] if key in self._series else 0
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    labels = _format_labels(self.label_names, key, f'le="{le}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {total!r}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics rendered together in the Prometheus text exposition format"""
+
+    def __init__(self, prefix: str = 'mediai'):
+        self.prefix = prefix
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, help_text: str, label_names: Tuple[str, ...], **kwargs):
+        full_name = f"{self.prefix}_{name}" if self.prefix else name
+        with self._lock:
+            metric = self._metrics.get(full_name)
+            if metric is None:
+                metric = self._metrics[full_name] = cls(full_name, help_text, label_names, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {full_name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter, name, help_text, label_names)
+
+    def histogram(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, label_names, buckets=buckets)
+
+    def render(self) -> str:
+        """All metrics as Prometheus text format"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def llm_metrics(registry: Optional[MetricsRegistry] = None) -> Dict[str, Any]:
+    """Metrics shared by every LLM caller, labelled by caller"""
+    registry = registry or get_metrics()
+    return {
+        'latency': registry.histogram('llm_request_seconds', 'Provider call latency', ('caller',)),
+        'errors': registry.counter('llm_errors_total', 'Provider calls that failed or returned no text', ('caller',)),
+        'fallbacks': registry.counter('llm_fallbacks_total', 'Responses served from fallback text instead of the LLM', ('caller',)),
+        'cache_hits': registry.counter('llm_cache_hits_total', 'Responses served from the response cache', ('caller',)),
+        'coalesced': registry.counter('llm_coalesced_total', 'Calls that shared the result of an identical in-flight provider call', ('caller',)),
+        'coalesced_timeouts': registry.counter('llm_coalesced_timeouts_total', 'Calls whose deadline passed while waiting on an identical in-flight provider call', ('caller',)),
+        'rate_limit_wait': registry.histogram('rate_limit_wait_seconds', 'Time spent queued on the provider rate limiter', ('caller',)),
+        'rate_limit_waits': registry.counter('rate_limit_waits_total', 'Provider calls that had to queue for a rate limit token', ('caller',)),
+        'rate_limit_rejections': registry.counter('rate_limit_rejections_total', 'Provider calls refused by the rate limiter', ('caller',))
+    }
+
+
+def record_rate_limit(metrics: Dict[str, Any], caller: str, waited: float, acquired: bool):
+    """Record one rate limiter acquisition in the llm_metrics() set"""
+    metrics['rate_limit_wait'].observe(waited, caller=caller)
+    if waited > 0.001:
+        metrics['rate_limit_waits'].inc(caller=caller)
+    if not acquired:
+        metrics['rate_limit_rejections'].inc(caller=caller)
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry, creating it on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry()
+    return _registry
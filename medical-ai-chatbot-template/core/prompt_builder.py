@@ -0,0 +1,142 @@
+import re
+import unicodedata
+from typing import Dict, Any, List, Optional
+
+from .metrics import get_metrics
+
+# One token per short word piece or symbol; longer words count a token per 4 characters
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+MARKDOWN_PATTERN = re.compile(r'\*\*|__|^#+\s*', re.MULTILINE)
+
+# Input-token budget per request type, overridable under prompts.budgets
+DEFAULT_BUDGETS = {
+    'chat_dataset': 1200,
+    'chat_document': 2500,
+    'disease_query': 1200,
+    'document_analysis': 800
+}
+
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+TRUNCATION_MARK = '\n[...]'
+
+
+class PromptBudgetExceeded(ValueError):
+    """Raised when a prompt's fixed sections alone do not fit its token budget"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Local approximation of the provider's token count, without a tokenizer download or API call"""
+    return sum((len(piece) + 3) // 4 for piece in TOKEN_PATTERN.findall(text))
+
+
+def truncate_tokens(text: str, limit: int) -> str:
+    """Cut text at a word boundary so it fits in limit estimated tokens"""
+    if estimate_tokens(text) <= limit:
+        return text
+    # Leave room for the marker that tells the model text was cut
+    limit -= estimate_tokens(TRUNCATION_MARK)
+    if limit <= 0:
+        return ''
+    used = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        used += (len(match.group()) + 3) // 4
+        if used > limit:
+            return text[:match.start()].rstrip() + TRUNCATION_MARK
+    return text
+
+
+def compact_context(text: str) -> str:
+    """Dense form of a markdown/emoji report for a prompt: no emphasis, icons or blank lines"""
+    text = MARKDOWN_PATTERN.sub('', text)
+    lines = []
+    for line in text.splitlines():
+        line = ''.join(char for char in line
+                       if unicodedata.category(char) not in ('So', 'Cs', 'Mn') or char.isalnum())
+        line = ' '.join(line.replace('•', '-').split())
+        if line:
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def prompt_budget(config_manager, kind: str) -> int:
+    """Configured input-token budget for a request type"""
+    default = DEFAULT_BUDGETS.get(kind, max(DEFAULT_BUDGETS.values()))
+    if config_manager is None:
+        return default
+    return int(config_manager.get(f'prompts.budgets.{kind}', default))
+
+
+def prompt_metrics(registry=None) -> Dict[str, Any]:
+    """Prompt size metrics, labelled by request type"""
+    registry = registry or get_metrics()
+    return {
+        'tokens': registry.histogram('prompt_tokens', 'Estimated input tokens per LLM prompt', ('kind',),
+                                     buckets=TOKEN_BUCKETS),
+        'trimmed': registry.counter('prompt_trimmed_total', 'Prompts cut down to fit their token budget', ('kind',)),
+        'over_budget': registry.counter('prompt_over_budget_total',
+                                        'Prompts not sent because their fixed sections exceed the budget', ('kind',))
+    }
+
+
+class PromptBuilder:
+    """Assembles a prompt from ordered sections within an input-token budget.
+
+    Fixed sections (instructions, headers, the user's question) are always kept
+    whole. Trimmable sections (dataset context, document text) share what is left,
+    highest priority first, and are cut at a word boundary when it runs out. When
+    the fixed sections alone exceed the budget, build() raises PromptBudgetExceeded
+    instead of returning an over-budget prompt.
+    """
+
+    def __init__(self, kind: str, budget: int):
+        self.kind = kind
+        self.budget = int(budget)
+        self._sections: List[Dict[str, Any]] = []
+        self.report: Optional[Dict[str, Any]] = None
+
+    def add(self, name: str, text: str, trim: bool = False, priority: int = 0) -> 'PromptBuilder':
+        """Append a section; trimmable sections with higher priority get budget first"""
+        self._sections.append({'name': name, 'text': text, 'trim': trim, 'priority': priority,
+                               'tokens': estimate_tokens(text)})
+        return self
+
+    def build(self) -> str:
+        """Join the sections, trimming to the budget, and record the prompt size"""
+        fixed_tokens = sum(section['tokens'] for section in self._sections if not section['trim'])
+        remaining = self.budget - fixed_tokens
+        if remaining < 0:
+            self.report = {
+                'kind': self.kind,
+                'prompt_tokens': fixed_tokens,
+                'budget': self.budget,
+                'trimmed': {section['name']: section['tokens'] for section in self._sections if section['trim']}
+            }
+            prompt_metrics()['over_budget'].inc(kind=self.kind)
+            raise PromptBudgetExceeded(
+                f"{self.kind} prompt needs {fixed_tokens} tokens for its fixed sections, over its budget of {self.budget}")
+        trimmed = {}
+        texts = {}
+        trimmable = sorted((section for section in self._sections if section['trim']),
+                           key=lambda section: -section['priority'])
+        for section in trimmable:
+            if section['tokens'] <= remaining:
+                texts[id(section)] = section['text']
+                remaining -= section['tokens']
+                continue
+            texts[id(section)] = truncate_tokens(section['text'], remaining)
+            trimmed[section['name']] = section['tokens'] - max(remaining, 0)
+            remaining = 0
+
+        prompt = ''.join(texts.get(id(section), section['text']) for section in self._sections)
+        self.report = {
+            'kind': self.kind,
+            'prompt_tokens': estimate_tokens(prompt),
+            'budget': self.budget,
+            'trimmed': trimmed
+        }
+
+        metrics = prompt_metrics()
+        metrics['tokens'].observe(self.report['prompt_tokens'], kind=self.kind)
+        if trimmed:
+            metrics['trimmed'].inc(kind=self.kind)
+        return prompt
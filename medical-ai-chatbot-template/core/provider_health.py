@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+from .metrics import get_metrics
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class ProviderHealth:
+    """Rolling latency/error window and circuit breaker for one upstream provider.
+
+    The breaker opens when the error rate over the last ``window`` calls reaches
+    ``failure_threshold`` (or after ``consecutive_failures`` in a row), rejects
+    calls for ``open_seconds``, then lets a single probe through; the probe's
+    outcome closes or re-opens it. Completed calls slower than ``slow_call_seconds``
+    count as failures so a provider that answers slowly is avoided too.
+    """
+
+    def __init__(self, name: str, window: int = 50, min_calls: int = 5, failure_threshold: float = 0.5,
+                 consecutive_failures: int = 3, open_seconds: float = 30, slow_call_seconds: float = 10):
+        self.name = name
+        self.min_calls = max(int(min_calls), 1)
+        self.failure_threshold = failure_threshold
+        self.consecutive_failures = max(int(consecutive_failures), 1)
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self._samples: 'deque[tuple]' = deque(maxlen=max(int(window), 1))  # (latency, ok)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._failures_in_row = 0
+        self.times_opened = 0
+
+    @classmethod
+    def from_config(cls, name: str, config_manager) -> 'ProviderHealth':
+        """Build a breaker from the ai.failover section of the global config"""
+        return cls(
+            name,
+            window=config_manager.get('ai.failover.window', 50),
+            min_calls=config_manager.get('ai.failover.min_calls', 5),
+            failure_threshold=config_manager.get('ai.failover.failure_threshold', 0.5),
+            consecutive_failures=config_manager.get('ai.failover.consecutive_failures', 3),
+            open_seconds=config_manager.get('ai.failover.open_seconds', 30),
+            slow_call_seconds=config_manager.get('ai.failover.slow_call_seconds', 10)
+        )
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go to this provider now; half-open admits one probe at a time"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record(self, latency: float, ok: bool):
+        """Record one finished call and move the breaker accordingly"""
+        ok = ok and latency <= self.slow_call_seconds
+        with self._lock:
+            self._samples.append((latency, ok))
+            self._failures_in_row = 0 if ok else self._failures_in_row + 1
+            state = self._current_state(time.monotonic())
+
+            if state == HALF_OPEN:
+                self._probing = False
+                if ok:
+                    self._state = CLOSED
+                    self._samples.clear()
+                else:
+                    self._open()
+            elif state == CLOSED and not ok:
+                if (self._failures_in_row >= self.consecutive_failures
+                        or (len(self._samples) >= self.min_calls and self._error_rate() >= self.failure_threshold)):
+                    self._open()
+
+    def release(self):
+        """Give back a half-open probe slot that was never used (e.g. the call was rate limited)"""
+        with self._lock:
+            self._probing = False
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self.times_opened += 1
+        provider_metrics()['circuit_opened'].inc(provider=self.name)
+        print(f"❌ Circuit opened for {self.name} for {self.open_seconds}s")
+
+    def _error_rate(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    def error_rate(self) -> float:
+        with self._lock:
+            return self._error_rate()
+
+    def latency_quantile(self, q: float) -> Optional[float]:
+        """Latency quantile of recent successful calls, None before min_calls of them"""
+        with self._lock:
+            latencies = sorted(latency for latency, ok in self._samples if ok)
+        if len(latencies) < self.min_calls:
+            return None
+        return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+    def healthy(self) -> bool:
+        """Closed, and below half the failure threshold once there are min_calls samples"""
+        with self._lock:
+            return (self._current_state(time.monotonic()) == CLOSED
+                    and (len(self._samples) < self.min_calls or self._error_rate() < self.failure_threshold / 2))
+
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self.latency_quantile(0.5), self.latency_quantile(0.95)
+        with self._lock:
+            return {
+                'state': self._current_state(time.monotonic()),
+                'calls': len(self._samples),
+                'error_rate': round(self._error_rate(), 3),
+                'p50_seconds': round(p50, 3) if p50 is not None else None,
+                'p95_seconds': round(p95, 3) if p95 is not None else None,
+                'times_opened': self.times_opened
+            }
+
+
+def provider_metrics(registry=None) -> Dict[str, Any]:
+    """Per-provider call outcomes, labelled by provider"""
+    registry = registry or get_metrics()
+    return {
+        'requests': registry.counter('llm_provider_requests_total', 'Provider calls by outcome',
+                                     ('provider', 'outcome')),
+        'latency': registry.histogram('llm_provider_seconds', 'Provider call latency by provider', ('provider',)),
+        'circuit_opened': registry.counter('llm_circuit_opened_total', 'Times a provider circuit breaker opened',
+                                           ('provider',)),
+        'hedged': registry.counter('llm_hedged_requests_total', 'Second requests sent after the first passed its p95',
+                                   ('provider',)),
+        'hedge_abandoned': registry.counter('llm_hedge_abandoned_total',
+                                            'Hedged calls left running after the other request answered or the deadline passed',
+                                            ('provider',))
+    }
+
+
+_breakers: Dict[str, ProviderHealth] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_provider_health(name: str, config_manager=None) -> ProviderHealth:
+    """Return the process-wide health tracker for an upstream provider, creating it on first use"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = ProviderHealth.from_config(name, config_manager) if config_manager else ProviderHealth(name)
+        return _breakers[name]
@@ -0,0 +1,107 @@
+import threading
+import time
+from typing import Dict, Any, Optional
+
+
+class TokenBucket:
+    """Thread-safe token bucket that lets callers wait up to a deadline or fail fast"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.capacity = max(int(burst), 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+        self._waiting = 0
+
+        self._acquired = 0
+        self._rejected = 0
+        self._delayed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: int = 1) -> bool:
+        """Take tokens only if they are available right now"""
+        return self.acquire(tokens, timeout=0)
+
+    def acquire(self, tokens: int = 1, timeout: Optional[float] = None) -> bool:
+        """Take tokens, waiting at most timeout seconds; returns False instead of overrunning the deadline"""
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+
+        with self._condition:
+            self._refill(start)
+            if self._tokens >= tokens and not self._waiting:
+                self._tokens -= tokens
+                self._record_wait(0.0)
+                return True
+
+            # Fail fast when the queue ahead of us cannot drain before the deadline
+            if deadline is not None and self.rate > 0:
+                expected_wait = (tokens * (self._waiting + 1) - self._tokens) / self.rate
+                if expected_wait > timeout:
+                    self._rejected += 1
+                    return False
+            elif deadline is not None or self.rate <= 0:
+                self._rejected += 1
+                return False
+
+            self._waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        self._record_wait(now - start)
+                        return True
+
+                    wait_for = (tokens - self._tokens) / self.rate
+                    if deadline is not None:
+                        if now >= deadline:
+                            self._rejected += 1
+                            return False
+                        wait_for = min(wait_for, deadline - now)
+                    self._condition.wait(wait_for)
+            finally:
+                self._waiting -= 1
+
+    def _record_wait(self, waited: float):
+        self._acquired += 1
+        if waited > 0:
+            self._delayed += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of limiter state and wait-time counters"""
+        with self._condition:
+            self._refill(time.monotonic())
+            return {
+                'rate_per_second': self.rate,
+                'burst': self.capacity,
+                'available_tokens': round(self._tokens, 2),
+                'queue_depth': self._waiting,
+                'acquired': self._acquired,
+                'rejected': self._rejected,
+                'delayed': self._delayed,
+                'total_wait_seconds': round(self._total_wait, 3),
+                'max_wait_seconds': round(self._max_wait, 3),
+                'average_wait_seconds': round(self._total_wait / self._delayed, 3) if self._delayed else 0.0
+            }
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, rate: float, burst: int = 1) -> TokenBucket:
+    """Return the process-wide limiter for an upstream provider, creating it on first use"""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = TokenBucket(rate, burst)
+        return _limiters[name]
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+# Part of every key; bump when key derivation changes so persisted entries made
+# under the old rules are never served
+KEY_VERSION = 2
+
+
+class ResponseCache:
+    """Size-bounded LRU cache of LLM responses with TTL expiry and optional SQLite persistence"""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600, persist_path: Optional[str] = None):
+        self.max_entries = max(int(max_entries), 1)
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[str, Tuple[str, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.persist_path = persist_path
+        self._db = self._open_store(persist_path) if persist_path else None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_config(cls, config_manager) -> 'ResponseCache':
+        """Build a cache from the cache section of the global config"""
+        return cls(
+            max_entries=config_manager.get('cache.max_entries', 512),
+            ttl_seconds=config_manager.get('cache.ttl_seconds', 3600),
+            persist_path=config_manager.get('cache.persist_path')
+        )
+
+    def _open_store(self, persist_path: str) -> Optional[sqlite3.Connection]:
+        try:
+            path = Path(persist_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(path), check_same_thread=False)
+            db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, created REAL)")
+            db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl_seconds,))
+            db.commit()
+            return db
+        except sqlite3.Error as e:
+            print(f"❌ Response cache store unavailable, using memory only: {e}")
+            return None
+
+    def reopen(self):
+        """Open a fresh SQLite connection, e.g. after a fork (connections must not cross processes)"""
+        self._lock = threading.Lock()
+        if self.persist_path:
+            self._db = self._open_store(self.persist_path)
+
+    @staticmethod
+    def make_key(prompt: str, model: str, settings: Optional[Dict[str, Any]] = None) -> str:
+        """Hash of the whitespace-normalized prompt plus model and generation settings.
+
+        Case is kept: prompts carry document text and dataset context where it changes
+        meaning (drug names, gene symbols, mg vs Mg).
+        """
+        normalized = ' '.join(prompt.split())
+        material = json.dumps([KEY_VERSION, normalized, model, settings or {}], sort_keys=True)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a fresh cached response or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row:
+                    entry = (row[0], row[1])
+                    self._store(key, entry)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if now - entry[1] > self.ttl_seconds:
+                self._entries.pop(key, None)
+                if self._db is not None:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: str):
+        """Cache a response, evicting least recently used entries beyond max_entries"""
+        if not value:
+            return
+        entry = (value, time.time())
+        with self._lock:
+            self._store(key, entry)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses (key, value, created) VALUES (?, ?, ?)",
+                                 (key, entry[0], entry[1]))
+                self._db.commit()
+
+    def _store(self, key: str, entry: Tuple[str, float]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'persistent': self._db is not None,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_response_cache(config_manager=None) -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None when disabled in config"""
+    global _shared_cache
+    if config_manager is not None and not config_manager.get('cache.enabled', True):
+        return None
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = ResponseCache.from_config(config_manager) if config_manager else ResponseCache()
+    return _shared_cache
+
+
+def _reopen_after_fork():
+    if _shared_cache is not None:
+        _shared_cache.reopen()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reopen_after_fork)
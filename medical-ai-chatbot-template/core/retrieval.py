@@ -0,0 +1,160 @@
+import math
+import re
+from typing import Dict, Any, List, Tuple
+
+WORD_PATTERN = re.compile(r'\w+')
+
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for', 'from', 'has',
+    'have', 'how', 'i', 'in', 'is', 'it', 'its', 'me', 'my', 'of', 'on', 'or', 'please', 'tell',
+    'that', 'the', 'their', 'there', 'this', 'to', 'was', 'were', 'what', 'when', 'where', 'which',
+    'who', 'why', 'with', 'you', 'your', 'document', 'documents', 'file', 'report'
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word terms without stopwords"""
+    return [term for term in WORD_PATTERN.findall(text.lower()) if term not in STOPWORDS]
+
+
+class BM25Index:
+    """Inverted BM25 index over overlapping word-window chunks of one document.
+
+    Chunks are stored as character offsets into the document text, and the whole
+    index is plain dicts/lists so it pickles cheaply out of worker processes and is
+    measured correctly by MemoryStore.
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, data: Dict[str, Any]):
+        self.spans: List[List[int]] = data['spans']
+        self.lengths: List[int] = data['lengths']
+        self.postings: Dict[str, List[List[int]]] = data['postings']
+
+    @classmethod
+    def build(cls, text: str, chunk_words: int = 120, overlap_words: int = 30) -> 'BM25Index':
+        """Chunk text into overlapping word windows and index every chunk"""
+        words = list(WORD_PATTERN.finditer(text))
+        step = max(chunk_words - overlap_words, 1)
+        spans, lengths, postings = [], [], {}
+
+        for chunk_id, first in enumerate(range(0, max(len(words) - overlap_words, 1), step)):
+            window = words[first:first + chunk_words]
+            if not window:
+                break
+            spans.append([window[0].start(), window[-1].end()])
+
+            counts: Dict[str, int] = {}
+            for match in window:
+                term = match.group().lower()
+                if term not in STOPWORDS:
+                    counts[term] = counts.get(term, 0) + 1
+            lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                postings.setdefault(term, []).append([chunk_id, count])
+
+        return cls({'spans': spans, 'lengths': lengths, 'postings': postings})
+
+    @classmethod
+    def load(cls, data: Any, text: str, chunk_words: int = 120, overlap_words: int = 30) -> 'BM25Index':
+        """Index from a stored to_dict() payload, rebuilt from text when it is missing or does not fit text"""
+        if cls.is_valid(data, len(text)):
+            return cls(data)
+        return cls.build(text, chunk_words, overlap_words)
+
+    @staticmethod
+    def is_valid(data: Any, text_length: int) -> bool:
+        """Whether data is a well-formed index whose spans and postings stay inside a text of text_length"""
+        try:
+            spans, lengths, postings = data['spans'], data['lengths'], data['postings']
+            if not isinstance(postings, dict) or len(spans) != len(lengths):
+                return False
+            for start, end in spans:
+                if not (isinstance(start, int) and isinstance(end, int) and 0 <= start <= end <= text_length):
+                    return False
+            if not all(isinstance(length, int) and length >= 0 for length in lengths):
+                return False
+            for entries in postings.values():
+                for chunk_id, count in entries:
+                    if not (isinstance(chunk_id, int) and isinstance(count, int) and 0 <= chunk_id < len(spans)):
+                        return False
+        except (KeyError, TypeError, ValueError):
+            return False
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'spans': self.spans, 'lengths': self.lengths, 'postings': self.postings}
+
+
+def search(indexes: List[BM25Index], query: str) -> List[Tuple[float, int, int]]:
+    """Score chunks of several indexes as one corpus; returns (score, index_no, chunk_id) best first"""
+    terms = set(tokenize(query))
+    total_chunks = sum(len(index.lengths) for index in indexes)
+    if not terms or not total_chunks:
+        return []
+
+    average_length = sum(sum(index.lengths) for index in indexes) / total_chunks or 1.0
+    scores: Dict[Tuple[int, int], float] = {}
+
+    for term in terms:
+        doc_freq = sum(len(index.postings.get(term, ())) for index in indexes)
+        if not doc_freq:
+            continue
+        idf = math.log(1 + (total_chunks - doc_freq + 0.5) / (doc_freq + 0.5))
+
+        for index_no, index in enumerate(indexes):
+            for chunk_id, freq in index.postings.get(term, ()):
+                norm = BM25Index.K1 * (1 - BM25Index.B + BM25Index.B * index.lengths[chunk_id] / average_length)
+                key = (index_no, chunk_id)
+                scores[key] = scores.get(key, 0.0) + idf * freq * (BM25Index.K1 + 1) / (freq + norm)
+
+    return sorted(((score, index_no, chunk_id) for (index_no, chunk_id), score in scores.items()), reverse=True)
+
+
+def retrieve_excerpts(documents: List[Dict[str, Any]], query: str, top_k: int = 4,
+                      max_chars: int = 3000, chunk_words: int = 120, overlap_words: int = 30) -> List[List[str]]:
+    """Pick the chunks of each document most relevant to query, within a character budget.
+
+    Returns one list of excerpts per document, in document order. Documents that fit
+    the budget whole are returned whole; when nothing matches the query the leading
+    chunks are used, as a summary request would need.
+    """
+    contents = [doc.get('content', '') for doc in documents]
+    if sum(len(content) for content in contents) <= max_chars:
+        return [[content] if content else [] for content in contents]
+
+    indexes = [BM25Index.load(doc.get('index'), content, chunk_words, overlap_words)
+               for doc, content in zip(documents, contents)]
+
+    ranked = [(index_no, chunk_id) for score, index_no, chunk_id in search(indexes, query) if score > 0]
+    if not ranked:
+        # Round-robin over leading chunks so every document is represented
+        longest = max((len(index.spans) for index in indexes), default=0)
+        ranked = [(index_no, chunk_id) for chunk_id in range(longest)
+                  for index_no, index in enumerate(indexes) if chunk_id < len(index.spans)]
+
+    selected: List[List[int]] = [[] for _ in documents]
+    used_chars = 0
+    for index_no, chunk_id in ranked:
+        if sum(len(chunks) for chunks in selected) >= top_k:
+            break
+        start, end = indexes[index_no].spans[chunk_id]
+        if used_chars + (end - start) > max_chars and used_chars:
+            continue
+        selected[index_no].append(chunk_id)
+        used_chars += end - start
+
+    excerpts = []
+    for index_no, chunk_ids in enumerate(selected):
+        # Overlapping neighbours are merged so no passage is sent twice
+        spans: List[List[int]] = []
+        for chunk_id in sorted(chunk_ids):
+            start, end = indexes[index_no].spans[chunk_id]
+            if spans and start <= spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], end)
+            else:
+                spans.append([start, end])
+        excerpts.append([contents[index_no][start:end] for start, end in spans])
+    return excerpts
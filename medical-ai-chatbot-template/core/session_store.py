@@ -0,0 +1,369 @@
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable, List
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate deep memory footprint of JSON-like data in bytes"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class MemoryStore:
+    """Thread-safe key/value store with idle TTL, a byte budget and LRU eviction"""
+
+    def __init__(self, name: str, max_bytes: int, ttl_seconds: Optional[float] = None):
+        self.name = name
+        self.max_bytes = int(max_bytes)
+        self.ttl_seconds = ttl_seconds
+        # key -> [value, size_bytes, expires_at]; ordered least to most recently used
+        self._entries: 'OrderedDict[str, List[Any]]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._bytes = 0
+
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_config(cls, config_manager, name: str, default_max_mb: float, default_ttl: float) -> 'MemoryStore':
+        """Build a store from the storage.<name> section of the global config"""
+        return cls(
+            name,
+            max_bytes=int(config_manager.get(f'storage.{name}.max_mb', default_max_mb) * 1024 * 1024),
+            ttl_seconds=config_manager.get(f'storage.{name}.ttl_seconds', default_ttl)
+        )
+
+    def _expires_at(self, ttl: Optional[float]) -> Optional[float]:
+        ttl = self.ttl_seconds if ttl is None else ttl
+        return time.monotonic() + ttl if ttl else None
+
+    def _live_entry(self, key: str) -> Optional[List[Any]]:
+        """Entry for key if present and unexpired; caller holds the lock"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] is not None and entry[2] <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[1]
+
+    def _purge_expired(self):
+        """Drop expired entries from the cold end of the LRU order"""
+        now = time.monotonic()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry[2] is None or entry[2] > now:
+                break
+            self._remove(key)
+            self.expirations += 1
+
+    def _enforce_budget(self, keep: str):
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            if key == keep:
+                self._entries.move_to_end(key)
+                continue
+            self._remove(key)
+            self.evictions += 1
+
+    def _put(self, key: str, value: Any, ttl: Optional[float]):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            raise ValueError(f"{self.name} entry of {size} bytes exceeds the {self.max_bytes} byte store budget")
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = [value, size, self._expires_at(ttl)]
+        self._bytes += size
+        self._purge_expired()
+        self._enforce_budget(keep=key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value for key, refreshing its recency and idle TTL"""
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                return default
+            entry[2] = self._expires_at(None) if entry[2] is not None else None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._put(key, value, ttl)
+
+    def get_or_create(self, key: str, factory: Callable[[], Any]) -> Any:
+        """Atomically return the existing value or store factory()"""
+        with self._lock:
+            value = self.get(key)
+            if value is None:
+                value = factory()
+                self._put(key, value, None)
+            return value
+
+    def update(self, key: str, mutate: Callable[[Any], None], factory: Optional[Callable[[], Any]] = None) -> Any:
+        """Apply mutate to the stored value under the lock and re-account its size"""
+        with self._lock:
+            value = self.get(key)
+            if value is None:
+                if factory is None:
+                    raise KeyError(key)
+                value = factory()
+            mutate(value)
+            self._put(key, value, None)
+            return value
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                return default
+            self._remove(key)
+            return entry[0]
+
+    def size_of(self, key: str) -> int:
+        """Accounted bytes for key, 0 if absent"""
+        with self._lock:
+            entry = self._live_entry(key)
+            return entry[1] if entry else 0
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._live_entry(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge_expired()
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._purge_expired()
+            return {
+                'entries': len(self._entries),
+                'memory_bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+    def close(self):
+        """Drop every entry, e.g. when the app reopens its stores on another backend"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class SQLiteStore:
+    """MemoryStore-compatible store kept in a SQLite database in WAL mode.
+
+    Every worker process on the host opens the same file, so any worker can
+    serve any session. Values are stored as JSON; read-modify-write calls run
+    in one IMMEDIATE transaction, which makes them atomic across processes.
+    """
+
+    def __init__(self, name: str, path: str, max_bytes: int, ttl_seconds: Optional[float] = None):
+        if not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', name):
+            raise ValueError(f"Invalid store name {name!r}")
+        self.name = name
+        self.path = str(path)
+        self.max_bytes = int(max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self._table = f"store_{name}"
+        # One connection per thread and process; connections must not cross a fork
+        self._local = threading.local()
+
+        self.evictions = 0
+        self.expirations = 0
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._transaction() as db:
+            db.execute(f"CREATE TABLE IF NOT EXISTS {self._table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                       f"size INTEGER NOT NULL, expires_at REAL, used_at REAL NOT NULL)")
+            db.execute(f"CREATE INDEX IF NOT EXISTS {self._table}_used ON {self._table} (used_at)")
+
+    @classmethod
+    def from_config(cls, config_manager, name: str, default_max_mb: float, default_ttl: float) -> 'SQLiteStore':
+        """Build a store from the storage.<name> section, in the file at storage.sqlite_path"""
+        return cls(
+            name,
+            path=config_manager.get('storage.sqlite_path', 'instance/state.sqlite3'),
+            max_bytes=int(config_manager.get(f'storage.{name}.max_mb', default_max_mb) * 1024 * 1024),
+            ttl_seconds=config_manager.get(f'storage.{name}.ttl_seconds', default_ttl)
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _expires_at(self, ttl: Optional[float]) -> Optional[float]:
+        # Wall-clock time, since monotonic clocks are not comparable between processes
+        ttl = self.ttl_seconds if ttl is None else ttl
+        return time.time() + ttl if ttl else None
+
+    def _live_row(self, db: sqlite3.Connection, key: str):
+        """(value, size, expires_at) for key if present and unexpired; caller holds a transaction"""
+        row = db.execute(f"SELECT value, size, expires_at FROM {self._table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[2] is not None and row[2] <= time.time():
+            db.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+            self.expirations += 1
+            return None
+        return row
+
+    def _purge_expired(self, db: sqlite3.Connection):
+        self.expirations += db.execute(f"DELETE FROM {self._table} WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                                       (time.time(),)).rowcount
+
+    def _enforce_budget(self, db: sqlite3.Connection, keep: str):
+        total = db.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self._table}").fetchone()[0]
+        while total > self.max_bytes:
+            oldest = db.execute(f"SELECT key, size FROM {self._table} WHERE key != ? ORDER BY used_at LIMIT 64",
+                                (keep,)).fetchall()
+            if not oldest:
+                break
+            for key, size in oldest:
+                if total <= self.max_bytes:
+                    break
+                db.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+                total -= size
+                self.evictions += 1
+
+    def _put(self, db: sqlite3.Connection, key: str, value: Any, ttl: Optional[float]):
+        encoded = json.dumps(value)
+        size = len(encoded.encode('utf-8'))
+        if size > self.max_bytes:
+            raise ValueError(f"{self.name} entry of {size} bytes exceeds the {self.max_bytes} byte store budget")
+
+        db.execute(f"INSERT OR REPLACE INTO {self._table} (key, value, size, expires_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                   (key, encoded, size, self._expires_at(ttl), time.time()))
+        self._purge_expired(db)
+        self._enforce_budget(db, keep=key)
+
+    def _get(self, db: sqlite3.Connection, key: str) -> Optional[Any]:
+        row = self._live_row(db, key)
+        if row is None:
+            return None
+        expires_at = self._expires_at(None) if row[2] is not None else None
+        db.execute(f"UPDATE {self._table} SET used_at = ?, expires_at = ? WHERE key = ?", (time.time(), expires_at, key))
+        return json.loads(row[0])
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value for key, refreshing its recency and idle TTL"""
+        with self._transaction() as db:
+            value = self._get(db, key)
+        return default if value is None else value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        with self._transaction() as db:
+            self._put(db, key, value, ttl)
+
+    def get_or_create(self, key: str, factory: Callable[[], Any]) -> Any:
+        """Atomically return the existing value or store factory()"""
+        with self._transaction() as db:
+            value = self._get(db, key)
+            if value is None:
+                value = factory()
+                self._put(db, key, value, None)
+            return value
+
+    def update(self, key: str, mutate: Callable[[Any], None], factory: Optional[Callable[[], Any]] = None) -> Any:
+        """Apply mutate to the stored value inside one transaction and write it back"""
+        with self._transaction() as db:
+            value = self._get(db, key)
+            if value is None:
+                if factory is None:
+                    raise KeyError(key)
+                value = factory()
+            mutate(value)
+            self._put(db, key, value, None)
+            return value
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        with self._transaction() as db:
+            row = self._live_row(db, key)
+            if row is None:
+                return default
+            db.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+            return json.loads(row[0])
+
+    def size_of(self, key: str) -> int:
+        """Stored bytes for key, 0 if absent"""
+        with self._transaction() as db:
+            row = self._live_row(db, key)
+            return row[1] if row else 0
+
+    def __contains__(self, key: str) -> bool:
+        with self._transaction() as db:
+            return self._live_row(db, key) is not None
+
+    def __len__(self) -> int:
+        with self._transaction() as db:
+            self._purge_expired(db)
+            return db.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._transaction() as db:
+            self._purge_expired(db)
+            entries, total = db.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self._table}").fetchone()
+        return {
+            'backend': 'sqlite',
+            'entries': entries,
+            'memory_bytes': total,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl_seconds,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+    def close(self):
+        """Close this thread's connection; other threads' connections close when they exit"""
+        db = getattr(self._local, 'db', None)
+        if db is not None and self._local.pid == os.getpid():
+            db.close()
+        self._local.db = None
+
+
+def open_store(config_manager, name: str, default_max_mb: float, default_ttl: float, backend: Optional[str] = None):
+    """Store for storage.<name>: in-process memory, or SQLite shared by all worker processes"""
+    backend = backend or config_manager.get('storage.backend', 'memory')
+    if backend == 'sqlite':
+        return SQLiteStore.from_config(config_manager, name, default_max_mb, default_ttl)
+    if backend != 'memory':
+        raise ValueError(f"Unknown storage backend {backend!r}; expected 'memory' or 'sqlite'")
+    return MemoryStore.from_config(config_manager, name, default_max_mb, default_ttl)
@@ -0,0 +1,87 @@
+import threading
+from typing import Dict, Any, Callable, Optional, Tuple
+
+
+class _Call:
+    """One in-flight upstream call and the callers waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    still running block and receive the same result (or exception). Nothing is
+    kept once the call finishes, so unlike a cache there is no staleness.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+        self.max_waiters = 0
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Run fn once per key across concurrent callers; returns (result, shared).
+
+        A caller that joins an in-flight call waits at most timeout seconds for it
+        and then raises TimeoutError; the call itself keeps running for the others.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, call.waiters)
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f"Gave up waiting {timeout}s for an in-flight call")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> Dict[str, Any]:
+        """In-flight keys and how many callers shared another caller's result"""
+        with self._lock:
+            requests = self.executions + self.coalesced
+            return {
+                'in_flight': len(self._calls),
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'coalesced_rate': round(self.coalesced / requests, 3) if requests else 0.0,
+                'max_waiters': self.max_waiters
+            }
+
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Return the process-wide single-flight group for an upstream provider, creating it on first use"""
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight()
+        return _groups[name]
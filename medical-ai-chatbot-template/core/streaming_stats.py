@@ -0,0 +1,456 @@
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+# Distinct values tracked per column before value counts are pruned to the heaviest half
+DEFAULT_MAX_VALUES = 65536
+# Rows sampled up front to decide which columns are read as text
+TYPE_SAMPLE_ROWS = 10000
+
+
+def _exact_sum(values: np.ndarray, weights: np.ndarray, power: int = 1) -> int:
+    """sum(weights * values ** power) as an exact Python int"""
+    if values.size == 0:
+        return 0
+    bound = int(np.abs(values).max()) ** power * int(weights.sum())
+    if bound < 2 ** 62:
+        return int(np.dot(values.astype(np.int64) ** power, weights.astype(np.int64)))
+    return sum(int(value) ** power * int(weight) for value, weight in zip(values.tolist(), weights.tolist()))
+
+
+def _distinct(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sorted distinct values, the index of each one's first occurrence, and their counts"""
+    low, high = int(values.min()), int(values.max())
+    if high - low > 65536:
+        return np.unique(values, return_index=True, return_counts=True)
+
+    # Small ranges: one bincount, then first occurrences from growing windows at the start
+    shifted = np.subtract(values, low, dtype=np.int64)
+    counts = np.bincount(shifted)
+    first = np.full(counts.size, -1, dtype=np.int64)
+    missing, start, step = int(np.count_nonzero(counts)), 0, 1024
+    while missing:
+        window, index = np.unique(shifted[start:start + step], return_index=True)
+        new = first[window] < 0
+        first[window[new]] = index[new] + start
+        missing -= int(new.sum())
+        start, step = start + step, step * 2
+    present = np.flatnonzero(counts)
+    return (present + low).astype(values.dtype), first[present], counts[present]
+
+
+class QuantileSketch:
+    """Mergeable histogram of a numeric column for quantiles.
+
+    Holds exact (value, weight) pairs while there are at most max_bins distinct
+    values, so medians of ages, flags and other codes are exact. Beyond that,
+    neighbouring values are merged into equal-weight centroids and quantiles
+    become approximate, with memory fixed at max_bins pairs.
+    """
+
+    def __init__(self, max_bins: int = 4096):
+        self.max_bins = max(int(max_bins), 16)
+        self.values = np.empty(0, dtype=np.int64)
+        self.weights = np.empty(0, dtype=np.int64)
+        self.exact = True
+
+    @property
+    def count(self) -> int:
+        return int(self.weights.sum())
+
+    def add(self, values: np.ndarray, weights: np.ndarray):
+        """Fold in distinct values and their counts"""
+        if values.size == 0:
+            return
+        merged, inverse = np.unique(np.concatenate((self.values, values)), return_inverse=True)
+        self.weights = np.bincount(inverse, weights=np.concatenate((self.weights, weights)),
+                                   minlength=merged.size).astype(np.int64)
+        self.values = merged
+        if self.values.size > self.max_bins:
+            self._compress()
+
+    def merge(self, other: 'QuantileSketch'):
+        self.add(other.values, other.weights)
+        self.exact = self.exact and other.exact
+
+    def _compress(self):
+        """Merge neighbouring values into max_bins // 2 centroids of roughly equal weight"""
+        target = self.max_bins // 2
+        cumulative = np.cumsum(self.weights) - self.weights
+        groups = np.minimum((cumulative * target // max(self.count, 1)).astype(np.int64), target - 1)
+        weights = np.bincount(groups, weights=self.weights, minlength=target)
+        sums = np.bincount(groups, weights=self.values * self.weights.astype(np.float64), minlength=target)
+        keep = weights > 0
+        self.values = sums[keep] / weights[keep]
+        self.weights = weights[keep].astype(np.int64)
+        self.exact = False
+
+    def _nth(self, cumulative: np.ndarray, position: int):
+        return self.values[int(np.searchsorted(cumulative, position, side='right'))].item()
+
+    def median(self) -> np.float64:
+        """Median as pandas computes it: the mean of the two middle values for an even count"""
+        count = self.count
+        if count == 0:
+            return np.float64(np.nan)
+        cumulative = np.cumsum(self.weights)
+        if count % 2:
+            return np.float64(self._nth(cumulative, count // 2))
+        return np.float64(self._nth(cumulative, count // 2 - 1) + self._nth(cumulative, count // 2)) / 2
+
+    def quantile(self, q: float) -> np.float64:
+        """Linearly interpolated quantile, matching Series.quantile while the sketch is exact"""
+        count = self.count
+        if count == 0:
+            return np.float64(np.nan)
+        cumulative = np.cumsum(self.weights)
+        position = q * (count - 1)
+        low = self._nth(cumulative, int(np.floor(position)))
+        high = self._nth(cumulative, int(np.ceil(position)))
+        return np.float64(low + (high - low) * (position - np.floor(position)))
+
+
+class ColumnAggregate:
+    """Mergeable aggregates of one column: counts, exact sums, range, value counts and a quantile sketch.
+
+    A column is 'int' while every value seen is a non-negative integer (as
+    DatasetEngine stores it), otherwise 'label'; 'blank' until a value is seen.
+    """
+
+    def __init__(self, max_values: int = DEFAULT_MAX_VALUES):
+        self.max_values = max(int(max_values), 16)
+        self.kind = 'blank'
+        self.count = 0
+        self.blank = 0
+        self.sum = 0
+        self.sum_squares = 0
+        self.min = None
+        self.max = None
+        self.counts: Dict[Any, int] = {}
+        self.first_seen: Dict[Any, Tuple[int, int]] = {}
+        self.truncated = False
+        self.sketch = QuantileSketch()
+
+    def add_ints(self, values: np.ndarray, position: int, blank: int = 0):
+        """Fold in present integer values of one chunk; position orders chunks within the file"""
+        self.blank += blank
+        if values.size == 0:
+            return
+        if self.kind == 'label':
+            self.add_labels(values)
+            return
+
+        distinct, first, counts = _distinct(values)
+        self.kind = 'int'
+        self.count += int(values.size)
+        self.sum += _exact_sum(distinct, counts)
+        self.sum_squares += _exact_sum(distinct, counts, power=2)
+        low, high = distinct[0].item(), distinct[-1].item()
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self.sketch.add(distinct, counts)
+
+        for value, index, count in zip(distinct.tolist(), first.tolist(), counts.tolist()):
+            self.counts[value] = self.counts.get(value, 0) + count
+            seen = (position, index)
+            if value not in self.first_seen or seen < self.first_seen[value]:
+                self.first_seen[value] = seen
+        self._prune()
+
+    def add_labels(self, values):
+        """Fold in one chunk of a text column; labels are stripped and blanks become ''"""
+        if self.kind != 'label':
+            self._to_labels()
+        import pandas as pd
+
+        # Count raw values first so each distinct value is converted and stripped once
+        for value, count in pd.Series(values).value_counts(sort=False, dropna=False).items():
+            label = '' if pd.isna(value) else str(value).strip()
+            self.counts[label] = self.counts.get(label, 0) + int(count)
+        self._prune()
+
+    def _to_labels(self):
+        """Reinterpret integer values as text once a non-integer value shows up"""
+        counts = {str(value): count for value, count in self.counts.items()}
+        if self.blank:
+            counts[''] = counts.get('', 0) + self.blank
+        self.kind = 'label'
+        self.counts = counts
+        self.count = self.blank = self.sum = self.sum_squares = 0
+        self.min = self.max = None
+        self.first_seen = {}
+        self.sketch = QuantileSketch()
+
+    def merge(self, other: 'ColumnAggregate'):
+        if other.kind == 'label' or (self.kind == 'label' and other.kind != 'label'):
+            if self.kind != 'label':
+                self._to_labels()
+            if other.kind != 'label':
+                other = other.copy_as_labels()
+            for label, count in other.counts.items():
+                self.counts[label] = self.counts.get(label, 0) + count
+        else:
+            self.blank += other.blank
+            if other.kind == 'int':
+                self.kind = 'int'
+                self.count += other.count
+                self.sum += other.sum
+                self.sum_squares += other.sum_squares
+                self.min = other.min if self.min is None else min(self.min, other.min)
+                self.max = other.max if self.max is None else max(self.max, other.max)
+                self.sketch.merge(other.sketch)
+                for value, count in other.counts.items():
+                    self.counts[value] = self.counts.get(value, 0) + count
+                for value, seen in other.first_seen.items():
+                    if value not in self.first_seen or seen < self.first_seen[value]:
+                        self.first_seen[value] = seen
+        self.truncated = self.truncated or other.truncated
+        self._prune()
+
+    def copy_as_labels(self) -> 'ColumnAggregate':
+        copy = ColumnAggregate(self.max_values)
+        copy.merge(self)
+        copy._to_labels()
+        return copy
+
+    def _prune(self):
+        """Keep the heaviest half of the value counts once there are too many distinct values"""
+        if len(self.counts) <= self.max_values:
+            return
+        keep = sorted(self.counts, key=self._order_key)[:self.max_values // 2]
+        self.counts = {value: self.counts[value] for value in keep}
+        self.first_seen = {value: self.first_seen[value] for value in keep if value in self.first_seen}
+        self.truncated = True
+
+    def _order_key(self, value):
+        # value_counts order: descending count, ties by category order or first appearance
+        return (-self.counts[value], value if self.kind == 'label' else self.first_seen.get(value, (0, 0)))
+
+    def labels(self) -> List[Any]:
+        """Values in value_counts order"""
+        return sorted(self.counts, key=self._order_key)
+
+
+def _summarize_piece(path: str, start: int, stop: int, header: List[str], text_columns: List[str],
+                     position: int, target_column: str, positive_label: str, max_values: int) -> 'DatasetSummary':
+    """Aggregate one newline-aligned byte range of the CSV (runs in a worker process)"""
+    summary = DatasetSummary(header, target_column, positive_label, max_values)
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(stop - start)
+    if data.strip():
+        import pandas as pd
+
+        frame = pd.read_csv(io.BytesIO(data), header=None, names=header, encoding='utf-8',
+                            dtype={name: str for name in text_columns},
+                            keep_default_na=False, na_values=[''])
+        summary.add_frame(frame, position)
+    return summary
+
+
+class DatasetSummary:
+    """Mergeable, bounded-memory aggregates of a disease CSV, built chunk by chunk.
+
+    Each column is summarised overall and within the target cohort (e.g.
+    LUNG_CANCER == YES), which is enough to reproduce the processors' value
+    counts, means, ranges, medians and target correlations without holding
+    the rows. Chunks can be aggregated in separate processes and merged.
+    """
+
+    def __init__(self, columns: List[str], target_column: str = 'LUNG_CANCER', positive_label: str = 'YES',
+                 max_values: int = DEFAULT_MAX_VALUES):
+        self.columns = list(columns)
+        self.target_column = target_column
+        self.positive_label = positive_label
+        self.max_values = max_values
+        self.total_records = 0
+        self.positive_records = 0
+        self.overall = {name: ColumnAggregate(max_values) for name in self.columns}
+        self.positive = {name: ColumnAggregate(max_values) for name in self.columns}
+
+    @classmethod
+    def from_csv(cls, path, target_column: str = 'LUNG_CANCER', positive_label: str = 'YES',
+                 chunk_bytes: int = 64 * 1024 * 1024, workers: Optional[int] = None,
+                 max_values: int = DEFAULT_MAX_VALUES) -> 'DatasetSummary':
+        """Aggregate a CSV in newline-aligned chunks, across worker processes when workers > 1.
+
+        Memory is bounded by chunk_bytes per worker plus the aggregates. Rows
+        must not contain quoted line breaks, since chunks are split on newlines.
+        """
+        import pandas as pd
+
+        path = Path(path)
+        with open(path, 'rb') as f:
+            header_line = f.readline()
+            data_start = f.tell()
+        header = next(csv.reader([header_line.decode('utf-8')]), [])
+
+        # Columns that are not plain non-negative integers in a sample are read as text
+        sample = pd.read_csv(path, nrows=TYPE_SAMPLE_ROWS, encoding='utf-8', keep_default_na=False, na_values=[''])
+        text_columns = [name for name in header if name in sample.columns and cls._column_kind(sample[name]) == 'label']
+
+        pieces = cls._split(path, data_start, max(int(chunk_bytes), 1024))
+        args = [(str(path), start, stop, header, text_columns, position, target_column, positive_label, max_values)
+                for position, (start, stop) in enumerate(pieces)]
+
+        summary = cls(header, target_column, positive_label, max_values)
+        workers = min(workers or os.cpu_count() or 1, len(args))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for piece in pool.map(_summarize_piece, *zip(*args)):
+                    summary.merge(piece)
+        else:
+            for piece_args in args:
+                summary.merge(_summarize_piece(*piece_args))
+        return summary
+
+    @staticmethod
+    def _split(path: Path, start: int, chunk_bytes: int) -> List[Tuple[int, int]]:
+        """Byte ranges of roughly chunk_bytes, each ending at a line break"""
+        size = path.stat().st_size
+        bounds = [start]
+        with open(path, 'rb') as f:
+            while bounds[-1] + chunk_bytes < size:
+                f.seek(bounds[-1] + chunk_bytes)
+                f.readline()
+                bounds.append(f.tell())
+        if bounds[-1] < size:
+            bounds.append(size)
+        return list(zip(bounds, bounds[1:]))
+
+    @staticmethod
+    def _column_kind(series) -> str:
+        """'int' for non-negative integers (blanks allowed), 'blank' if empty, else 'label'"""
+        import pandas as pd
+
+        if pd.api.types.is_integer_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            return 'int' if len(series) == 0 or series.min() >= 0 else 'label'
+        if pd.api.types.is_float_dtype(series.dtype):
+            present = series.dropna()
+            if present.empty:
+                return 'blank'
+            values = present.to_numpy()
+            return 'int' if (values >= 0).all() and (values == np.floor(values)).all() else 'label'
+        return 'label'
+
+    def add_frame(self, frame, position: int = 0):
+        """Fold in one parsed chunk of rows"""
+        rows = len(frame)
+        target = frame[self.target_column] if self.target_column in frame.columns else None
+        if target is not None and self._column_kind(target) == 'label':
+            matches = [value for value in target.dropna().unique() if str(value).strip() == self.positive_label]
+            positive = target.isin(matches).to_numpy()
+        else:
+            positive = np.zeros(rows, dtype=bool)
+        self.total_records += rows
+        self.positive_records += int(positive.sum())
+
+        for name in self.columns:
+            if name not in frame.columns:
+                continue
+            series = frame[name]
+            kind = self._column_kind(series)
+            if kind == 'label':
+                values = series.to_numpy(dtype=object)
+                self.overall[name].add_labels(values)
+                self.positive[name].add_labels(values[positive])
+                continue
+
+            present = series.notna().to_numpy()
+            values = series.to_numpy()
+            if kind == 'blank' or not present.all():
+                values = np.where(present, values, 0)
+            values = values.astype(np.int64) if values.dtype.kind == 'f' else values
+            blank = rows - int(present.sum())
+            self.overall[name].add_ints(values[present], position, blank)
+            self.positive[name].add_ints(values[present & positive], position,
+                                         int(positive.sum()) - int((present & positive).sum()))
+
+    def merge(self, other: 'DatasetSummary'):
+        self.total_records += other.total_records
+        self.positive_records += other.positive_records
+        for name in self.columns:
+            self.overall[name].merge(other.overall[name])
+            self.positive[name].merge(other.positive[name])
+
+    def kind(self, column: str) -> str:
+        kind = self.overall[column].kind
+        return 'label' if kind == 'blank' else kind
+
+    def _aggregate(self, column: str, positive: bool = False) -> ColumnAggregate:
+        aggregate = (self.positive if positive else self.overall)[column]
+        if self.kind(column) == 'label' and aggregate.kind != 'label':
+            aggregate = aggregate.copy_as_labels()
+        return aggregate
+
+    def value_counts(self, column: str, positive: bool = False) -> List[Tuple[Any, int]]:
+        """(value, count) pairs in Series.value_counts order; text columns list every label, like categoricals"""
+        aggregate = self._aggregate(column, positive)
+        if self.kind(column) == 'label':
+            # Categories are the sorted labels of the whole column, ties keep that order
+            labels = sorted(self._aggregate(column).counts)
+            return sorted(((label, aggregate.counts.get(label, 0)) for label in labels), key=lambda item: -item[1])
+        return [(value, aggregate.counts[value]) for value in aggregate.labels()]
+
+    def top_values(self, column: str, limit: int = 5) -> Tuple[int, Dict[Any, int]]:
+        """Distinct value count and the most common values (a lower bound once counts were pruned)"""
+        counts = self.value_counts(column)
+        return sum(1 for _, count in counts if count), dict(counts[:limit])
+
+    def count_equal(self, column: str, value: Any, positive: bool = False) -> int:
+        return self._aggregate(column, positive).counts.get(value, 0)
+
+    def mean(self, column: str, positive: bool = False) -> np.float64:
+        if self.kind(column) != 'int':
+            raise TypeError(f"Cannot take the mean of text column {column}")
+        aggregate = self._aggregate(column, positive)
+        return np.float64(aggregate.sum) / aggregate.count if aggregate.count else np.float64(np.nan)
+
+    def median(self, column: str) -> np.float64:
+        if self.kind(column) != 'int':
+            raise TypeError(f"Cannot take the median of text column {column}")
+        return self.overall[column].sketch.median()
+
+    def value_range(self, column: str, positive: bool = False) -> Tuple[Any, Any]:
+        aggregate = self._aggregate(column, positive)
+        if self.kind(column) == 'int':
+            return aggregate.min, aggregate.max
+        labels = [label for label, count in aggregate.counts.items() if count]
+        return (min(labels), max(labels)) if labels else (None, None)
+
+    def dtype_name(self, column: str) -> str:
+        """dtype the column gets in DatasetEngine.to_frame()"""
+        if self.kind(column) != 'int':
+            return 'category'
+        aggregate = self.overall[column]
+        if len(aggregate.counts) <= 2 and aggregate.max <= 127 and not aggregate.truncated:
+            dtype = np.dtype(np.int8)
+        else:
+            dtype = np.min_scalar_type(aggregate.max)
+        if not aggregate.blank:
+            return str(dtype)
+        import pandas as pd
+        return str(pd.arrays.IntegerArray(np.zeros(0, dtype=dtype), np.zeros(0, dtype=bool)).dtype)
+
+    def correlations(self, features: List[str]) -> Dict[str, float]:
+        """Pearson correlation of each integer feature with the target, from exact integer moments"""
+        correlations = {}
+        for feature in features:
+            if self.kind(feature) != 'int':
+                continue
+            overall, positive = self.overall[feature], self.positive[feature]
+            count, sx, sxx = overall.count, overall.sum, overall.sum_squares
+            # y is 1 for target rows, so sum(y) and sum(x * y) come from the target cohort
+            sy, sxy = positive.count, positive.sum
+            covariance = count * sxy - sx * sy
+            variance_x = count * sxx - sx * sx
+            variance_y = count * sy - sy * sy
+            if count < 2 or variance_x <= 0 or variance_y <= 0:
+                continue
+            correlations[feature] = covariance / np.sqrt(float(variance_x)) / np.sqrt(float(variance_y))
+        return correlations
@@ -9,45 +9,138 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from core.base_processor import BaseDiseaseProcessor
+from core.dataset_engine import get_dataset
+from core.streaming_stats import DatasetSummary
+from core.intent_router import get_intent_scorer
 
 class LungCancerProcessor(BaseDiseaseProcessor):
+    # Rows per block when scanning the feature matrix, bounding temporary memory
+    BLOCK_ROWS = 65536
+    
     def __init__(self):
         super().__init__('lung_cancer')
+        self.dataset = None
+        self.summary = None
         self.data = self._load_data()
         self.features = self._get_features()
+        self._analysis = {}
     
     def _load_data(self) -> pd.DataFrame:
-        """Load lung cancer dataset"""
+        """Load lung cancer dataset from the shared compact dataset store"""
         data_path = self.disease_path / "data.csv"
         
         if not data_path.exists():
             print(f"❌ Data file not found: {data_path}")
             return pd.DataFrame()
         
+        if self._use_streaming(data_path):
+            return self._load_summary(data_path)
+        
         try:
-            df = pd.read_csv(data_path)
-            print(f"✅ Loaded {len(df)} lung cancer records")
+            self.dataset = get_dataset(self.disease_name)
+            df = self.dataset.to_frame()
+            print(f"✅ Loaded {len(df)} lung cancer records ({self.dataset.memory_usage() / 1024:.1f} KB)")
             return df
         except Exception as e:
             print(f"❌ Error loading data: {e}")
             return pd.DataFrame()
     
+    def _use_streaming(self, data_path: Path) -> bool:
+        """Whether config asks for streaming aggregation ("streaming", or "auto" above stream_above_mb)"""
+        processing = self.config.get('processing', {})
+        mode = processing.get('mode', 'memory')
+        if mode == 'auto':
+            return data_path.stat().st_size > processing.get('stream_above_mb', 1024) * 1024 * 1024
+        return mode == 'streaming'
+    
+    def _load_summary(self, data_path: Path) -> pd.DataFrame:
+        """Aggregate the CSV chunk by chunk instead of loading it; rows are never held in memory"""
+        processing = self.config.get('processing', {})
+        try:
+            self.summary = DatasetSummary.from_csv(
+                data_path,
+                chunk_bytes=int(processing.get('chunk_mb', 64) * 1024 * 1024),
+                workers=processing.get('workers')
+            )
+            print(f"✅ Streamed {self.summary.total_records} lung cancer records into aggregates")
+        except Exception as e:
+            print(f"❌ Error streaming data: {e}")
+        return pd.DataFrame()
+    
     def _get_features(self) -> list:
         """Get feature columns (excluding target)"""
-        if self.data.empty:
+        if self._is_empty():
             return []
         
         # Exclude the target column (LUNG_CANCER)
-        features = [col for col in self.data.columns if col != 'LUNG_CANCER']
+        columns = self.summary.columns if self.summary is not None else self.data.columns
+        features = [col for col in columns if col != 'LUNG_CANCER']
         return features
     
+    # Primitives shared by the statistics and insights below, answered either from
+    # the DataFrame or, in streaming mode, from the chunk aggregates
+    
+    def _is_empty(self) -> bool:
+        if self.summary is not None:
+            return self.summary.total_records == 0
+        return self.data.empty
+    
+    def _record_count(self) -> int:
+        return self.summary.total_records if self.summary is not None else len(self.data)
+    
+    def _has_column(self, column: str) -> bool:
+        return column in (self.summary.columns if self.summary is not None else self.data.columns)
+    
+    def _frame(self, cancer: bool = False) -> pd.DataFrame:
+        return self._analysis_state()['cancer_cases'] if cancer else self.data
+    
+    def _cancer_count(self) -> int:
+        if self.summary is not None:
+            return self.summary.positive_records
+        return int(self._analysis_state()['cancer_mask'].sum())
+    
+    def _value_counts(self, column: str, cancer: bool = False) -> pd.Series:
+        if self.summary is not None:
+            counts = self.summary.value_counts(column, positive=cancer)
+            return pd.Series([count for _, count in counts], index=[value for value, _ in counts], dtype='int64')
+        return self._frame(cancer)[column].value_counts()
+    
+    def _count_equal(self, column: str, value, cancer: bool = False) -> int:
+        if self.summary is not None:
+            return self.summary.count_equal(column, value, positive=cancer)
+        frame = self._frame(cancer)
+        return len(frame[frame[column] == value])
+    
+    def _mean(self, column: str, cancer: bool = False):
+        if self.summary is not None:
+            return self.summary.mean(column, positive=cancer)
+        return self._frame(cancer)[column].mean()
+    
+    def _median(self, column: str):
+        if self.summary is not None:
+            return self.summary.median(column)
+        return self.data[column].median()
+    
+    def _value_range(self, column: str, cancer: bool = False) -> str:
+        if self.summary is not None:
+            low, high = self.summary.value_range(column, positive=cancer)
+        else:
+            frame = self._frame(cancer)
+            low, high = frame[column].min(), frame[column].max()
+        return f"{low}-{high}"
+    
+    def _data_type(self, column: str) -> str:
+        if self.summary is not None:
+            return self.summary.dtype_name(column)
+        return str(self.data[column].dtype)
+    
     def get_statistics(self) -> dict:
         """Get comprehensive dataset statistics"""
-        if self.data.empty:
+        if self._is_empty():
             return {"error": "No data available"}
         
         stats = {
-            "total_records": len(self.data),
+            "total_records": self._record_count(),
             "features": len(self.features),
             "target_distribution": self._get_target_distribution(),
             "feature_analysis": self._get_feature_analysis(),
@@ -58,13 +151,161 @@ class LungCancerProcessor(BaseDiseaseProcessor):
         
         return stats
     
+    def _analysis_state(self) -> dict:
+        """Target encoding, cancer-cohort mask and numeric column arrays, computed once per dataset"""
+        if self._analysis.get('data') is self.data:
+            return self._analysis
+        
+        has_target = 'LUNG_CANCER' in self.data.columns
+        cancer_mask = (self.data['LUNG_CANCER'] == 'YES').to_numpy(dtype=bool) if has_target else None
+        
+        # Numeric features as plain arrays (plus a validity mask where values can be missing)
+        numeric = {}
+        for feature in self.features:
+            column = self.data[feature]
+            if pd.api.types.is_numeric_dtype(column):
+                if not (isinstance(column.dtype, np.dtype) and column.dtype.kind in 'iub') and column.hasnans:
+                    numeric[feature] = (column.to_numpy(dtype='float64', na_value=np.nan), column.notna().to_numpy())
+                else:
+                    numeric[feature] = (column.to_numpy(), None)
+        
+        self._analysis = {
+            'data': self.data,
+            'target': cancer_mask.astype(np.int8) if has_target else None,
+            'cancer_mask': cancer_mask,
+            'cancer_cases': self.data[cancer_mask] if has_target else self.data.iloc[0:0],
+            'numeric': numeric
+        }
+        return self._analysis
+    
+    def _feature_value_counts(self) -> dict:
+        """unique count and top-5 value counts of every feature, matching Series.value_counts ordering"""
+        total = len(self.data)
+        slots, fallback = [], []
+        
+        # Category codes and small-range integers become slots of one flat histogram
+        for feature in self.features:
+            column = self.data[feature]
+            if isinstance(column.dtype, pd.CategoricalDtype) and not column.hasnans:
+                categories = list(column.cat.categories)
+                slots.append((feature, column.cat.codes.to_numpy(), 0, categories, len(categories)))
+            elif isinstance(column.dtype, np.dtype) and column.dtype.kind in 'iu':
+                # Plain NumPy integers cannot hold missing values
+                values = column.to_numpy()
+                low, high = (int(values.min()), int(values.max())) if total else (0, 0)
+                if high - low <= 2 * total + 1024:
+                    slots.append((feature, values, low, None, high - low + 1))
+                    continue
+                fallback.append(feature)
+            else:
+                fallback.append(feature)
+        
+        sizes = [slot[4] for slot in slots]
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.int64)
+        counts = np.zeros(int(sum(sizes)), dtype=np.int64)
+        
+        for start in range(0, total, self.BLOCK_ROWS):
+            stop = min(start + self.BLOCK_ROWS, total)
+            # Column-major block of slot indices, counted with a single bincount
+            block = np.empty((stop - start, len(slots)), dtype=np.int64, order='F')
+            for position, (_, values, low, _, _) in enumerate(slots):
+                np.add(values[start:stop], offsets[position] - low, out=block[:, position], casting='unsafe')
+            counts += np.bincount(block.ravel(order='K'), minlength=counts.size)
+        
+        results = {}
+        for (feature, values, low, labels, size), offset in zip(slots, offsets):
+            column_counts = counts[offset:offset + size]
+            if labels is not None:
+                # Categorical value_counts lists every category, ties in category order
+                order = np.argsort(-column_counts, kind='stable')[:5]
+                most_common = {labels[i]: int(column_counts[i]) for i in order}
+            else:
+                present = np.flatnonzero(column_counts)
+                ranked = present[np.argsort(-column_counts[present], kind='stable')]
+                # Ties at the top are ordered by first appearance, as value_counts does
+                cutoff = column_counts[ranked[min(4, len(ranked) - 1)]] if len(ranked) else 0
+                candidates = ranked[column_counts[ranked] >= cutoff]
+                first_seen = [int(np.argmax(values == slot + low)) for slot in candidates]
+                order = sorted(range(len(candidates)), key=lambda i: (-column_counts[candidates[i]], first_seen[i]))[:5]
+                most_common = {int(candidates[i]) + low: int(column_counts[candidates[i]]) for i in order}
+            results[feature] = (int(np.count_nonzero(column_counts)), most_common)
+        
+        for feature in fallback:
+            results[feature] = (self.data[feature].nunique(), self.data[feature].value_counts().head(5).to_dict())
+        return results
+    
+    def _target_correlations(self) -> dict:
+        """Pearson correlation of every numeric feature with the target, from one blocked pass"""
+        state = self._analysis_state()
+        numeric = state['numeric']
+        target = state['target']
+        features = list(numeric)
+        if not features:
+            return {}
+        
+        k = len(features)
+        total = len(self.data)
+        masked = any(mask is not None for _, mask in numeric.values())
+        # Float64 sums of integers stay exact below 2**53, so they can be combined as ints
+        exact = not masked and all(
+            np.issubdtype(values.dtype, np.integer) and
+            total * max(abs(int(values.min())), abs(int(values.max()))) ** 2 < 2 ** 53
+            for values, _ in numeric.values())
+        # Otherwise sums are taken around each column's mean to avoid cancellation
+        shifts = np.zeros(k)
+        if not exact:
+            for position, feature in enumerate(features):
+                values, mask = numeric[feature]
+                present = values if mask is None else values[mask]
+                shifts[position] = present.mean() if present.size else 0.0
+        
+        n = np.zeros(k)
+        sum_x, sum_y, sum_xx, sum_xy = np.zeros(k), np.zeros(k), np.zeros(k), np.zeros(k)
+        
+        for start in range(0, total, self.BLOCK_ROWS):
+            stop = min(start + self.BLOCK_ROWS, total)
+            # Column-major block so each feature is one contiguous copy
+            x = np.empty((stop - start, k), order='F')
+            for position, feature in enumerate(features):
+                np.subtract(numeric[feature][0][start:stop], shifts[position], out=x[:, position])
+            y = target[start:stop].astype(np.float64)
+            
+            if masked:
+                valid = np.ones((stop - start, k), dtype=bool, order='F')
+                for position, feature in enumerate(features):
+                    if numeric[feature][1] is not None:
+                        valid[:, position] = numeric[feature][1][start:stop]
+                x[~valid] = 0
+                n += valid.sum(axis=0)
+                sum_y += y @ valid
+            else:
+                n += stop - start
+                sum_y += y.sum()
+            
+            sum_x += x.sum(axis=0)
+            sum_xx += np.einsum('ij,ij->j', x, x)
+            sum_xy += y @ x
+        
+        correlations = {}
+        for position, feature in enumerate(features):
+            count, sx, sy, sxx, sxy = n[position], sum_x[position], sum_y[position], sum_xx[position], sum_xy[position]
+            if exact:
+                count, sx, sy, sxx, sxy = int(count), int(sx), int(sy), int(sxx), int(sxy)
+            covariance = count * sxy - sx * sy
+            variance_x = count * sxx - sx * sx
+            variance_y = count * sy - sy * sy  # y is 0/1, so sum(y * y) == sum(y)
+            if count < 2 or variance_x <= 0 or variance_y <= 0:
+                continue
+            correlations[feature] = covariance / np.sqrt(float(variance_x)) / np.sqrt(float(variance_y))
+        return correlations
+    
     def _get_target_distribution(self) -> dict:
         """Get distribution of cancer cases"""
-        if 'LUNG_CANCER' not in self.data.columns:
+        if not self._has_column('LUNG_CANCER'):
             return {}
         
-        distribution = self.data['LUNG_CANCER'].value_counts().to_dict()
-        total = len(self.data)
+        distribution = self._value_counts('LUNG_CANCER').to_dict()
+        total = self._record_count()
         
         return {
             "cancer_cases": distribution.get('YES', 0),
@@ -75,41 +316,47 @@ class LungCancerProcessor(BaseDiseaseProcessor):
     
     def _get_feature_analysis(self) -> dict:
         """Analyze individual features"""
-        if self.data.empty:
+        if self._is_empty():
             return {}
         
         analysis = {}
+        if self.summary is not None:
+            value_counts = {feature: self.summary.top_values(feature) for feature in self.features}
+        else:
+            state = self._analysis_state()
+            # The dataset is read-only, so the vectorized counts are computed once
+            if 'value_counts' not in state:
+                state['value_counts'] = self._feature_value_counts()
+            value_counts = state['value_counts']
         
         for feature in self.features:
-            if feature in self.data.columns:
-                unique_values = self.data[feature].nunique()
-                value_counts = self.data[feature].value_counts().head(5).to_dict()
+            if self._has_column(feature):
+                unique_values, most_common = value_counts[feature]
                 
                 analysis[feature] = {
                     "unique_values": unique_values,
-                    "most_common": value_counts,
-                    "data_type": str(self.data[feature].dtype)
+                    "most_common": most_common,
+                    "data_type": self._data_type(feature)
                 }
         
         return analysis
     
     def _get_risk_factors(self) -> dict:
         """Identify key risk factors"""
-        if self.data.empty or 'LUNG_CANCER' not in self.data.columns:
+        if self._is_empty() or not self._has_column('LUNG_CANCER'):
             return {}
         
         risk_factors = {}
-        cancer_cases = self.data[self.data['LUNG_CANCER'] == 'YES']
-        total_cancer = len(cancer_cases)
+        total_cancer = self._cancer_count()
         
         if total_cancer == 0:
             return risk_factors
         
         # Analyze each feature as potential risk factor
         for feature in self.features:
-            if feature in cancer_cases.columns:
+            if self._has_column(feature):
                 if feature == 'SMOKING':
-                    smokers_with_cancer = len(cancer_cases[cancer_cases[feature] == 1])
+                    smokers_with_cancer = self._count_equal(feature, 1, cancer=True)
                     risk_factors['SMOKING'] = {
                         "cancer_cases_with_factor": smokers_with_cancer,
                         "percentage": round((smokers_with_cancer / total_cancer) * 100, 2),
@@ -117,15 +364,15 @@ class LungCancerProcessor(BaseDiseaseProcessor):
                     }
                 
                 elif feature == 'AGE':
-                    avg_age = cancer_cases[feature].mean()
+                    avg_age = self._mean(feature, cancer=True)
                     risk_factors['AGE'] = {
                         "average_age": round(avg_age, 1),
-                        "age_range": f"{cancer_cases[feature].min()}-{cancer_cases[feature].max()}",
+                        "age_range": self._value_range(feature, cancer=True),
                         "description": "Age factor in cancer cases"
                     }
                 
                 elif feature == 'GENDER':
-                    gender_dist = cancer_cases[feature].value_counts().to_dict()
+                    gender_dist = self._value_counts(feature, cancer=True).to_dict()
                     risk_factors['GENDER'] = {
                         "distribution": gender_dist,
                         "description": "Gender distribution in cancer cases"
@@ -135,45 +382,43 @@ class LungCancerProcessor(BaseDiseaseProcessor):
     
     def _get_demographic_insights(self) -> dict:
         """Get demographic insights"""
-        if self.data.empty:
+        if self._is_empty():
             return {}
         
         insights = {}
         
         # Gender distribution
-        if 'GENDER' in self.data.columns:
-            gender_dist = self.data['GENDER'].value_counts().to_dict()
+        if self._has_column('GENDER'):
+            gender_dist = self._value_counts('GENDER').to_dict()
             insights['gender_distribution'] = gender_dist
         
         # Age statistics
-        if 'AGE' in self.data.columns:
+        if self._has_column('AGE'):
             insights['age_statistics'] = {
-                "mean_age": round(self.data['AGE'].mean(), 1),
-                "median_age": self.data['AGE'].median(),
-                "age_range": f"{self.data['AGE'].min()}-{self.data['AGE'].max()}"
+                "mean_age": round(self._mean('AGE'), 1),
+                "median_age": self._median('AGE'),
+                "age_range": self._value_range('AGE')
             }
         
         return insights
     
     def _get_correlation_insights(self) -> dict:
         """Get correlation insights between features and cancer"""
-        if self.data.empty or 'LUNG_CANCER' not in self.data.columns:
+        if self._is_empty() or not self._has_column('LUNG_CANCER'):
             return {}
         
         insights = {}
         
-        # Convert categorical to numerical for correlation
-        data_numeric = self.data.copy()
-        data_numeric['LUNG_CANCER'] = data_numeric['LUNG_CANCER'].map({'YES': 1, 'NO': 0})
-        
-        # Calculate correlations
-        correlations = {}
-        for feature in self.features:
-            if feature in data_numeric.columns:
-                if data_numeric[feature].dtype in ['int64', 'float64']:
-                    corr = data_numeric[feature].corr(data_numeric['LUNG_CANCER'])
-                    if not np.isnan(corr):
-                        correlations[feature] = round(corr, 3)
+        if self.summary is not None:
+            raw_correlations = self.summary.correlations(self.features)
+        else:
+            # Correlation vector against the encoded target, no DataFrame copy
+            state = self._analysis_state()
+            if 'correlations' not in state:
+                state['correlations'] = self._target_correlations()
+            raw_correlations = state['correlations']
+        correlations = {feature: round(float(corr), 3) for feature, corr in raw_correlations.items()
+                        if not np.isnan(corr)}
         
         # Sort by absolute correlation value
         sorted_correlations = sorted(correlations.items(), key=lambda x: abs(x[1]), reverse=True)
@@ -185,38 +430,39 @@ class LungCancerProcessor(BaseDiseaseProcessor):
     
     def generate_insights(self, query: str) -> str:
         """Generate contextual insights based on query"""
-        if self.data.empty:
+        if self._is_empty():
             return "Dataset not available for analysis."
         
         query_lower = query.lower()
+        # Whole-word topics, so "percentage" is not an age question
+        topic = get_intent_scorer().topic(query)
         
         # Query-specific insights
-        if 'smoking' in query_lower:
+        if topic == 'smoking':
             return self._smoking_insights()
-        elif 'age' in query_lower:
+        elif topic == 'age':
             return self._age_insights()
-        elif 'gender' in query_lower:
+        elif topic == 'gender':
             return self._gender_insights()
         elif 'symptom' in query_lower:
             return self._symptom_insights()
-        elif 'statistic' in query_lower or 'data' in query_lower:
+        elif topic == 'statistics' or 'data' in query_lower:
             return self._general_statistics()
         else:
             return self._general_insights()
     
     def _smoking_insights(self) -> str:
         """Generate smoking-related insights"""
-        if 'SMOKING' not in self.data.columns:
+        if not self._has_column('SMOKING'):
             return "Smoking data not available in dataset."
         
-        total = len(self.data)
-        smokers = len(self.data[self.data['SMOKING'] == 1])
+        total = self._record_count()
+        smokers = self._count_equal('SMOKING', 1)
         smokers_pct = round((smokers / total) * 100, 1)
         
-        if 'LUNG_CANCER' in self.data.columns:
-            cancer_cases = self.data[self.data['LUNG_CANCER'] == 'YES']
-            smokers_with_cancer = len(cancer_cases[cancer_cases['SMOKING'] == 1])
-            total_cancer = len(cancer_cases)
+        if self._has_column('LUNG_CANCER'):
+            smokers_with_cancer = self._count_equal('SMOKING', 1, cancer=True)
+            total_cancer = self._cancer_count()
             
             if total_cancer > 0:
                 smoker_cancer_pct = round((smokers_with_cancer / total_cancer) * 100, 1)
@@ -226,38 +472,36 @@ class LungCancerProcessor(BaseDiseaseProcessor):
     
     def _age_insights(self) -> str:
         """Generate age-related insights"""
-        if 'AGE' not in self.data.columns:
+        if not self._has_column('AGE'):
             return "Age data not available in dataset."
         
-        avg_age = round(self.data['AGE'].mean(), 1)
-        median_age = self.data['AGE'].median()
-        age_range = f"{self.data['AGE'].min()}-{self.data['AGE'].max()}"
+        avg_age = round(self._mean('AGE'), 1)
+        median_age = self._median('AGE')
+        age_range = self._value_range('AGE')
         
-        if 'LUNG_CANCER' in self.data.columns:
-            cancer_cases = self.data[self.data['LUNG_CANCER'] == 'YES']
-            if len(cancer_cases) > 0:
-                cancer_avg_age = round(cancer_cases['AGE'].mean(), 1)
+        if self._has_column('LUNG_CANCER'):
+            if self._cancer_count() > 0:
+                cancer_avg_age = round(self._mean('AGE', cancer=True), 1)
                 return f"AGE ANALYSIS:\n• Average age in dataset: {avg_age} years\n• Average age of cancer patients: {cancer_avg_age} years\n• Age range: {age_range} years\n• Median age: {median_age} years"
         
         return f"AGE ANALYSIS:\n• Average age: {avg_age} years\n• Median age: {median_age} years\n• Age range: {age_range} years"
     
     def _gender_insights(self) -> str:
         """Generate gender-related insights"""
-        if 'GENDER' not in self.data.columns:
+        if not self._has_column('GENDER'):
             return "Gender data not available in dataset."
         
-        gender_dist = self.data['GENDER'].value_counts()
-        total = len(self.data)
+        gender_dist = self._value_counts('GENDER')
+        total = self._record_count()
         
         insights = "GENDER ANALYSIS:\n"
         for gender, count in gender_dist.items():
             pct = round((count / total) * 100, 1)
             insights += f"• {gender}: {count} patients ({pct}%)\n"
         
-        if 'LUNG_CANCER' in self.data.columns:
-            cancer_cases = self.data[self.data['LUNG_CANCER'] == 'YES']
-            if len(cancer_cases) > 0:
-                cancer_gender_dist = cancer_cases['GENDER'].value_counts()
+        if self._has_column('LUNG_CANCER'):
+            if self._cancer_count() > 0:
+                cancer_gender_dist = self._value_counts('GENDER', cancer=True)
                 insights += "Cancer cases by gender:\n"
                 for gender, count in cancer_gender_dist.items():
                     insights += f"• {gender}: {count} cases\n"
@@ -267,7 +511,7 @@ class LungCancerProcessor(BaseDiseaseProcessor):
     def _symptom_insights(self) -> str:
         """Generate symptom-related insights"""
         symptom_features = ['COUGHING', 'SHORTNESS_OF_BREATH', 'CHEST_PAIN', 'WHEEZING', 'FATIGUE']
-        available_symptoms = [s for s in symptom_features if s in self.data.columns]
+        available_symptoms = [s for s in symptom_features if self._has_column(s)]
         
         if not available_symptoms:
             return "Symptom data not fully available in dataset."
@@ -275,8 +519,8 @@ class LungCancerProcessor(BaseDiseaseProcessor):
         insights = "SYMPTOM ANALYSIS:\n"
         
         for symptom in available_symptoms:
-            symptom_present = len(self.data[self.data[symptom] == 1])
-            total = len(self.data)
+            symptom_present = self._count_equal(symptom, 1)
+            total = self._record_count()
             pct = round((symptom_present / total) * 100, 1)
             insights += f"• {symptom.replace('_', ' ').title()}: {pct}% of patients\n"
         
@@ -284,13 +528,13 @@ class LungCancerProcessor(BaseDiseaseProcessor):
     
     def _general_statistics(self) -> str:
         """Generate general dataset statistics"""
-        total = len(self.data)
+        total = self._record_count()
         features = len(self.features)
         
         insights = f"DATASET STATISTICS:\n• Total records: {total}\n• Features analyzed: {features}\n"
         
-        if 'LUNG_CANCER' in self.data.columns:
-            cancer_cases = len(self.data[self.data['LUNG_CANCER'] == 'YES'])
+        if self._has_column('LUNG_CANCER'):
+            cancer_cases = self._cancer_count()
             cancer_rate = round((cancer_cases / total) * 100, 1)
             insights += f"• Cancer cases: {cancer_cases} ({cancer_rate}%)\n"
             insights += f"• Non-cancer cases: {total - cancer_cases}\n"
@@ -299,7 +543,16 @@ class LungCancerProcessor(BaseDiseaseProcessor):
     
     def _general_insights(self) -> str:
         """Generate general insights"""
-        return f"LUNG CANCER DATASET:\n• {len(self.data)} patient records available\n• {len(self.features)} clinical features analyzed\n• Comprehensive symptom and risk factor data\n• Statistical analysis and correlations available"
+        return f"LUNG CANCER DATASET:\n• {self._record_count()} patient records available\n• {len(self.features)} clinical features analyzed\n• Comprehensive symptom and risk factor data\n• Statistical analysis and correlations available"
+    
+    def query_cohort(self, expression: str) -> dict:
+        """Cohort size and cancer rate for a filter like 'SMOKING=1 AND AGE>=60' via the bitmap index"""
+        if self.dataset is None or not self.dataset.total_records:
+            return {"error": "No data available"}
+        try:
+            return self.dataset.cohort_index().query(expression)
+        except ValueError as e:
+            return {"error": str(e)}
     
     def get_basic_info(self) -> dict:
         """Override base method with specific info"""
@@ -307,9 +560,11 @@ class LungCancerProcessor(BaseDiseaseProcessor):
         info.update({
             'name': 'Lung Cancer Analysis',
             'description': 'Comprehensive lung cancer dataset with patient symptoms, risk factors, and outcomes',
-            'total_records': len(self.data),
+            'total_records': self._record_count(),
             'category': 'Oncology',
             'features': self.features,
-            'data_quality': 'complete' if not self.data.empty else 'unavailable'
+            'memory_bytes': self.dataset.memory_usage() if self.dataset is not None else 0,
+            'processing': 'streaming' if self.summary is not None else 'memory',
+            'data_quality': 'complete' if not self._is_empty() else 'unavailable'
         })
         return info
\ No newline at end of file
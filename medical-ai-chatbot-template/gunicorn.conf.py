@@ -0,0 +1,26 @@
+"""Multi-worker serving: gunicorn -c gunicorn.conf.py (run from the project root)
+
+The app is built once in the master (preload_app), so the dataset is shared
+copy-on-write by every worker; sessions, documents and upload jobs live in the
+SQLite store so any worker can serve any request.
+"""
+import gc
+import multiprocessing
+import os
+
+# Set before the app is imported so its stores open on SQLite once, not in memory first
+os.environ.setdefault('MEDIAI_STORAGE_BACKEND', 'sqlite')
+
+wsgi_app = "api:create_app()"
+bind = os.getenv('BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+preload_app = True
+# Streaming chat responses hold a worker thread for the length of the LLM call
+timeout = 120
+
+
+def pre_fork(server, worker):
+    # Move objects built at startup out of the collector's reach so it does not
+    # touch (and un-share) their pages in the workers
+    gc.freeze()
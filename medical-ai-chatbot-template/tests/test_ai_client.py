@@ -0,0 +1,133 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.ai_client import AIClient
+from core.config_manager import ConfigManager
+from core.deadline import Deadline
+from core.provider_health import CLOSED, HALF_OPEN, OPEN, ProviderHealth
+from core.rate_limiter import TokenBucket
+from core.single_flight import SingleFlight
+
+SETTINGS = {
+    'ai': {
+        'provider': 'gemini',
+        'api_key': 'test-key',
+        'failover': {'providers': ['huggingface'], 'hedge': True, 'min_calls': 3},
+        'coalesce': False
+    },
+    'cache': {'enabled': False},
+    'http': {'warm_up': False},
+    'deadlines': {'min_llm_seconds': 0.05}
+}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv('HUGGINGFACE_API_KEY', 'test-key')
+    config_path = tmp_path / 'config.yaml'
+    config_path.write_text(yaml.safe_dump(SETTINGS))
+    client = AIClient(ConfigManager(str(config_path)))
+    # Fresh breakers and limiters: the process-wide ones are shared across tests
+    client.health = {name: ProviderHealth(name, min_calls=3, consecutive_failures=3, open_seconds=0.1)
+                     for name in client.providers}
+    client.rate_limiters = {name: TokenBucket(rate=100, burst=10) for name in client.providers}
+    client.calls = []
+    yield client
+    client._hedge_pool.shutdown(wait=True)
+
+
+def fake_provider(client, monkeypatch, delays):
+    """Answer with the provider's name after the next delay listed for it"""
+    lock = threading.Lock()
+
+    def generate(provider):
+        def respond(prompt, max_tokens, deadline=None):
+            with lock:
+                client.calls.append(provider)
+                delay = delays[provider].pop(0) if len(delays[provider]) > 1 else delays[provider][0]
+            time.sleep(delay)
+            return f"answer from {provider}"
+        return respond
+
+    monkeypatch.setattr(client, '_generate_gemini_response', generate('gemini'))
+    monkeypatch.setattr(client, '_generate_huggingface_response', generate('huggingface'))
+
+
+def prime_p95(health, latency=0.01):
+    for _ in range(health.min_calls):
+        health.record(latency, True)
+
+
+def counter(client, name, **labels):
+    return client.provider_metrics[name].value(**labels)
+
+
+def test_hedge_goes_to_healthy_backup_and_counts_abandoned_call(client, monkeypatch):
+    fake_provider(client, monkeypatch, {'gemini': [0.4], 'huggingface': [0.0]})
+    prime_p95(client.health['gemini'])
+    hedged, abandoned = counter(client, 'hedged', provider='huggingface'), counter(client, 'hedge_abandoned', provider='gemini')
+
+    text, provider = client._request_with_failover('prompt', 100, Deadline(5))
+
+    assert (text, provider) == ('answer from huggingface', 'huggingface')
+    assert counter(client, 'hedged', provider='huggingface') == hedged + 1
+    assert counter(client, 'hedge_abandoned', provider='gemini') == abandoned + 1
+
+
+def test_hedge_never_duplicates_a_half_open_probe(client, monkeypatch):
+    fake_provider(client, monkeypatch, {'gemini': [0.2], 'huggingface': [0.0]})
+    gemini, huggingface = client.health['gemini'], client.health['huggingface']
+    prime_p95(gemini)
+    for _ in range(3):
+        gemini.record(0.01, False)
+        huggingface.record(0.01, False)
+    time.sleep(0.15)
+    assert gemini.state == HALF_OPEN
+    huggingface.allow()  # huggingface's own probe is taken elsewhere
+    hedged = counter(client, 'hedged', provider='gemini')
+
+    text, provider = client._request_with_failover('prompt', 100, Deadline(5))
+
+    assert (text, provider) == ('answer from gemini', 'gemini')
+    assert client.calls == ['gemini']
+    assert counter(client, 'hedged', provider='gemini') == hedged
+    assert gemini.state == CLOSED
+
+
+def test_hedge_skips_backup_whose_breaker_refuses(client, monkeypatch):
+    fake_provider(client, monkeypatch, {'gemini': [0.2, 0.0], 'huggingface': [0.0]})
+    prime_p95(client.health['gemini'])
+    for _ in range(3):
+        client.health['huggingface'].record(0.01, False)
+    assert client.health['huggingface'].state == OPEN
+
+    text, provider = client._request_with_failover('prompt', 100, Deadline(5))
+
+    # The only other provider is open, so the closed primary is hedged against itself
+    assert (text, provider) == ('answer from gemini', 'gemini')
+    assert client.calls == ['gemini', 'gemini']
+
+
+def test_coalesced_wait_timeout_is_not_a_provider_error(client, monkeypatch):
+    fake_provider(client, monkeypatch, {'gemini': [0.5], 'huggingface': [0.5]})
+    client.single_flight = SingleFlight()
+    errors = client.metrics['errors'].value(caller='ai_client')
+    timeouts = client.metrics['coalesced_timeouts'].value(caller='ai_client')
+
+    leader = threading.Thread(target=client.complete, args=('same prompt', 100))
+    leader.start()
+    time.sleep(0.05)
+    assert client.complete('same prompt', 100, deadline=Deadline(0.2)) is None
+    leader.join()
+
+    assert client.metrics['coalesced_timeouts'].value(caller='ai_client') == timeouts + 1
+    assert client.metrics['errors'].value(caller='ai_client') == errors
+    assert client.calls == ['gemini']
@@ -0,0 +1,114 @@
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core import dataset_engine
+from core.dataset_engine import SNAPSHOT_POINTER, DatasetEngine
+
+DATA_PATH = PROJECT_ROOT / 'diseases' / 'lung_cancer' / 'data.csv'
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'data.csv'
+    shutil.copy(DATA_PATH, path)
+    return path
+
+
+def versions(directory):
+    return sorted(entry.name for entry in directory.iterdir() if entry.is_dir())
+
+
+def test_snapshot_round_trip(csv_path, tmp_path):
+    engine = DatasetEngine.from_csv(csv_path)
+    stamp = DatasetEngine.source_stamp(csv_path)
+    engine.save_snapshot(tmp_path / 'data.snapshot', stamp)
+
+    loaded = DatasetEngine.load_snapshot(tmp_path / 'data.snapshot', stamp)
+    assert loaded is not None and loaded.memory_report()['memory_mapped']
+    assert list(loaded.columns) == list(engine.columns)
+    for name, values in engine.columns.items():
+        np.testing.assert_array_equal(loaded.columns[name], values)
+    assert loaded.categories == engine.categories
+    assert loaded.aggregates == engine.aggregates
+    query = 'SMOKING=1 AND AGE>=60'
+    assert loaded.cohort_index().query(query)['cancer_cases'] == engine.cohort_index().query(query)['cancer_cases']
+
+
+def test_cached_load_compiles_once_then_maps(csv_path):
+    first = DatasetEngine.from_csv_cached(csv_path)
+    assert not first.memory_report()['memory_mapped']
+    second = DatasetEngine.from_csv_cached(csv_path)
+    assert second.memory_report()['memory_mapped']
+    assert second.total_records == first.total_records
+
+
+def test_stale_or_mismatched_snapshot_is_ignored(csv_path, tmp_path):
+    directory = tmp_path / 'data.snapshot'
+    stamp = DatasetEngine.source_stamp(csv_path)
+    DatasetEngine.from_csv(csv_path).save_snapshot(directory, stamp)
+
+    assert DatasetEngine.load_snapshot(directory, dict(stamp, size=stamp['size'] + 1)) is None
+    assert DatasetEngine.load_snapshot(directory, stamp, {'target_column': 'OTHER'}) is None
+    assert DatasetEngine.load_snapshot(tmp_path / 'missing', stamp) is None
+
+
+def test_republish_swaps_pointer_and_keeps_previous_version_for_readers(csv_path, tmp_path):
+    directory = tmp_path / 'data.snapshot'
+    engine = DatasetEngine.from_csv(csv_path)
+    engine.save_snapshot(directory, {'size': 1, 'mtime_ns': 1})
+    previous = (directory / SNAPSHOT_POINTER).read_text()
+
+    engine.save_snapshot(directory, {'size': 2, 'mtime_ns': 2})
+    current = (directory / SNAPSHOT_POINTER).read_text()
+
+    assert current != previous
+    # A reader that resolved the old pointer can still open its version
+    assert versions(directory) == sorted([previous, current])
+    assert DatasetEngine.load_snapshot(directory, {'size': 2, 'mtime_ns': 2}) is not None
+    assert DatasetEngine.load_snapshot(directory, {'size': 1, 'mtime_ns': 1}) is None
+
+
+def test_superseded_versions_and_old_layout_are_pruned_after_grace(csv_path, tmp_path):
+    directory = tmp_path / 'data.snapshot'
+    directory.mkdir()
+    (directory / 'manifest.json').write_text('{"version": 1}')
+    engine = DatasetEngine.from_csv(csv_path)
+    engine.save_snapshot(directory)
+    previous = (directory / SNAPSHOT_POINTER).read_text()
+    past = time.time() - 3600
+    for entry in (directory / 'manifest.json', directory / previous):
+        os.utime(entry, (past, past))
+
+    engine.save_snapshot(directory)
+
+    assert not (directory / 'manifest.json').exists()
+    assert versions(directory) == [(directory / SNAPSHOT_POINTER).read_text()]
+
+
+def test_failed_save_leaves_published_snapshot_intact(csv_path, tmp_path, monkeypatch):
+    directory = tmp_path / 'data.snapshot'
+    stamp = DatasetEngine.source_stamp(csv_path)
+    engine = DatasetEngine.from_csv(csv_path)
+    engine.save_snapshot(directory, stamp)
+    published = versions(directory)
+
+    def broken_save(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(dataset_engine.np, 'save', broken_save)
+    with pytest.raises(OSError):
+        engine.save_snapshot(directory, stamp)
+    monkeypatch.undo()
+
+    assert versions(directory) == published
+    assert sorted(entry.name for entry in directory.iterdir() if entry.is_file()) == [SNAPSHOT_POINTER]
+    assert DatasetEngine.load_snapshot(directory, stamp) is not None
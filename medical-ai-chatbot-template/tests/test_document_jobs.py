@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.document_jobs import DocumentJobQueue
+from core.session_store import MemoryStore
+
+
+class RefusingPool:
+    def submit(self, *args, **kwargs):
+        raise RuntimeError('cannot schedule new futures after shutdown')
+
+
+@pytest.fixture
+def queue():
+    queue = DocumentJobQueue(MemoryStore('test_jobs', max_bytes=1 << 20), max_workers=1, max_pending=2)
+    yield queue
+    queue.shutdown()
+
+
+def test_job_runs_and_records_on_done_updates(queue):
+    assert queue.submit('job', {'name': 'a'}, pow, 2, 10, on_done=lambda result: {'result': result * 2})
+    job = queue.wait('job', timeout=10)
+    assert job['status'] == 'done' and job['result'] == 2048
+    assert job['finished'] >= job['created']
+    assert queue.stats()['completed'] == 1 and queue.stats()['pending'] == 0
+
+
+def test_wait_returns_at_timeout_while_job_is_still_running(queue):
+    queue.submit('slow', {}, time.sleep, 1.0)
+    started = time.monotonic()
+    job = queue.wait('slow', timeout=0.2)
+    assert time.monotonic() - started < 0.9
+    assert job['status'] in ('queued', 'running')
+    assert queue.wait('slow', timeout=5)['status'] == 'done'
+
+
+def test_wait_polls_a_job_submitted_by_another_process(queue):
+    # Only the shared store knows about this job, as for a job another worker accepted
+    queue.jobs.set('elsewhere', {'id': 'elsewhere', 'status': 'queued', 'created': time.time()})
+    started = time.monotonic()
+    assert queue.wait('elsewhere', timeout=0.3)['status'] == 'queued'
+    assert time.monotonic() - started >= 0.25
+
+    queue.jobs.update('elsewhere', lambda job: job.update(status='done'))
+    assert queue.wait('elsewhere', timeout=5)['status'] == 'done'
+    assert queue.wait('missing', timeout=0) is None
+
+
+def test_full_queue_rejects_without_recording_a_job(queue):
+    queue.submit('one', {}, time.sleep, 0.5)
+    queue.submit('two', {}, time.sleep, 0.5)
+    assert not queue.submit('three', {}, time.sleep, 0.5)
+    assert queue.get('three') is None
+    assert queue.stats()['rejected'] == 1
+
+
+def test_submit_failure_marks_job_finished_and_runs_cleanup(queue, tmp_path, monkeypatch):
+    upload = tmp_path / 'upload.txt'
+    upload.write_text('content')
+    monkeypatch.setattr(queue, '_executor', lambda: RefusingPool())
+
+    accepted = queue.submit('job', {}, pow, 2, 2, on_failed=lambda: os.remove(upload))
+
+    job = queue.get('job')
+    assert accepted and job['status'] == 'failed'
+    assert 'shutdown' in job['error'] and job['finished'] >= job['created']
+    assert not upload.exists()
+    assert queue.stats() == dict(queue.stats(), failed=1, pending=0)
+
+
+def test_failed_job_runs_cleanup(queue, tmp_path):
+    cleaned = []
+    queue.submit('job', {}, os.remove, str(tmp_path / 'missing.txt'), on_failed=lambda: cleaned.append(True))
+    job = queue.wait('job', timeout=10)
+    assert job['status'] == 'failed' and 'missing.txt' in job['error']
+    assert cleaned == [True]
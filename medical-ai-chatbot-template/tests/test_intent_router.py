@@ -0,0 +1,170 @@
+import csv
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.cohort_questions import answer_cohort_question, parse_cohort_question
+from core.config_manager import ConfigManager
+from core.dataset_engine import DatasetEngine
+from core.intent_router import ROUTE_COHORT, ROUTE_DATASET, ROUTE_LLM, IntentScorer
+
+DATA_PATH = PROJECT_ROOT / 'diseases' / 'lung_cancer' / 'data.csv'
+
+# Filters the cohort parser cannot express, and questions that ask for explanation or advice
+LLM_QUERIES = [
+    "What is the smoking rate among cancer patients over 60?",
+    "How many patients have chest pain?",
+    "How many patients don't smoke?",
+    "What percentage of patients who smoke have lung cancer?",
+    "What is the percentage of patients by gender?",
+    "What is the cancer rate for smokers?",
+    "Why does smoking cause lung cancer?",
+    "How can I quit smoking?",
+    "Explain the age distribution of lung cancer",
+]
+
+
+@pytest.fixture(scope='module')
+def scorer():
+    return IntentScorer()
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return DatasetEngine.from_csv(DATA_PATH)
+
+
+@pytest.fixture(scope='module')
+def rows():
+    with open(DATA_PATH, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def count(rows, predicate):
+    return sum(1 for row in rows if predicate(row))
+
+
+def cancer(row):
+    return row['LUNG_CANCER'].strip().upper() == 'YES'
+
+
+def test_unfiltered_statistical_query_bypasses_llm(scorer):
+    for query in ("What is the average age of cancer patients?", "What is the gender distribution of patients?"):
+        assert scorer.score(query)['route'] == ROUTE_DATASET, query
+
+
+@pytest.mark.parametrize('query', LLM_QUERIES)
+def test_filtered_or_explanatory_query_reaches_llm(scorer, query):
+    intent = scorer.score(query)
+    assert intent['route'] == ROUTE_LLM
+    assert intent['cohort'] is None
+
+
+def test_disabled_scorer_routes_everything_to_llm():
+    scorer = IntentScorer(enabled=False)
+    assert scorer.score("How many patients are older than 60?")['route'] == ROUTE_LLM
+    assert scorer.score("What is the average age of cancer patients?")['route'] == ROUTE_LLM
+
+
+def test_threshold_question_is_answered_exactly(scorer, engine, rows):
+    intent = scorer.score("How many patients are older than 60?")
+    assert intent['route'] == ROUTE_COHORT
+    answer = answer_cohort_question(engine, intent['cohort'])
+    assert answer['count'] == count(rows, lambda row: int(row['AGE']) > 60)
+    assert answer['filter'] == 'AGE>60'
+
+
+def test_filtered_count_is_answered_exactly(scorer, engine, rows):
+    intent = scorer.score("How many cancer patients are female?")
+    assert intent['route'] == ROUTE_COHORT
+    answer = answer_cohort_question(engine, intent['cohort'])
+    assert answer['count'] == count(rows, lambda row: cancer(row) and row['GENDER'] == 'F')
+
+
+def test_filtered_percentage_is_answered_exactly(scorer, engine, rows):
+    intent = scorer.score("What percentage of cancer patients are men?")
+    assert intent['route'] == ROUTE_COHORT
+    answer = answer_cohort_question(engine, intent['cohort'])
+    men_with_cancer = count(rows, lambda row: cancer(row) and row['GENDER'] == 'M')
+    cancer_cases = count(rows, cancer)
+    assert (answer['count'], answer['base']) == (men_with_cancer, cancer_cases)
+    assert answer['percentage'] == round(men_with_cancer / cancer_cases * 100, 1)
+
+
+def test_percentage_population_and_subject(engine, rows):
+    question = parse_cohort_question("What percentage of smokers aged 60 or older have lung cancer?")
+    assert question['population'] == {'filters': ['SMOKING=1', 'AGE>=60'], 'cancer': False}
+    assert question['subject'] == {'filters': [], 'cancer': True}
+    answer = answer_cohort_question(engine, question)
+    older_smokers = lambda row: row['SMOKING'] == '1' and int(row['AGE']) >= 60
+    assert answer['base'] == count(rows, older_smokers)
+    assert answer['count'] == count(rows, lambda row: older_smokers(row) and cancer(row))
+
+
+@pytest.mark.parametrize('query', [
+    "How many men and women have cancer?",
+    "How many female male patients are there?",
+    "What percentage of female patients?",
+])
+def test_ambiguous_cohort_questions_are_not_parsed(query):
+    assert parse_cohort_question(query) is None
+
+
+@pytest.fixture(scope='module')
+def app_module():
+    cwd = os.getcwd()
+    os.chdir(PROJECT_ROOT)
+    spec = importlib.util.spec_from_file_location('mediai_app', PROJECT_ROOT / 'api' / 'app.py')
+    module = importlib.util.module_from_spec(spec)
+    try:
+        spec.loader.exec_module(module)
+        module.create_app()
+        yield module
+    finally:
+        if hasattr(module, 'document_jobs'):
+            module.document_jobs.shutdown()
+        os.chdir(cwd)
+
+
+def test_chat_turn_builds_prompt_only_for_llm_route(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'GEMINI_API_KEY', 'test-key')
+
+    turn = app_module.prepare_chat_turn("How many cancer patients are female?")
+    assert turn['route'] == ROUTE_COHORT and turn['prompt'] is None
+    assert 'GENDER=F AND LUNG_CANCER=YES' in turn['fallback']
+
+    turn = app_module.prepare_chat_turn("What is the gender distribution of patients?")
+    assert turn['route'] == ROUTE_DATASET and turn['prompt'] is None
+    assert 'GENDER ANALYSIS' in turn['fallback']
+
+    for query in LLM_QUERIES:
+        turn = app_module.prepare_chat_turn(query)
+        assert turn['route'] == ROUTE_LLM and turn['prompt'], query
+
+
+def test_disease_manager_answers_cohort_question_exactly_before_warm_up(tmp_path, monkeypatch, rows):
+    from core.disease_manager import DiseaseManager
+
+    monkeypatch.chdir(PROJECT_ROOT)
+    monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+    config_path = tmp_path / 'config.yaml'
+    config_path.write_text(yaml.safe_dump({
+        'diseases': {'enabled': ['lung_cancer'], 'warm_up': 'lazy'},
+        'cache': {'enabled': False},
+        'http': {'warm_up': False}
+    }))
+    manager = DiseaseManager(ConfigManager(str(config_path)))
+    assert manager.processors == {}
+
+    result = manager.process_query("How many lung cancer patients are female?")
+
+    assert result['metadata']['route'] == ROUTE_COHORT
+    expected = count(rows, lambda row: cancer(row) and row['GENDER'] == 'F')
+    assert f"**{expected:,}**" in result['ai_response']
@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.prompt_builder import (TRUNCATION_MARK, PromptBudgetExceeded, PromptBuilder, compact_context,
+                                 estimate_tokens, truncate_tokens)
+
+CONTEXT = ' '.join(f"fact{i}" for i in range(200))
+QUESTION = "What share of smokers in the dataset have lung cancer?"
+
+
+def test_truncate_cuts_at_word_boundary_and_marks_the_cut():
+    cut = truncate_tokens(CONTEXT, 50)
+    assert cut.endswith(TRUNCATION_MARK)
+    assert estimate_tokens(cut) <= 50
+    assert CONTEXT.startswith(cut[:-len(TRUNCATION_MARK)])
+    assert truncate_tokens("short text", 50) == "short text"
+    assert truncate_tokens(CONTEXT, 1) == ''
+
+
+def test_prompt_within_budget_is_sent_whole():
+    builder = PromptBuilder('test', 10000).add('header', "HEADER\n").add('context', CONTEXT, trim=True)
+    assert builder.build() == "HEADER\n" + CONTEXT
+    assert builder.report['trimmed'] == {}
+
+
+def test_only_context_is_trimmed_and_question_stays_whole():
+    builder = PromptBuilder('test', 100)
+    builder.add('header', "HEADER\n")
+    builder.add('context', CONTEXT, trim=True)
+    builder.add('question', QUESTION)
+    prompt = builder.build()
+
+    assert prompt.endswith(QUESTION)
+    assert TRUNCATION_MARK in prompt
+    assert builder.report['prompt_tokens'] <= 100
+    assert set(builder.report['trimmed']) == {'context'}
+
+
+def test_higher_priority_context_gets_budget_first():
+    builder = PromptBuilder('test', estimate_tokens(CONTEXT) + 5)
+    builder.add('low', CONTEXT, trim=True)
+    builder.add('high', CONTEXT, trim=True, priority=1)
+    builder.build()
+    assert list(builder.report['trimmed']) == ['low']
+
+
+def test_fixed_sections_over_budget_raise_instead_of_sending():
+    builder = PromptBuilder('test', 20)
+    builder.add('context', CONTEXT, trim=True)
+    builder.add('question', CONTEXT)
+    with pytest.raises(PromptBudgetExceeded):
+        builder.build()
+    assert builder.report['prompt_tokens'] > builder.report['budget']
+
+
+def test_compact_context_strips_markdown_and_icons():
+    report = "**SMOKING ANALYSIS**\n\n📊 **Dataset Overview:**\n• Total patients: 3,000\n"
+    assert compact_context(report) == "SMOKING ANALYSIS\nDataset Overview:\n- Total patients: 3,000"
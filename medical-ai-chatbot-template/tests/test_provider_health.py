@@ -0,0 +1,82 @@
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.provider_health import CLOSED, HALF_OPEN, OPEN, ProviderHealth
+
+
+def breaker(**kwargs):
+    options = dict(window=10, min_calls=3, failure_threshold=0.5, consecutive_failures=3,
+                   open_seconds=0.1, slow_call_seconds=1.0)
+    options.update(kwargs)
+    return ProviderHealth('test', **options)
+
+
+def open_breaker(health):
+    for _ in range(health.consecutive_failures):
+        health.record(0.01, False)
+    assert health.state == OPEN
+
+
+def test_consecutive_failures_open_the_circuit():
+    health = breaker()
+    health.record(0.01, False)
+    health.record(0.01, False)
+    assert health.state == CLOSED and health.allow()
+    health.record(0.01, False)
+    assert health.state == OPEN
+    assert not health.allow()
+
+
+def test_error_rate_opens_the_circuit_once_min_calls_are_in():
+    health = breaker(consecutive_failures=10)
+    for ok in (True, False, True, False):
+        health.record(0.01, ok)
+    assert health.state == OPEN
+
+
+def test_slow_calls_count_as_failures():
+    health = breaker()
+    for _ in range(3):
+        health.record(2.0, True)
+    assert health.state == OPEN
+
+
+def test_half_open_admits_one_probe_at_a_time():
+    health = breaker()
+    open_breaker(health)
+    time.sleep(0.15)
+    assert health.state == HALF_OPEN
+    assert health.allow()
+    assert not health.allow()
+    # An unused probe slot is handed back
+    health.release()
+    assert health.allow()
+
+
+def test_probe_outcome_closes_or_reopens():
+    health = breaker()
+    open_breaker(health)
+    time.sleep(0.15)
+    assert health.allow()
+    health.record(0.01, False)
+    assert health.state == OPEN and health.times_opened == 2
+
+    time.sleep(0.15)
+    assert health.allow()
+    health.record(0.01, True)
+    assert health.state == CLOSED
+    assert health.stats()['calls'] == 0
+
+
+def test_latency_quantile_needs_min_calls_of_successes():
+    health = breaker()
+    health.record(0.2, True)
+    health.record(0.1, True)
+    assert health.latency_quantile(0.95) is None
+    health.record(0.3, True)
+    assert health.latency_quantile(0.5) == 0.2
+    assert health.latency_quantile(0.95) == 0.3
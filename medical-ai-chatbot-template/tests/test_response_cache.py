@@ -0,0 +1,64 @@
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.response_cache import ResponseCache
+
+
+def test_key_ignores_whitespace_only():
+    key = ResponseCache.make_key("Dose:  5 mg\n daily", 'gemini:model', {'max_tokens': 100})
+    assert ResponseCache.make_key("Dose: 5 mg daily", 'gemini:model', {'max_tokens': 100}) == key
+    assert ResponseCache.make_key("  Dose: 5 mg daily  ", 'gemini:model', {'max_tokens': 100}) == key
+
+
+def test_key_keeps_case():
+    # Units and gene symbols differ only in case
+    assert ResponseCache.make_key("Dose: 5 mg", 'm') != ResponseCache.make_key("Dose: 5 Mg", 'm')
+    assert ResponseCache.make_key("BRCA1 status", 'm') != ResponseCache.make_key("brca1 status", 'm')
+
+
+def test_key_includes_model_and_settings():
+    key = ResponseCache.make_key("prompt", 'gemini:a', {'max_tokens': 100, 'temperature': 0.7})
+    assert ResponseCache.make_key("prompt", 'gemini:b', {'max_tokens': 100, 'temperature': 0.7}) != key
+    assert ResponseCache.make_key("prompt", 'gemini:a', {'max_tokens': 200, 'temperature': 0.7}) != key
+    assert ResponseCache.make_key("prompt", 'gemini:a', {'temperature': 0.7, 'max_tokens': 100}) == key
+
+
+def test_entries_expire_after_ttl():
+    cache = ResponseCache(ttl_seconds=0.1)
+    cache.set('key', 'answer')
+    assert cache.get('key') == 'answer'
+    time.sleep(0.15)
+    assert cache.get('key') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expirations'], stats['entries']) == (1, 1, 1, 0)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.set('a', '1')
+    cache.set('b', '2')
+    cache.get('a')
+    cache.set('c', '3')
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == ('1', '3')
+    assert cache.stats()['evictions'] == 1
+
+
+def test_empty_responses_are_not_cached():
+    cache = ResponseCache()
+    cache.set('key', '')
+    assert cache.get('key') is None
+
+
+def test_persisted_entries_survive_reopen_and_respect_ttl(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    ResponseCache(persist_path=path).set('key', 'answer')
+    assert ResponseCache(persist_path=path).get('key') == 'answer'
+
+    time.sleep(0.15)
+    # Rows older than the TTL are dropped when the store is opened
+    assert ResponseCache(ttl_seconds=0.1, persist_path=path).get('key') is None
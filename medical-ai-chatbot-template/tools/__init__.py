@@ -0,0 +1 @@
+"""Developer tools for Medical AI Chatbot"""
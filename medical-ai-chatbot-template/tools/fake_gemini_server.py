@@ -0,0 +1,146 @@
+"""Local stand-in for the Gemini REST API, for offline development and benchmarks.
+
+Run it and point the app at it:
+
+    python tools/fake_gemini_server.py --port 8089 --latency 0.5 --token-delay 0.05
+    GEMINI_API_BASE=http://127.0.0.1:8089 GEMINI_API_KEY=stub python api/app.py
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+
+
+def build_reply(prompt: str, words: int = 60) -> str:
+    """Deterministic canned answer that echoes the user question"""
+    match = re.search(r'USER QUESTION:\s*(.+)', prompt)
+    question = match.group(1).strip() if match else prompt.strip()[:80]
+    filler = ("Based on the dataset context provided, this stub response stands in for a "
+              "generated medical answer. Please consult healthcare professionals. ").split()
+    body = ' '.join(filler[i % len(filler)] for i in range(words))
+    return f"**Stub answer** to: {question}\n\n{body}"
+
+
+def split_chunks(text: str, chunk_words: int) -> List[str]:
+    """Split text into streaming chunks of roughly chunk_words words"""
+    tokens = re.findall(r'\S+\s*', text)
+    return [''.join(tokens[i:i + chunk_words]) for i in range(0, len(tokens), chunk_words)] or ['']
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        self._send_json(200, {'status': 'fake-gemini'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        self.server.record_call()
+
+        prompt = ''.join(part.get('text', '') for content in payload.get('contents', [])
+                         for part in content.get('parts', []))
+        reply = build_reply(prompt, self.server.reply_words)
+        time.sleep(self.server.latency)
+
+        if ':streamGenerateContent' in self.path:
+            self._stream(split_chunks(reply, self.server.chunk_words))
+        elif ':generateContent' in self.path:
+            time.sleep(self.server.token_delay * len(split_chunks(reply, self.server.chunk_words)))
+            self._send_json(200, self._candidate(reply))
+        else:
+            self._send_json(404, {'error': {'message': f'Unknown path {self.path}'}})
+
+    @staticmethod
+    def _candidate(text: str) -> dict:
+        return {'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'}}]}
+
+    def _send_json(self, status: int, data: dict):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, chunks: List[str]):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        for index, chunk in enumerate(chunks):
+            if index:
+                time.sleep(self.server.token_delay)
+            frame = f"data: {json.dumps(self._candidate(chunk))}\r\n\r\n".encode('utf-8')
+            self.wfile.write(f"{len(frame):x}\r\n".encode('ascii') + frame + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], latency: float = 0.0, token_delay: float = 0.0,
+                 chunk_words: int = 3, reply_words: int = 60, verbose: bool = False):
+        super().__init__(address, FakeGeminiHandler)
+        self.latency = latency
+        self.token_delay = token_delay
+        self.chunk_words = chunk_words
+        self.reply_words = reply_words
+        self.verbose = verbose
+        self.calls = 0
+        self._calls_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record_call(self):
+        with self._calls_lock:
+            self.calls += 1
+
+
+def start_fake_gemini(host: str = '127.0.0.1', port: int = 0, **options) -> FakeGeminiServer:
+    """Start the fake server on a background thread; port 0 picks a free port"""
+    server = FakeGeminiServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name='fake-gemini', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Gemini API server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before the first byte')
+    parser.add_argument('--token-delay', type=float, default=0.0, help='seconds between streamed chunks')
+    parser.add_argument('--chunk-words', type=int, default=3)
+    parser.add_argument('--reply-words', type=int, default=60)
+    args = parser.parse_args()
+
+    server = FakeGeminiServer((args.host, args.port), latency=args.latency, token_delay=args.token_delay,
+                              chunk_words=args.chunk_words, reply_words=args.reply_words, verbose=True)
+    print(f"🧪 Fake Gemini API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -151,10 +151,19 @@ const API = {
     
     // File upload
     async uploadFile(formData) {
-        return fetch('/api/upload', {
+        let result = await fetch('/api/upload', {
             method: 'POST',
             body: formData
         }).then(response => response.json());
+        
+        // Extraction runs as a background job; poll with a short server wait and backoff
+        let delay = 250;
+        while (result.job_id && (result.status === 'queued' || result.status === 'running')) {
+            await new Promise(resolve => setTimeout(resolve, delay));
+            delay = Math.min(delay * 2, 4000);
+            result = await fetch(`${result.status_url}?wait=1`).then(response => response.json());
+        }
+        return result;
     }
 };
 
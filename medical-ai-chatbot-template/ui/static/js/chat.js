@@ -53,8 +53,8 @@ async function sendMessage() {
     }
     
     try {
-        // Send to API
-        const response = await fetch('/api/chat', {
+        // Stream from API, rendering tokens as they arrive
+        const response = await fetch('/api/chat/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -64,10 +64,21 @@ async function sendMessage() {
             })
         });
         
-        const data = await response.json();
-        
-        if (response.ok) {
-            addBotMessage(data.ai_response || 'No response received');
+        if (response.ok && response.body) {
+            const botMessage = addBotMessage('');
+            let text = '';
+            
+            await readEventStream(response, (event, data) => {
+                if (event === 'token') {
+                    text += data.text;
+                    if (botMessage) botMessage.textContent = text;
+                    scrollToBottom();
+                }
+            });
+            
+            if (!text && botMessage) {
+                botMessage.textContent = 'No response received';
+            }
         } else {
             addBotMessage('Sorry, I encountered an error. Please try again.');
         }
@@ -138,6 +149,7 @@ function addBotMessage(message) {
     
     chatMessages.appendChild(messageDiv);
     scrollToBottom();
+    return messageDiv.querySelector('.message-content p');
 }
 
 function escapeHtml(text) {